@@ -1,11 +1,25 @@
+import copy
+import hashlib
 import json
+import time
 import requests
-from typing import Dict, Any
-from datetime import datetime
+import httpx
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
+from datetime import date
 
 from config import settings
 from .llm_strategies import OpenAIStrategy, OllamaStrategy
+from .prompt_registry import PromptTemplate, get_prompt_registry
+from utils.cache import TieredCache, MISSING
 from utils.langfuse_client import LangfuseClient
+from utils.metrics import observe, record_upstream_error, timed
+
+llm_cache = TieredCache(
+    "llm",
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    db_path=settings.LLM_CACHE_DB_PATH or None
+)
 
 class LLMAgent:
     def __init__(self, provider: str = None, model_name: str = None, api_key: str = None):
@@ -21,35 +35,161 @@ class LLMAgent:
         else:
             raise ValueError(f"Nieznany provider LLM: {self.provider}")
 
-    def parse_transport_request(self, prompt: str, system_prompt_path: str) -> Dict[str, Any]:
-        system_message = generate_system_prompt(system_prompt_path)
+    def close(self) -> None:
+        self.strategy.close()
+
+    def _prepare(self, prompt: str, system_prompt_path: Optional[str]) -> Tuple[str, PromptTemplate, str]:
+        """System message for today from the prompt registry, its template and the cache key."""
+        reference_day = date.today()
+        system_message, template = get_prompt_registry().render(system_prompt_path, reference_day)
+        cache_key = build_cache_key(prompt, template.version, self.model_name, self.provider, reference_day)
+        return system_message, template, cache_key
+
+    def _metadata(self, template: PromptTemplate, **extra) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "model": self.model_name,
+            "system_prompt_path": template.path,
+            "prompt_name": template.name,
+            "prompt_version": template.version,
+            **extra
+        }
+
+    def _get_cached(self, cache_key: str) -> Any:
+        if not settings.LLM_CACHE_ENABLED:
+            return MISSING
+        cached = llm_cache.get(cache_key)
+        # Router modyfikuje wynik w miejscu - zwracamy kopię
+        return cached if cached is MISSING else copy.deepcopy(cached)
+
+    def _store_cached(self, cache_key: str, response: Dict[str, Any]) -> None:
+        if settings.LLM_CACHE_ENABLED:
+            llm_cache.set(cache_key, copy.deepcopy(response))
+
+    async def _aget_cached(self, cache_key: str) -> Any:
+        # Odczyt z SQLite (LLM_CACHE_DB_PATH) poza pętlą zdarzeń
+        if not settings.LLM_CACHE_ENABLED:
+            return MISSING
+        cached = await llm_cache.aget(cache_key)
+        return cached if cached is MISSING else copy.deepcopy(cached)
+
+    async def _astore_cached(self, cache_key: str, response: Dict[str, Any]) -> None:
+        if settings.LLM_CACHE_ENABLED:
+            await llm_cache.aset(cache_key, copy.deepcopy(response))
+
+    def parse_transport_request(self, prompt: str, system_prompt_path: Optional[str] = None) -> Dict[str, Any]:
+        system_message, template, cache_key = self._prepare(prompt, system_prompt_path)
+        cached = self._get_cached(cache_key)
+        if cached is not MISSING:
+            return cached
 
         try:
-            response = self.strategy.generate_response(prompt, system_message, self.model_name)
+            with timed("llm"):
+                response = self.strategy.generate_response(prompt, system_message, self.model_name)
             
             # Track the request in Langfuse
             self.langfuse.track_llm_request(
                 prompt=prompt,
                 system_message=system_message,
                 response=response,
-                metadata={
-                    "provider": self.provider,
-                    "model": self.model_name,
-                    "system_prompt_path": system_prompt_path
-                }
+                metadata=self._metadata(template)
             )
-            
+
+            self._store_cached(cache_key, response)
             return response
         except requests.exceptions.RequestException as e:
+            record_upstream_error(self.provider)
+            raise Exception(f"Błąd zapytania HTTP: {str(e)}")
+        except json.JSONDecodeError as e:
+            record_upstream_error(self.provider)
+            raise Exception(f"Błąd dekodowania JSON z odpowiedzi: {str(e)}")
+
+    async def aparse_transport_request(self, prompt: str, system_prompt_path: Optional[str] = None) -> Dict[str, Any]:
+        system_message, template, cache_key = self._prepare(prompt, system_prompt_path)
+        cached = await self._aget_cached(cache_key)
+        if cached is not MISSING:
+            return cached
+
+        try:
+            with timed("llm"):
+                response = await self.strategy.agenerate_response(prompt, system_message, self.model_name)
+
+            self.langfuse.track_llm_request(
+                prompt=prompt,
+                system_message=system_message,
+                response=response,
+                metadata=self._metadata(template)
+            )
+
+            await self._astore_cached(cache_key, response)
+            return response
+        except httpx.HTTPError as e:
+            record_upstream_error(self.provider)
             raise Exception(f"Błąd zapytania HTTP: {str(e)}")
         except json.JSONDecodeError as e:
+            record_upstream_error(self.provider)
             raise Exception(f"Błąd dekodowania JSON z odpowiedzi: {str(e)}")
 
+    async def astream_transport_request(self, prompt: str, system_prompt_path: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Yields fragments of the JSON produced by the LLM as they arrive.
+        A cached extraction is yielded as a single fragment.
+        """
+        system_message, template, cache_key = self._prepare(prompt, system_prompt_path)
+        cached = await self._aget_cached(cache_key)
+        if cached is not MISSING:
+            yield json.dumps(cached, ensure_ascii=False)
+            return
+
+        chunks = []
+        started = time.perf_counter()
+        try:
+            async for delta in self.strategy.astream_response(prompt, system_message, self.model_name):
+                if not chunks:
+                    observe("llm.first_token", time.perf_counter() - started)
+                chunks.append(delta)
+                yield delta
+            response = json.loads("".join(chunks))
+        except httpx.HTTPError as e:
+            record_upstream_error(self.provider)
+            raise Exception(f"Błąd zapytania HTTP: {str(e)}")
+        except json.JSONDecodeError as e:
+            record_upstream_error(self.provider)
+            raise Exception(f"Błąd dekodowania JSON z odpowiedzi: {str(e)}")
+        finally:
+            # Czas generatora obejmuje też konsumenta strumienia (np. parser pól)
+            observe("llm.stream", time.perf_counter() - started)
+
+        self.langfuse.track_llm_request(
+            prompt=prompt,
+            system_message=system_message,
+            response=response,
+            metadata=self._metadata(template, stream=True)
+        )
+
+        await self._astore_cached(cache_key, response)
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split())
+
 
-def generate_system_prompt(base_prompt_path: str) -> str:
-        today_str = datetime.today().strftime("%Y-%m-%d")
+def build_cache_key(prompt: str, prompt_version: str, model_name: str, provider: str, reference_day: date) -> str:
+    """
+    Klucz cache odpowiedzi LLM: skrót znormalizowanego prompta, wersji (skrótu treści)
+    prompta systemowego, modelu i providera. Dzień odniesienia jest częścią klucza,
+    żeby daty względne (np. "jutro") rozwiązywały się względem właściwego dnia.
+    """
+    payload = json.dumps({
+        "prompt": normalize_prompt(prompt),
+        "system_prompt": prompt_version,
+        "model": model_name,
+        "provider": provider,
+        "reference_day": reference_day.isoformat()
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-        with open(base_prompt_path, 'r', encoding='utf-8') as f:
-            base_prompt = f.read()
 
-        return f"Dzisiaj jest {today_str}.\n\n{base_prompt.strip()}"
\ No newline at end of file
+def generate_system_prompt(system_prompt_path: Optional[str] = None) -> str:
+    """System prompt (by name or path) rendered for today, from the prompt registry."""
+    return get_prompt_registry().render(system_prompt_path, date.today())[0]
@@ -1,65 +1,143 @@
 from abc import ABC, abstractmethod
 import json
 import requests
+import httpx
 import logging
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any, Optional
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='llm_responses.log'
-)
-logger = logging.getLogger('llm_strategies')
+from utils.http_client import get_async_client
+
+# Konfiguracja handlerów w utils/logging_config.py (kolejka w tle, JSON, rotacja)
+logger = logging.getLogger(__name__)
 
 class LLMStrategy(ABC):
     @abstractmethod
     def generate_response(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
         pass
 
+    @abstractmethod
+    async def agenerate_response(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def astream_response(self, prompt: str, system_message: str, model_name: str) -> AsyncIterator[str]:
+        """Yields fragments of the raw model output as the provider streams them."""
+        pass
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return self.client or get_async_client()
+
+    def close(self) -> None:
+        """Zamyka synchroniczną sesję HTTP strategii."""
+        self.session.close()
+
     def _log_response(self, provider: str, raw_response: str):
-        logger.info(f"Provider: {provider}\nRaw Response:\n{raw_response}\n{'='*50}")
+        # Surowa odpowiedź tylko w próbce wpisów (LOG_PAYLOAD_SAMPLE_RATE)
+        logger.info("LLM response received", extra={"provider": provider, "response_chars": len(raw_response), "payload": raw_response})
 
 class OpenAIStrategy(LLMStrategy):
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, client: Optional[httpx.AsyncClient] = None):
         self.api_url = "https://api.openai.com/v1/chat/completions"
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}"
         }
+        self.client = client
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
 
-    def generate_response(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
+    def _build_payload(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
         messages = [
             {"role": "system", "content": system_message.strip()},
             {"role": "user", "content": prompt.strip()}
         ]
-        payload = {
+        return {
             "model": model_name,
             "messages": messages,
             "temperature": 0.1
         }
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        response.raise_for_status()
-        result = response.json()
+
+    def _parse_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
         content = result["choices"][0]["message"]["content"]
         self._log_response("OpenAI", content)
         return json.loads(content)
 
+    def generate_response(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
+        payload = self._build_payload(prompt, system_message, model_name)
+        response = self.session.post(self.api_url, json=payload)
+        response.raise_for_status()
+        return self._parse_result(response.json())
+
+    async def agenerate_response(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
+        payload = self._build_payload(prompt, system_message, model_name)
+        response = await self._get_client().post(self.api_url, headers=self.headers, json=payload)
+        response.raise_for_status()
+        return self._parse_result(response.json())
+
+    async def astream_response(self, prompt: str, system_message: str, model_name: str) -> AsyncIterator[str]:
+        payload = {**self._build_payload(prompt, system_message, model_name), "stream": True}
+        content = []
+        async with self._get_client().stream("POST", self.api_url, headers=self.headers, json=payload) as response:
+            response.raise_for_status()
+            # Server-sent events: "data: {...}", zakończone "data: [DONE]"
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    content.append(delta)
+                    yield delta
+        self._log_response("OpenAI", "".join(content))
+
 class OllamaStrategy(LLMStrategy):
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.api_url = "http://localhost:11434/api/generate"
+        self.client = client
+        self.session = requests.Session()
 
-    def generate_response(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
+    def _build_payload(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
         full_prompt = f"{system_message.strip()}\n\n{prompt.strip()}"
-        payload = {
+        return {
             "model": model_name,
             "prompt": full_prompt,
             "temperature": 0.1,
             "stream": False
         }
-        response = requests.post(self.api_url, json=payload)
-        response.raise_for_status()
-        result = response.json()
+
+    def _parse_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
         content = result.get("response", "").strip()
         self._log_response("Ollama", content)
-        return json.loads(content) 
\ No newline at end of file
+        return json.loads(content)
+
+    def generate_response(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
+        payload = self._build_payload(prompt, system_message, model_name)
+        response = self.session.post(self.api_url, json=payload)
+        response.raise_for_status()
+        return self._parse_result(response.json())
+
+    async def agenerate_response(self, prompt: str, system_message: str, model_name: str) -> Dict[str, Any]:
+        payload = self._build_payload(prompt, system_message, model_name)
+        response = await self._get_client().post(self.api_url, json=payload)
+        response.raise_for_status()
+        return self._parse_result(response.json())
+
+    async def astream_response(self, prompt: str, system_message: str, model_name: str) -> AsyncIterator[str]:
+        payload = {**self._build_payload(prompt, system_message, model_name), "stream": True}
+        content = []
+        async with self._get_client().stream("POST", self.api_url, json=payload) as response:
+            response.raise_for_status()
+            # Ollama strumieniuje obiekty JSON, po jednym w linii
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                delta = chunk.get("response", "")
+                if delta:
+                    content.append(delta)
+                    yield delta
+                if chunk.get("done"):
+                    break
+        self._log_response("Ollama", "".join(content))
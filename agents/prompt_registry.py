@@ -0,0 +1,186 @@
+"""
+Prompt registry.
+System prompts from PROMPTS_DIR are read once and addressed by name (file stem,
+e.g. "p_v1"). Each template carries a short content hash (version) used in LLM
+cache keys and telemetry, and keeps its rendered per-day variants, so a request
+neither touches the disk nor rebuilds the prompt string. Files are re-checked
+by mtime/size at most every PROMPT_RELOAD_INTERVAL_SECONDS; changed, added and
+removed prompts are picked up without a restart.
+"""
+import hashlib
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+
+PROMPT_SUFFIX = ".txt"
+
+# Ile dni renderowanych wariantów trzymać per szablon (dziś, jutro po północy, ...)
+RENDERED_DAYS = 3
+
+
+def render_system_prompt(base_prompt: str, reference_day: date) -> str:
+    return f"Dzisiaj jest {reference_day.strftime('%Y-%m-%d')}.\n\n{base_prompt.strip()}"
+
+
+class PromptTemplate:
+    """One system prompt file: its text, version hash and rendered per-day variants."""
+
+    __slots__ = ("name", "path", "text", "version", "signature", "_rendered", "_lock")
+
+    def __init__(self, name: str, path: str, text: str, signature: Tuple[int, int]):
+        self.name = name
+        self.path = path
+        self.text = text
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        self.signature = signature
+        self._rendered: Dict[date, str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, name: str, path: str) -> "PromptTemplate":
+        signature = _signature(path)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(name, path, f.read(), signature)
+
+    def render(self, reference_day: date) -> str:
+        rendered = self._rendered.get(reference_day)
+        if rendered is None:
+            rendered = render_system_prompt(self.text, reference_day)
+            with self._lock:
+                self._rendered[reference_day] = rendered
+                while len(self._rendered) > RENDERED_DAYS:
+                    self._rendered.pop(min(self._rendered))
+        return rendered
+
+    def info(self) -> Dict[str, str]:
+        return {"name": self.name, "version": self.version}
+
+
+class PromptRegistry:
+    """
+    Prompt templates keyed by name. Besides names, get() accepts a file path
+    (e.g. "prompts/p_v1.txt"); files outside the directory are registered
+    under their absolute path and reloaded the same way.
+    """
+
+    def __init__(self, directory: str, reload_interval: float = 2.0):
+        """
+        Args:
+            reload_interval: Seconds between mtime checks (0 = every lookup, < 0 = never)
+        """
+        self.directory = os.path.abspath(directory)
+        self.reload_interval = reload_interval
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self.reloads = 0
+        with self._lock:
+            self._scan()
+
+    def get(self, name: Optional[str] = None) -> PromptTemplate:
+        """Template by name or path; None selects PROMPT_DEFAULT. Raises KeyError for unknown prompts."""
+        self._maybe_reload()
+        key = self._key(name or settings.PROMPT_DEFAULT)
+        template = self._templates.get(key)
+        if template is not None:
+            return template
+
+        path = os.path.abspath(name) if name else None
+        if path and os.path.isfile(path):
+            with self._lock:
+                template = self._templates.get(path) or PromptTemplate.load(path, path)
+                self._templates[path] = template
+            return template
+        raise KeyError(name)
+
+    def render(self, name: Optional[str], reference_day: date) -> Tuple[str, PromptTemplate]:
+        """Rendered system prompt for reference_day and the template it came from."""
+        template = self.get(name)
+        return template.render(reference_day), template
+
+    def templates(self) -> List[PromptTemplate]:
+        self._maybe_reload()
+        return sorted(self._templates.values(), key=lambda template: template.name)
+
+    def names(self) -> List[str]:
+        """Names of the prompts in the registry directory (the ones selectable per request)."""
+        return [template.name for template in self.templates() if template.name != template.path]
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self.get(name)
+        except KeyError:
+            return False
+        return True
+
+    def reload(self) -> None:
+        """Re-reads changed, new and removed prompt files now."""
+        with self._lock:
+            self._checked = time.monotonic()
+            self._scan()
+
+    def _key(self, name: str) -> str:
+        # "p_v1", "p_v1.txt" i "prompts/p_v1.txt" wskazują ten sam szablon z katalogu rejestru
+        path = os.path.abspath(name)
+        if name.endswith(PROMPT_SUFFIX) and (os.path.dirname(path) == self.directory or os.path.basename(name) == name):
+            return os.path.basename(name)[:-len(PROMPT_SUFFIX)]
+        return name if name in self._templates else path
+
+    def _maybe_reload(self) -> None:
+        if self.reload_interval < 0 or time.monotonic() - self._checked < self.reload_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked < self.reload_interval:
+                return
+            self._checked = time.monotonic()
+            self._scan()
+
+    def _scan(self) -> None:
+        found = {}
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                if filename.endswith(PROMPT_SUFFIX):
+                    found[filename[:-len(PROMPT_SUFFIX)]] = os.path.join(self.directory, filename)
+        # Pliki spoza katalogu zarejestrowane po ścieżce
+        for name, template in self._templates.items():
+            if name == template.path and os.path.isfile(template.path):
+                found[name] = template.path
+
+        templates = {}
+        for name, path in found.items():
+            current = self._templates.get(name)
+            try:
+                if current is not None and current.signature == _signature(path):
+                    templates[name] = current
+                    continue
+                templates[name] = PromptTemplate.load(name, path)
+            except OSError:
+                # Plik usunięty lub w trakcie zapisu - zostaje poprzednia wersja
+                if current is not None:
+                    templates[name] = current
+                continue
+            if current is not None:
+                self.reloads += 1
+        self._templates = templates
+
+
+def _signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry(settings.PROMPTS_DIR, settings.PROMPT_RELOAD_INTERVAL_SECONDS)
+    return _registry
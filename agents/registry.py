@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+import threading
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from config import settings
+from utils.http_client import get_async_client, close_async_client
+from utils.langfuse_client import LangfuseClient
+
+if TYPE_CHECKING:
+    from .llm_agent import LLMAgent
+
+
+class AgentRegistry:
+    """
+    Rejestr agentów LLM współdzielonych przez cały proces.
+
+    Agenci (wraz ze strategiami i pulami połączeń) tworzeni są raz,
+    kluczowani po (provider, model, skrót klucza API), i zamykani przy
+    wyłączaniu aplikacji. Po zmianie LLM_API_KEY powstaje nowy agent.
+    """
+
+    def __init__(self):
+        self._agents: Dict[Tuple[str, str, str], "LLMAgent"] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str = None, model_name: str = None, api_key: str = None) -> "LLMAgent":
+        provider = provider or settings.LLM_PROVIDER
+        model_name = model_name or (settings.OLLAMA_MODEL if provider == "ollama" else "gpt-3.5-turbo")
+        api_key = api_key or settings.LLM_API_KEY
+        # Skrót zamiast samego klucza - klucz API nie trafia do struktur rejestru
+        key = (provider, model_name, hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16])
+
+        agent = self._agents.get(key)
+        if agent is not None:
+            return agent
+
+        # Stos LLM (httpx, requests, strategie) ładowany przy pierwszym agencie
+        from .llm_agent import LLMAgent
+
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is None:
+                agent = LLMAgent(provider=provider, model_name=model_name, api_key=api_key)
+                self._agents[key] = agent
+        return agent
+
+    async def startup(self) -> None:
+        """Otwiera pulę połączeń i buduje domyślnego agenta."""
+        get_async_client()
+        self.get()
+
+    async def shutdown(self) -> None:
+        """Zamyka sesje wszystkich agentów i współdzieloną pulę połączeń, wysyła zaległą telemetrię."""
+        with self._lock:
+            agents = list(self._agents.values())
+            self._agents.clear()
+
+        for agent in agents:
+            agent.close()
+
+        await close_async_client()
+        await asyncio.to_thread(LangfuseClient().shutdown)
+
+
+agent_registry = AgentRegistry()
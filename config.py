@@ -2,9 +2,11 @@ import os
 import secrets
 from typing import List
 from pydantic import BaseModel
-from dotenv import load_dotenv
 
-load_dotenv()
+# W kontenerach zmienne środowiskowe są już ustawione - LOAD_DOTENV=false pomija szukanie pliku .env
+if os.getenv("LOAD_DOTENV", "true").lower() == "true":
+    from dotenv import load_dotenv
+    load_dotenv()
 
 class Settings(BaseModel):
     PROJECT_NAME: str = "Transport Pricing API"
@@ -29,33 +31,99 @@ class Settings(BaseModel):
     LANGFUSE_HOST: str = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
     LANGFUSE_ENABLED: bool = os.getenv("LANGFUSE_ENABLED", "false").lower() == "true"
     LANGFUSE_USER_ID: str = os.getenv("LANGFUSE_USER_ID", "default-user")
+    # Eksport w tle (zob. utils/batch_exporter.py)
+    LANGFUSE_QUEUE_SIZE: int = int(os.getenv("LANGFUSE_QUEUE_SIZE", "1000"))
+    LANGFUSE_BATCH_SIZE: int = int(os.getenv("LANGFUSE_BATCH_SIZE", "50"))
+    LANGFUSE_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("LANGFUSE_FLUSH_INTERVAL_SECONDS", "2"))
+    LANGFUSE_QUEUE_HIGH_WATERMARK: float = float(os.getenv("LANGFUSE_QUEUE_HIGH_WATERMARK", "0.8"))  # powyżej - próbkowanie
+    LANGFUSE_BACKPRESSURE_SAMPLE_RATE: float = float(os.getenv("LANGFUSE_BACKPRESSURE_SAMPLE_RATE", "0.1"))
 
-    # # Vehicles
-    # VEHICLE_TYPES = {
-    #     "bus": {
-    #         "max_length": 420,  # cm
-    #         "max_width": 220,   # cm
-    #         "max_height": 220,  # cm
-    #         "max_weight": 1500, # kg
-    #         "ldm_capacity": 7,  # loading meters
-    #     },
-    #     "solowka": {
-    #         "max_length": 720,  # cm
-    #         "max_width": 245,   # cm
-    #         "max_height": 270,  # cm
-    #         "max_weight": 12000, # kg
-    #         "ldm_capacity": 15,  # loading meters
-    #     },
-    #     "naczepa": {
-    #         "max_length": 1360, # cm
-    #         "max_width": 245,   # cm
-    #         "max_height": 270,  # cm
-    #         "max_weight": 24000, # kg
-    #         "ldm_capacity": 33,  # loading meters
-    #     },
-    # }
-
-settings = Settings()
-
-# Wyświetl wygenerowany klucz API przy starcie
-print(f"Twój klucz API: {settings.API_KEY}")
\ No newline at end of file
+    # Pula połączeń HTTP dla LLM
+    LLM_HTTP_TIMEOUT: float = float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+    LLM_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "10"))
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "200"))
+    LLM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "50"))
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+    # Cache odpowiedzi LLM
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+    LLM_CACHE_TTL_SECONDS: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_DB_PATH: str = os.getenv("LLM_CACHE_DB_PATH", "")  # pusty = tylko pamięć
+
+    # Prompty systemowe (zob. agents/prompt_registry.py)
+    PROMPTS_DIR: str = os.getenv("PROMPTS_DIR", "prompts")
+    PROMPT_DEFAULT: str = os.getenv("PROMPT_DEFAULT", "p_v1")
+    PROMPT_RELOAD_INTERVAL_SECONDS: float = float(os.getenv("PROMPT_RELOAD_INTERVAL_SECONDS", "2"))  # 0 = przy każdym zapytaniu, < 0 = bez przeładowania
+
+    # Cache geokodowania (Nominatim)
+    GEOCODE_CACHE_MAX_ENTRIES: int = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "10000"))
+    GEOCODE_CACHE_TTL_SECONDS: float = float(os.getenv("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    GEOCODE_NEGATIVE_TTL_SECONDS: float = float(os.getenv("GEOCODE_NEGATIVE_TTL_SECONDS", "3600"))
+    GEOCODE_CACHE_DB_PATH: str = os.getenv("GEOCODE_CACHE_DB_PATH", "geocode_cache.sqlite")  # pusty = tylko pamięć
+    # Odstęp między zapytaniami do Nominatim w całym procesie (polityka użycia: max 1 zapytanie/s; 0 = bez limitu)
+    NOMINATIM_MIN_INTERVAL_SECONDS: float = float(os.getenv("NOMINATIM_MIN_INTERVAL_SECONDS", "1"))
+
+    # Cache dystansów drogowych (OSRM)
+    ROUTE_CACHE_MAX_ENTRIES: int = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "50000"))
+    ROUTE_CACHE_TTL_SECONDS: float = float(os.getenv("ROUTE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    ROUTE_CACHE_DB_PATH: str = os.getenv("ROUTE_CACHE_DB_PATH", "route_cache.sqlite")  # pusty = tylko pamięć
+    ROUTE_CACHE_PRECISION: int = int(os.getenv("ROUTE_CACHE_PRECISION", "4"))  # miejsca po przecinku (~11 m)
+    ROUTE_CACHE_SYMMETRIC: bool = os.getenv("ROUTE_CACHE_SYMMETRIC", "true").lower() == "true"
+    # exact - czekamy na OSRM; estimate - od razu szacunek (haversine x współczynnik drogowy),
+    # dokładny dystans OSRM liczony w tle i zapisywany w cache
+    DISTANCE_MODE: str = os.getenv("DISTANCE_MODE", "exact")
+    ROAD_FACTOR_DEFAULT: float = float(os.getenv("ROAD_FACTOR_DEFAULT", "1.3"))
+    # Skalibrowane współczynniki per region (python -m utils.road_factors, zob. utils/road_factors.py)
+    ROAD_FACTORS_PATH: str = os.getenv("ROAD_FACTORS_PATH", "data/road_factors.json")
+    ROAD_FACTORS_MIN_SAMPLES: int = int(os.getenv("ROAD_FACTORS_MIN_SAMPLES", "30"))
+    OSRM_TABLE_MAX_COORDS: int = int(os.getenv("OSRM_TABLE_MAX_COORDS", "100"))  # limit publicznego OSRM
+    # Limit miejsc (odbioru + dostawy) w jednym żądaniu /distance/matrix - każde nowe miejsce to geokodowanie
+    DISTANCE_MATRIX_MAX_LOCATIONS: int = int(os.getenv("DISTANCE_MATRIX_MAX_LOCATIONS", "100"))
+
+    # Przetwarzanie wsadowe /parse/batch
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+    # Planowanie załadunku (zob. utils/load_planner.py)
+    LOAD_PLANNER_ENABLED: bool = os.getenv("LOAD_PLANNER_ENABLED", "false").lower() == "true"
+    LOAD_PLANNER_TIME_BUDGET_MS: int = int(os.getenv("LOAD_PLANNER_TIME_BUDGET_MS", "50"))  # na całą flotę
+    # Rozmieszczenie stosów w odpowiedzi tylko dla planów z co najwyżej tyloma stosami (0 = bez rozmieszczenia)
+    LOAD_PLANNER_MAX_PLACEMENTS: int = int(os.getenv("LOAD_PLANNER_MAX_PLACEMENTS", "0"))
+
+    # Cache analiz ładunku - powtarzające się manifesty (np. 33 palety EUR)
+    CARGO_CACHE_ENABLED: bool = os.getenv("CARGO_CACHE_ENABLED", "true").lower() == "true"
+    CARGO_CACHE_MAX_ENTRIES: int = int(os.getenv("CARGO_CACHE_MAX_ENTRIES", "4096"))
+    CARGO_CACHE_MAX_BYTES: int = int(os.getenv("CARGO_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # rozmiar wpisów JSON
+
+    # Offline indeks kodów pocztowych (zob. utils/postal_index.py)
+    POSTAL_INDEX_PATH: str = os.getenv("POSTAL_INDEX_PATH", "data/pl_postal_codes.bin")
+    # Zrzut GeoNames (ścieżka lub URL) dla jawnego kroku budowania: python -m utils.postal_index.
+    # Aplikacja nigdy nie buduje ani nie pobiera indeksu sama
+    POSTAL_INDEX_SOURCE: str = os.getenv("POSTAL_INDEX_SOURCE", "")
+    POSTAL_INDEX_DOWNLOAD_TIMEOUT: float = float(os.getenv("POSTAL_INDEX_DOWNLOAD_TIMEOUT", "30"))
+
+    # Flota pojazdów (zob. utils/fleet.py)
+    FLEET_CONFIG_PATH: str = os.getenv("FLEET_CONFIG_PATH", "data/fleet.json")
+    # Standardowe palety (zob. utils/pallets.py): zakres tablic LDM i tolerancja dopasowania wymiarów z LLM
+    PALLET_TABLE_MAX_QUANTITY: int = int(os.getenv("PALLET_TABLE_MAX_QUANTITY", "200"))
+    PALLET_SNAP_TOLERANCE_CM: float = float(os.getenv("PALLET_SNAP_TOLERANCE_CM", "2"))  # 0 = bez dopasowania
+
+    # Metryki etapów i /metrics (zob. utils/metrics.py)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_WINDOW_SIZE: int = int(os.getenv("METRICS_WINDOW_SIZE", "1024"))  # próbki na etap do p50/p95/p99
+
+    # Logowanie przez kolejkę w tle (zob. utils/logging_config.py)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # "json" albo "text"
+    LOG_FILE: str = os.getenv("LOG_FILE", "")  # puste = tylko stdout
+    LOG_FILE_MAX_BYTES: int = int(os.getenv("LOG_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_FILE_BACKUP_COUNT: int = int(os.getenv("LOG_FILE_BACKUP_COUNT", "5"))
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # po zapełnieniu wpisy są odrzucane
+    LOG_PAYLOAD_SAMPLE_RATE: float = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))  # odsetek wpisów z pełnym payloadem
+
+    # Szybki start (scale-to-zero): aplikacja przyjmuje ruch od razu, rozgrzewanie
+    # (indeks kodów, flota, agent LLM) odbywa się w tle zamiast przed startem
+    FAST_START: bool = os.getenv("FAST_START", "false").lower() == "true"
+
+settings = Settings()
\ No newline at end of file
@@ -1,13 +1,65 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from routers import api_router
+from agents.prompt_registry import get_prompt_registry
+from agents.registry import agent_registry
+from utils.logging_config import configure_logging, shutdown_logging
+from utils.lazy import lazy_import
 from config import settings
 
+logger = logging.getLogger(__name__)
+
+postal_index = lazy_import("utils.postal_index")
+
+
+def warm_up() -> None:
+    """Loads what the first requests would otherwise pay for: postal index, prompts, cargo stack and the default LLM agent."""
+    postal_index.get_postal_index()
+    get_prompt_registry()
+    # Import kalkulatora buduje flotę i tablice palet (NumPy)
+    import utils.cargo_calculator  # noqa: F401
+    agent_registry.get()
+
+
+async def background_warm_up() -> None:
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception:
+        logger.exception("Rozgrzewanie w tle nie powiodło się")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    if "API_KEY" not in os.environ:
+        logger.warning("API_KEY nie jest ustawiony - używany jest losowy klucz wygenerowany dla tego procesu")
+
+    warm_up_task = None
+    if settings.FAST_START:
+        # Ruch przyjmowany od razu - pierwsze zapytanie nie czeka na pełne rozgrzanie
+        warm_up_task = asyncio.create_task(background_warm_up())
+    else:
+        await agent_registry.startup()
+        warm_up()
+    yield
+    if warm_up_task is not None:
+        await warm_up_task
+    await agent_registry.shutdown()
+    # Na końcu - zapisuje wpisy z kolejki, w tym z zamykania agentów i telemetrii
+    shutdown_logging()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    description="API do wyceny transportu towarów"
+    description="API do wyceny transportu towarów",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -22,6 +74,5 @@ app.include_router(api_router)
 
 if __name__ == "__main__":
     import uvicorn
-    import os
     port = int(os.environ.get("PORT", 8000)) 
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
@@ -1,5 +1,9 @@
 from fastapi import APIRouter
 from .parse import router as parse_router
+from .distance import router as distance_router
+from .metrics import router as metrics_router
 
 api_router = APIRouter()
 api_router.include_router(parse_router)
+api_router.include_router(distance_router)
+api_router.include_router(metrics_router)
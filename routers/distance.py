@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException
+from typing import Any, Dict
+
+from config import settings
+from schemas.structured_output import DistanceMatrixRequest, DistanceMatrixResponse, DistanceResponse
+from utils.lazy import lazy_import
+
+# Cache SQLite i współczynniki drogowe tworzone przy pierwszym zapytaniu, nie przy imporcie aplikacji
+distance_tool = lazy_import("utils.distance_tool")
+
+router = APIRouter(
+    prefix=settings.API_V1_STR,
+    tags=["distance"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/distance", response_model=DistanceResponse)
+def distance(origin: str, destination: str) -> Dict[str, Any]:
+    """
+    Endpoint returning the exact OSRM road distance for a lane. Used to refine
+    the estimate returned by /parse when DISTANCE_MODE is "estimate".
+    
+    Returns:
+        Dict[str, Any]: Distance in km and whether it is only an estimate
+    """
+    distance_km, estimated = distance_tool.get_distance(origin, destination, mode="exact")
+    return {
+        "origin": origin,
+        "destination": destination,
+        "distance_km": round(distance_km, 1) if distance_km >= 0 else None,
+        "estimated": estimated
+    }
+
+
+@router.post("/distance/matrix", response_model=DistanceMatrixResponse)
+def distance_matrix(request: DistanceMatrixRequest) -> Dict[str, Any]:
+    """
+    Endpoint computing road distances for every origin/destination pair
+    with a batched OSRM table lookup.
+    
+    Returns:
+        Dict[str, Any]: Distance matrix in km, rows follow origins
+    """
+    if len(request.origins) + len(request.destinations) > settings.DISTANCE_MATRIX_MAX_LOCATIONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Maksymalna liczba miejsc (odbioru i dostawy) w jednym żądaniu to {settings.DISTANCE_MATRIX_MAX_LOCATIONS}"
+        )
+    matrix = distance_tool.get_distance_matrix(request.origins, request.destinations)
+    return {
+        "origins": request.origins,
+        "destinations": request.destinations,
+        "distances_km": [
+            [round(d, 1) if d >= 0 else None for d in row]
+            for row in matrix
+        ]
+    }
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from utils.langfuse_client import LangfuseClient
+from utils.metrics import render_prometheus
+from .parse import get_cache_stats
+
+# Bez prefiksu API - Prometheus domyślnie odpytuje /metrics
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """
+    Endpoint exposing stage latencies (p50/p95/p99), upstream error counters,
+    cache hit ratios and telemetry exporter counters in the Prometheus text format.
+    
+    Returns:
+        PlainTextResponse: Prometheus exposition format 0.0.4
+    """
+    body = render_prometheus(caches=get_cache_stats(), telemetry=LangfuseClient().stats())
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
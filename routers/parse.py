@@ -1,15 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import copy
+import json
+import logging
 import os
-from typing import Any, Dict
-from datetime import date
-from utils.cargo_calculator import CargoCalculator
-from schemas.structured_output import ParseRequest, ParseResponse
-from agents.llm_agent import LLMAgent
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Literal, Optional
+from schemas.structured_output import ParseRequest, ParseResponse, BatchParseRequest, BatchParseResponse
+from agents.prompt_registry import get_prompt_registry
+from agents.registry import agent_registry
 from config import settings
-from utils.date_utils import process_polish_date
-from utils.distance_tool import get_distance_osm
-import re
+from services.pipeline import (
+    check_post_code, clean_prompt, default_response, enrich_parsed_data, process_prompt, serialize_response,
+    stream_prompt
+)
+from utils.cache import cache_stats
+from utils.lazy import lazy_import
+from utils.metrics import timed
+
+if TYPE_CHECKING:
+    from agents.llm_agent import LLMAgent
+
+logger = logging.getLogger(__name__)
+
+# Stos dystansu i indeks kodów pocztowych ładowane przy pierwszym użyciu (szybszy start)
+distance_tool = lazy_import("utils.distance_tool")
+postal_index = lazy_import("utils.postal_index")
 
 router = APIRouter(
     prefix=settings.API_V1_STR,
@@ -28,12 +44,43 @@ def health_check() -> Dict[str, str]:
     return {"status": "ok", "version": settings.VERSION}
 
 
-def get_llm_agent() -> LLMAgent:
+@router.get("/cache/stats", response_model=Dict[str, Dict[str, Any]])
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Endpoint returning hit/miss counters of the in-process caches.
+    
+    Returns:
+        Dict[str, Dict[str, Any]]: Statistics keyed by cache name
+    """
+    stats = cache_stats()
+    stats["postal_index"] = postal_index.get_postal_index().stats()
+    return stats
+
+
+@router.get("/prompts", response_model=List[Dict[str, str]])
+def list_prompts() -> List[Dict[str, str]]:
+    """
+    Endpoint listing system prompts selectable with prompt_version.
+    
+    Returns:
+        List[Dict[str, str]]: Prompt names with their version hashes
+    """
+    registry = get_prompt_registry()
+    return [template.info() for template in registry.templates() if template.name in registry.names()]
+
+
+def check_prompt_version(prompt_version: Optional[str]) -> None:
+    # Tylko prompty z katalogu rejestru - bez dowolnych ścieżek z żądania
+    if prompt_version is not None and prompt_version not in get_prompt_registry().names():
+        raise HTTPException(status_code=400, detail=f"Nieznana wersja prompta: {prompt_version}")
+
+
+def get_llm_agent() -> "LLMAgent":
     """
-    Dependency to get the LLM agent instance.
+    Dependency to get the shared LLM agent instance.
     
     Returns:
-        LLMAgent: An instance of the LLM agent
+        LLMAgent: The process-wide LLM agent for the configured provider
     """
     api_key = os.getenv("LLM_API_KEY")
     if not api_key:
@@ -41,125 +88,141 @@ def get_llm_agent() -> LLMAgent:
             status_code=500,
             detail="LLM_API_KEY environment variable is not set"
         )
-    return LLMAgent(api_key=api_key)
+    return agent_registry.get(api_key=api_key)
 
 
 @router.post("/parse", response_model=ParseResponse)
 async def parse_transport_request(
     request: ParseRequest,
-    llm_agent: LLMAgent = Depends(get_llm_agent),
+    background_tasks: BackgroundTasks,
+    llm_agent: "LLMAgent" = Depends(get_llm_agent),
+) -> JSONResponse:
+    check_prompt_version(request.prompt_version)
+    with timed("parse"):
+        try:
+            payload = await process_prompt(llm_agent, request.prompt, background_tasks, request.prompt_version)
+
+        except Exception as e:
+            logger.exception("Error parsing transport request: %s", e)
+            payload = default_response(request.prompt, e)
+
+    return json_response(payload)
+
+
+def json_response(payload: Dict[str, Any]) -> JSONResponse:
+    # Walidacja i serializacja Pydantic jako osobny etap - zwrócona odpowiedź nie jest walidowana ponownie
+    return JSONResponse(serialize_response(payload))
+
+@router.post("/parse/stream")
+async def parse_transport_request_stream(
+    request: ParseRequest,
+    background_tasks: BackgroundTasks,
+    format: Literal["ndjson", "sse"] = "ndjson",
+    llm_agent: "LLMAgent" = Depends(get_llm_agent),
+) -> StreamingResponse:
+    """
+    Streaming variant of /parse. Emits partial TransportRequest fields while the
+    LLM is still generating, then distance, dates and cargo analysis as separate
+    events, and a final "done" event with the full ParseResponse payload.
+    
+    Returns:
+        StreamingResponse: NDJSON (default) or server-sent events
+    """
+    check_prompt_version(request.prompt_version)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event in stream_prompt(llm_agent, request.prompt, background_tasks, request.prompt_version):
+                if event["event"] == "done":
+                    event["data"] = serialize_response(event["data"])
+                yield format_event(event, format)
+        except Exception as e:
+            logger.exception("Error streaming transport request: %s", e)
+            yield format_event({"event": "error", "data": default_response(request.prompt, e)}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+
+def format_event(event: Dict[str, Any], format: str) -> str:
+    payload = json.dumps(event, ensure_ascii=False, default=str)
+    if format == "sse":
+        return f"event: {event['event']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+
+@router.post("/parse/batch", response_model=BatchParseResponse)
+async def parse_transport_requests_batch(
+    request: BatchParseRequest,
+    background_tasks: BackgroundTasks,
+    llm_agent: "LLMAgent" = Depends(get_llm_agent),
 ) -> Dict[str, Any]:
-    try:
-        # Na początku w parse_transport_request
-        cleaned_prompt = request.prompt.replace('\r\n', '\n').replace('\r', '\n')
-
-        # Przetwórz prompt przez LLM
-        parsed_data = llm_agent.parse_transport_request(cleaned_prompt, system_prompt_path="prompts/p_v1.txt")
-
-        # obliczanie dystansu
-        origin = parsed_data.get("pickup_postal_code")
-        dest = parsed_data.get("delivery_postal_code")
-
-        # Sprawdź, czy transport jest krajowy i popraw kody pocztowe, jeśli trzeba
-        origin = check_post_code(origin)
-        parsed_data["pickup_postal_code"] = origin
-
-        dest = check_post_code(dest)
-        parsed_data["delivery_postal_code"] = dest
-
-        if origin and dest:
-            parsed_data["distance_km"] = round(get_distance_osm(origin, dest), 1)
-            
-       # Przetwarzanie dat względnych na konkretne daty
-        for date_field in ["pickup_date", "delivery_date"]:
-            if date_field in parsed_data and isinstance(parsed_data[date_field], str):
-                parsed_data[date_field] = process_polish_date(parsed_data[date_field])
-
-
-        # Oblicz LDM i analizę ładunku
-        vehicle_type = parsed_data.get("vehicle_type", "brak")
-        cargo_items = parsed_data.get("cargo_items", [])
-
-        # Validate cargo_items to ensure no None values for numeric fields
-        for item in cargo_items:
-            for key in ["length", "width", "height", "weight", "quantity"]:
-                if key in item and (item[key] is None or not isinstance(item[key], (int, float))):
-                    item[key] = 0
-
-        calculate_cargo(parsed_data, vehicle_type, cargo_items)
-
-        response = {
-            "parsed_data": parsed_data,
-            "raw_prompt": cleaned_prompt
-        }
-
-        return response
-
-    except Exception as e:
-        print(f"Error parsing transport request: {str(e)}")
-        default_response = {
-            "parsed_data": {
-                "vehicle_type": "brak",
-                "cargo_items": [],
-                "pickup_postal_code": None,
-                "delivery_postal_code": None,
-                "pickup_date": None,
-                "delivery_date": None,
-                "is_urgent": False,
-                "is_stackable": False,
-                "cargo_analysis": {
-                    "ldm": 0,
-                    "warnings": ["Błąd podczas przetwarzania" + str(e)],
-                    "total_weight": 0
-                }
-            },
-            "raw_prompt": request.prompt
-        }
-        return default_response
-
-def check_post_code(code):
-    if isinstance(code, str):
-        code = code.strip()
-        if re.match(r"^\d{2}-\d{3}$", code):
-            return code
-        # Jeśli jest w formacie XXXXX, dodaj myślnik po 2 cyfrach
-        if re.match(r"^\d{5}$", code):
-            return f"{code[:2]}-{code[2:]}"
-
-def calculate_cargo(parsed_data, vehicle_type, cargo_items):
-    print(parsed_data)
-
-    calculator = CargoCalculator(vehicle_type=vehicle_type)
-
-     # Spr czy są dane o ładunku - jesli nie to dajemy max ldm dla danego pojazdu
-    # Sprawdź, czy brakuje danych o ładunku
-    if any(
-        item.get('width', 0) == 0 or item.get('height', 0) == 0 for item in cargo_items
-    ):
-        parsed_data["cargo_analysis"] = {
-            "ldm": calculator.get_max_ldm(),
-            "fit_in_vehicle": True,
-            "warnings": ["Brak danych o ładunku. Zwracamy maksymalny LDM dla podanego pojazdu."],
-            "vehicle_used": vehicle_type,
-            "vehicle_suggestion": 'brak',
-            "total_weight": 0,
-        }
-        return
+    """
+    Endpoint parsing many transport requests at once.
+    Identical prompts go to the LLM once and each geocode target is resolved once;
+    LLM calls and enrichment run with at most BATCH_CONCURRENCY in flight, while
+    Nominatim lookups are paced by the process-wide limiter in utils/distance_tool.py.
     
-    # Oblicz LDM i analizę ładunku
-    cargo_result = calculator.calculateLDM(cargo_items)
-
-    if calculator.check_ldm(cargo_result["ldm"]):
-        cargo_result["fit_in_vehicle"] = False
-        cargo_result["warnings"].append(f"Ładunek przekracza maksymalną dopuszczalną ładowność dla pojazdu {vehicle_type}.")
+    Returns:
+        Dict[str, Any]: Per-item results or errors, in input order
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Maksymalna liczba zleceń w jednym żądaniu to {settings.BATCH_MAX_ITEMS}"
+        )
+    for item in request.items:
+        check_prompt_version(item.prompt_version)
 
-    # Rozszerz dane wyjściowe
-    parsed_data["cargo_analysis"] = cargo_result
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
 
+    async def limited(func, *args):
+        async with semaphore:
+            return await func(*args)
 
+    # Zlecenie = (prompt, wersja prompta systemowego)
+    prompts = [(clean_prompt(item.prompt), item.prompt_version) for item in request.items]
+    unique_prompts = list(dict.fromkeys(prompts))
 
+    # 1. LLM - każdy unikalny prompt tylko raz
+    with timed("batch.llm"):
+        llm_results = await asyncio.gather(
+            *(limited(llm_agent.aparse_transport_request, prompt, version) for prompt, version in unique_prompts),
+            return_exceptions=True
+        )
+    parsed_by_prompt = dict(zip(unique_prompts, llm_results))
+
+    # 2. Geokodowanie - każdy unikalny kod raz, wyniki trafiają do cache.
+    # Bez semafora partii - tempo zapytań do Nominatim wyznacza nominatim_limiter
+    targets = {
+        check_post_code(parsed.get(field))
+        for parsed in llm_results if isinstance(parsed, dict)
+        for field in ("pickup_postal_code", "delivery_postal_code")
+    }
+    targets.discard(None)
+    with timed("batch.geocode"):
+        await asyncio.gather(
+            *(asyncio.to_thread(distance_tool.geocode_address, target) for target in targets),
+            return_exceptions=True
+        )
 
-        # Wyznacz optymalny pojazd
-        # TODO do poprawy
-    suggestion = CargoCalculator.suggest_optimal_vehicle(cargo_items)
-    parsed_data["vehicle_suggestion"] = suggestion["vehicle"]
+    # 3. Dystans, daty i ładunek dla każdego zlecenia
+    async def enrich(prompt: str, version: Optional[str]) -> ParseResponse:
+        parsed = parsed_by_prompt[(prompt, version)]
+        if isinstance(parsed, Exception):
+            raise parsed
+        # Zduplikowane prompty dzielą wynik LLM - każde zlecenie dostaje własną kopię
+        parsed_data = copy.deepcopy(parsed)
+        await limited(enrich_parsed_data, parsed_data, background_tasks)
+        # Walidacja per zlecenie - błędny wynik nie psuje całej odpowiedzi
+        return ParseResponse.model_validate({"parsed_data": parsed_data, "raw_prompt": prompt})
+
+    with timed("batch.enrich"):
+        results = await asyncio.gather(*(enrich(prompt, version) for prompt, version in prompts), return_exceptions=True)
+
+    return {
+        "results": [
+            {"index": i, "error": str(result)} if isinstance(result, Exception) else {"index": i, "result": result}
+            for i, result in enumerate(results)
+        ]
+    }
@@ -17,14 +17,39 @@ class CargoItem(BaseModel):
     height: Optional[float] = Field(None, description="Wysokość ładunku w metrach")
     quantity: Optional[int] = Field(None, description="Ilość sztuk ładunku")
     weight: Optional[float] = Field(None, description="Waga jednego ładunku w kilogramach")
+    pallet_type: Optional[str] = Field(None, description="Rozpoznany typ palety (EUR, industrial, half)")
+
+
+class LoadPlacement(BaseModel):
+    item: int = Field(..., description="Indeks ładunku w cargo_items")
+    x: float = Field(..., description="Odległość od czoła przestrzeni ładunkowej w cm")
+    y: float = Field(..., description="Odległość od lewej burty w cm")
+    length: float = Field(..., description="Długość zajętej podłogi w cm")
+    width: float = Field(..., description="Szerokość zajętej podłogi w cm")
+    layers: int = Field(1, description="Liczba sztuk w stosie")
+    height: float = Field(..., description="Wysokość stosu w cm")
+
+
+class LoadPlan(BaseModel):
+    ldm: float = Field(..., description="LDM wynikający z planu załadunku")
+    strategy: str = Field(..., description="Układ: rows (rzędy) lub skyline (łączenie rzędów)")
+    complete: bool = Field(True, description="Czy planowanie zakończyło się w budżecie czasu")
+    stacks: int = Field(0, description="Liczba stosów na podłodze")
+    placements: List[LoadPlacement] = Field(
+        default_factory=list,
+        description="Rozmieszczenie stosów na podłodze - puste, gdy stosów jest więcej niż LOAD_PLANNER_MAX_PLACEMENTS"
+    )
+    unplaced: List[int] = Field(default_factory=list, description="Indeksy ładunków, których nie da się ułożyć")
 
 
 class CargoAnalysis(BaseModel):
     ldm: Optional[float] = None
+    max_ldm: Optional[float] = Field(default=None, description="Maksymalny LDM pojazdu")
     fit_in_vehicle: Optional[bool] = None
     warnings: Optional[List[str]] = None
     vehicle_used: Optional[str] = None
     vehicle_suggestion: Optional[str] = Field(default=None, description="Sugerowany typ pojazdu")
+    load_plan: Optional[LoadPlan] = Field(default=None, description="Plan rozmieszczenia ładunku")
 
 
 class TransportRequest(BaseModel):
@@ -38,14 +63,48 @@ class TransportRequest(BaseModel):
     is_stackable: bool = Field(False, description="Czy ładunki można piętrować")
     cargo_analysis: Optional[CargoAnalysis] = None
     distance_km: Optional[float] = None
+    distance_estimated: Optional[bool] = Field(default=None, description="Czy distance_km jest szacunkiem (haversine x współczynnik drogowy)")
     route_type: Optional[str] = None
 
 
 
 class ParseRequest(BaseModel):
     prompt: str = Field(..., description="Tekst zlecenia transportowego do analizy")
+    prompt_version: Optional[str] = Field(None, description="Nazwa prompta systemowego (np. p_v2), domyślnie PROMPT_DEFAULT")
 
 
 class ParseResponse(BaseModel):
     parsed_data: TransportRequest = Field(..., description="Ustrukturyzowane dane wyekstrahowane z prompta")
-    raw_prompt: str = Field(..., description="Oryginalny prompt tekstowy")
\ No newline at end of file
+    raw_prompt: str = Field(..., description="Oryginalny prompt tekstowy")
+
+
+class BatchParseRequest(BaseModel):
+    items: List[ParseRequest] = Field(..., min_length=1, description="Lista zleceń do analizy")
+
+
+class BatchParseItem(BaseModel):
+    index: int = Field(..., description="Pozycja zlecenia w żądaniu")
+    result: Optional[ParseResponse] = Field(None, description="Wynik analizy, None w przypadku błędu")
+    error: Optional[str] = Field(None, description="Opis błędu dla tego zlecenia")
+
+
+class BatchParseResponse(BaseModel):
+    results: List[BatchParseItem] = Field(..., description="Wyniki w kolejności zleceń z żądania")
+
+
+class DistanceResponse(BaseModel):
+    origin: str = Field(..., description="Miejsce odbioru")
+    destination: str = Field(..., description="Miejsce dostawy")
+    distance_km: Optional[float] = Field(None, description="Dystans w km, None gdy nie udało się policzyć")
+    estimated: bool = Field(False, description="Czy dystans jest szacunkiem")
+
+
+class DistanceMatrixRequest(BaseModel):
+    origins: List[str] = Field(..., min_length=1, description="Miejsca odbioru (kody pocztowe lub adresy)")
+    destinations: List[str] = Field(..., min_length=1, description="Miejsca dostawy (kody pocztowe lub adresy)")
+
+
+class DistanceMatrixResponse(BaseModel):
+    origins: List[str] = Field(..., description="Miejsca odbioru w kolejności wierszy")
+    destinations: List[str] = Field(..., description="Miejsca dostawy w kolejności kolumn")
+    distances_km: List[List[Optional[float]]] = Field(..., description="Dystanse w km, None gdy nie udało się policzyć")
@@ -0,0 +1,175 @@
+"""
+Bulk quote worker
+Streams a JSONL file of inquiries through the same pipeline as /api/v1/parse
+and writes NDJSON results incrementally, in input order.
+
+Usage:
+    python -m services.bulk_quote requests.jsonl -o results.ndjson --concurrency 8
+    cat requests.jsonl | python -m services.bulk_quote - -o results.ndjson
+
+Input is read lazily and at most `window` records are in flight, so memory stays
+constant regardless of file size. Progress is checkpointed next to the output
+(<output>.ckpt); re-running the same command resumes an interrupted run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+
+from agents.registry import agent_registry
+from services.pipeline import process_prompt, serialize_response
+from utils.logging_config import configure_logging, shutdown_logging
+
+PROMPT_FIELDS = ("prompt", "body", "text")
+ID_FIELDS = ("request_id", "id")
+
+
+def read_records(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """Yields (line_number, raw_line) lazily, skipping blank lines."""
+    for line_number, line in enumerate(lines):
+        if line.strip():
+            yield line_number, line
+
+
+def extract_prompt(record: Dict[str, Any], prompt_field: Optional[str]) -> str:
+    fields = (prompt_field,) if prompt_field else PROMPT_FIELDS
+    for field in fields:
+        if isinstance(record.get(field), str):
+            return record[field]
+    raise ValueError(f"Brak pola z treścią zlecenia ({', '.join(fields)})")
+
+
+def load_checkpoint(path: str) -> Dict[str, int]:
+    if not os.path.exists(path):
+        return {"line": 0, "output_bytes": 0}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, line: int, output_bytes: int) -> None:
+    # Zapis atomowy - przerwanie w trakcie zapisu nie psuje checkpointu
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"line": line, "output_bytes": output_bytes}, f)
+    os.replace(tmp_path, path)
+
+
+async def process_record(
+    llm_agent,
+    line_number: int,
+    raw_line: str,
+    semaphore: asyncio.Semaphore,
+    prompt_field: Optional[str]
+) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"line": line_number}
+    try:
+        record = json.loads(raw_line)
+        result["id"] = next((record[f] for f in ID_FIELDS if f in record), None)
+        prompt = extract_prompt(record, prompt_field)
+        async with semaphore:
+            payload = await process_prompt(llm_agent, prompt)
+        # Ten sam kształt i typy co odpowiedź /api/v1/parse
+        result["result"] = serialize_response(payload)
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+async def run(
+    lines: Iterable[str],
+    output_path: str,
+    concurrency: int = 8,
+    window: Optional[int] = None,
+    prompt_field: Optional[str] = None,
+    checkpoint_every: int = 100,
+    llm_agent=None
+) -> int:
+    """
+    Processes records and appends results to output_path.
+    Returns the number of records processed in this run.
+    """
+    checkpoint_path = f"{output_path}.ckpt"
+    checkpoint = load_checkpoint(checkpoint_path)
+    if not os.path.exists(output_path):
+        checkpoint = {"line": 0, "output_bytes": 0}
+    window = window or concurrency * 2
+    semaphore = asyncio.Semaphore(concurrency)
+    llm_agent = llm_agent or agent_registry.get()
+
+    # Wyniki zapisane po ostatnim checkpoincie są obcinane i liczone ponownie
+    mode = "r+b" if os.path.exists(output_path) else "wb"
+    with open(output_path, mode) as out:
+        out.truncate(checkpoint["output_bytes"])
+        out.seek(checkpoint["output_bytes"])
+
+        next_line = checkpoint["line"]
+        processed = 0
+        pending: deque = deque()
+
+        def write(result: Dict[str, Any]) -> None:
+            nonlocal next_line, processed
+            out.write((json.dumps(result, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+            next_line = result["line"] + 1
+            processed += 1
+            if processed % checkpoint_every == 0:
+                out.flush()
+                save_checkpoint(checkpoint_path, next_line, out.tell())
+
+        for line_number, raw_line in read_records(islice(lines, checkpoint["line"], None)):
+            line_number += checkpoint["line"]
+            pending.append(asyncio.create_task(
+                process_record(llm_agent, line_number, raw_line, semaphore, prompt_field)
+            ))
+            if len(pending) >= window:
+                write(await pending.popleft())
+
+        while pending:
+            write(await pending.popleft())
+
+        out.flush()
+        save_checkpoint(checkpoint_path, next_line, out.tell())
+
+    return processed
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Wycena zleceń transportowych z pliku JSONL")
+    parser.add_argument("input", help="Plik JSONL ze zleceniami lub '-' dla stdin")
+    parser.add_argument("-o", "--output", required=True, help="Plik wynikowy NDJSON")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maksymalna liczba zleceń przetwarzanych jednocześnie")
+    parser.add_argument("--prompt-field", default=None, help=f"Pole z treścią zlecenia (domyślnie: {', '.join(PROMPT_FIELDS)})")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="Co ile rekordów zapisywać checkpoint")
+    args = parser.parse_args(argv)
+    # Logi na stderr - stdout zostaje wolny, gdy wynik jest przekierowany
+    configure_logging(stream=sys.stderr)
+
+    async def run_with_agent(source: TextIO) -> int:
+        try:
+            return await run(
+                source,
+                args.output,
+                concurrency=args.concurrency,
+                prompt_field=args.prompt_field,
+                checkpoint_every=args.checkpoint_every
+            )
+        finally:
+            await agent_registry.shutdown()
+
+    try:
+        if args.input == "-":
+            processed = asyncio.run(run_with_agent(sys.stdin))
+        else:
+            with open(args.input, "r", encoding="utf-8") as source:
+                processed = asyncio.run(run_with_agent(source))
+    finally:
+        shutdown_logging()
+
+    print(f"Przetworzono {processed} zleceń -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Pipeline module
+Shared post-LLM processing of a transport request: postal codes, distance,
+dates and cargo analysis. Used by the HTTP endpoints and the bulk quote worker.
+"""
+import asyncio
+import copy
+import json
+import logging
+import re
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional
+
+from fastapi import BackgroundTasks
+
+from config import settings
+from schemas.structured_output import ParseResponse
+from utils.cache import MISSING
+from utils.cargo_model import as_records, serialize_cargo
+from utils.date_utils import process_polish_date
+from utils.lazy import lazy_import
+from utils.metrics import timed
+from utils.partial_json import PartialJSONObjectParser
+
+logger = logging.getLogger(__name__)
+
+# Kalkulator ładunku (NumPy, tablice floty i palet) ładowany przy pierwszej analizie ładunku
+cargo_calculator = lazy_import("utils.cargo_calculator")
+pallets = lazy_import("utils.pallets")
+# Stos dystansu (cache SQLite, indeks kodów, współczynniki drogowe) ładowany przy pierwszym zapytaniu o dystans
+distance_tool = lazy_import("utils.distance_tool")
+
+
+async def process_prompt(
+    llm_agent,
+    prompt: str,
+    background_tasks: Optional[BackgroundTasks] = None,
+    prompt_version: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Full parse -> distance -> date -> cargo pipeline for a single prompt.
+    prompt_version selects the system prompt by name (None = PROMPT_DEFAULT).
+    
+    Returns:
+        Dict[str, Any]: Response payload matching ParseResponse
+    """
+    cleaned_prompt = clean_prompt(prompt)
+
+    # Przetwórz prompt przez LLM
+    parsed_data = await llm_agent.aparse_transport_request(cleaned_prompt, system_prompt_path=prompt_version)
+
+    await enrich_parsed_data(parsed_data, background_tasks)
+
+    return {
+        "parsed_data": parsed_data,
+        "raw_prompt": cleaned_prompt
+    }
+
+
+async def stream_prompt(
+    llm_agent,
+    prompt: str,
+    background_tasks: Optional[BackgroundTasks] = None,
+    prompt_version: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of process_prompt. Yields events as results become available:
+    "field" for each top-level field parsed from the streamed LLM output, "parsed"
+    once the LLM finishes, one event per enrichment stage ("distance", "dates",
+    "cargo") in completion order, and finally "done" with the full response.
+    """
+    cleaned_prompt = clean_prompt(prompt)
+    parser = PartialJSONObjectParser()
+    chunks = []
+
+    async for delta in llm_agent.astream_transport_request(cleaned_prompt, system_prompt_path=prompt_version):
+        chunks.append(delta)
+        for name, value in parser.feed(delta):
+            yield {"event": "field", "name": name, "value": value}
+
+    parsed_data = json.loads("".join(chunks))
+    yield {"event": "parsed", "data": copy.deepcopy(parsed_data)}
+
+    stages = build_enrichment_stages(parsed_data, background_tasks)
+    tasks = {asyncio.ensure_future(stage): name for name, stage in stages.items()}
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks.pop(task)
+                task.result()
+                yield {"event": name, "data": {field: parsed_data.get(field) for field in STAGE_FIELDS[name]}}
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    yield {"event": "done", "data": {"parsed_data": parsed_data, "raw_prompt": cleaned_prompt}}
+
+
+def serialize_response(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validates a pipeline payload against ParseResponse and dumps it to JSON-ready
+    types, so the API, the stream and the bulk worker emit the same shape.
+    """
+    with timed("serialize"):
+        return ParseResponse.model_validate(payload).model_dump(mode="json")
+
+
+def default_response(prompt: str, error: Exception) -> Dict[str, Any]:
+    """Response returned by /parse when processing fails."""
+    return {
+        "parsed_data": {
+            "vehicle_type": "brak",
+            "cargo_items": [],
+            "pickup_postal_code": None,
+            "delivery_postal_code": None,
+            "pickup_date": None,
+            "delivery_date": None,
+            "is_urgent": False,
+            "is_stackable": False,
+            "cargo_analysis": {
+                "ldm": 0,
+                "warnings": ["Błąd podczas przetwarzania" + str(error)],
+                "total_weight": 0
+            }
+        },
+        "raw_prompt": prompt
+    }
+
+
+def clean_prompt(prompt: str) -> str:
+    return prompt.replace('\r\n', '\n').replace('\r', '\n')
+
+
+async def enrich_parsed_data(parsed_data: Dict[str, Any], background_tasks: Optional[BackgroundTasks] = None) -> None:
+    """
+    Post-LLM stage: distance, date normalization and cargo analysis are
+    independent, so they run concurrently and write disjoint keys of parsed_data.
+    """
+    await asyncio.gather(*build_enrichment_stages(parsed_data, background_tasks).values())
+
+
+# Pola parsed_data uzupełniane przez poszczególne etapy
+STAGE_FIELDS = {
+    "distance": ["pickup_postal_code", "delivery_postal_code", "distance_km", "distance_estimated"],
+    "dates": ["pickup_date", "delivery_date"],
+    "cargo": ["cargo_items", "cargo_analysis"],
+}
+
+
+def build_enrichment_stages(
+    parsed_data: Dict[str, Any],
+    background_tasks: Optional[BackgroundTasks] = None
+) -> Dict[str, Awaitable[None]]:
+    """
+    Builds the independent post-LLM stages keyed by name (see STAGE_FIELDS).
+    """
+    # Sprawdź, czy transport jest krajowy i popraw kody pocztowe, jeśli trzeba
+    origin = check_post_code(parsed_data.get("pickup_postal_code"))
+    parsed_data["pickup_postal_code"] = origin
+
+    dest = check_post_code(parsed_data.get("delivery_postal_code"))
+    parsed_data["delivery_postal_code"] = dest
+
+    @timed("distance")
+    async def distance_stage():
+        if not (origin and dest):
+            return
+        # Geokodowanie obu końców równolegle, potem OSRM (lub szacunek)
+        distance_km, estimated = await distance_tool.aget_distance(origin, dest, settings.DISTANCE_MODE)
+        parsed_data["distance_km"] = round(distance_km, 1)
+        parsed_data["distance_estimated"] = estimated
+
+        if estimated and settings.DISTANCE_MODE == "estimate" and background_tasks is not None:
+            # Dokładny dystans OSRM trafi do cache - dostępny przez GET /distance
+            background_tasks.add_task(distance_tool.get_distance_osm, origin, dest)
+
+    @timed("dates")
+    async def dates_stage():
+        # Przetwarzanie dat względnych na konkretne daty
+        for date_field in ["pickup_date", "delivery_date"]:
+            if date_field in parsed_data and isinstance(parsed_data[date_field], str):
+                parsed_data[date_field] = process_polish_date(parsed_data[date_field])
+
+    @timed("cargo")
+    def cargo_stage():
+        # Oblicz LDM i analizę ładunku
+        vehicle_type = parsed_data.get("vehicle_type", "brak")
+        # Rekordy ładunku - pola liczbowe bez wartości None (zob. CargoRecord.from_dict)
+        cargo_items = as_records(parsed_data.get("cargo_items", []))
+        if settings.PALLET_SNAP_TOLERANCE_CM > 0:
+            # Wymiary bliskie standardowej palecie -> dokładna paleta (spójne wyceny)
+            pallets.snap_pallets(cargo_items, settings.PALLET_SNAP_TOLERANCE_CM)
+
+        calculate_cargo(parsed_data, vehicle_type, cargo_items)
+        parsed_data["cargo_items"] = serialize_cargo(cargo_items)
+
+    return {
+        "distance": distance_stage(),
+        "dates": dates_stage(),
+        "cargo": asyncio.to_thread(cargo_stage),
+    }
+
+
+def check_post_code(code):
+    if isinstance(code, str):
+        code = code.strip()
+        if re.match(r"^\d{2}-\d{3}$", code):
+            return code
+        # Jeśli jest w formacie XXXXX, dodaj myślnik po 2 cyfrach
+        if re.match(r"^\d{5}$", code):
+            return f"{code[:2]}-{code[2:]}"
+
+def calculate_cargo(parsed_data, vehicle_type, cargo_items):
+    cargo_items = as_records(cargo_items)
+    if logger.isEnabledFor(logging.DEBUG):
+        # Tylko dane ładunku, skopiowane tutaj - parsed_data modyfikują równolegle etapy dystansu i dat
+        logger.debug("Calculating cargo", extra={
+            "vehicle_type": vehicle_type,
+            "payload": {"cargo_items": serialize_cargo(cargo_items), "is_stackable": parsed_data.get("is_stackable")}
+        })
+
+    calculator = cargo_calculator.CargoCalculator(vehicle_type=vehicle_type)
+
+     # Spr czy są dane o ładunku - jesli nie to dajemy max ldm dla danego pojazdu
+    # Sprawdź, czy brakuje danych o ładunku
+    if any(not item.has_dimensions() for item in cargo_items):
+        parsed_data["cargo_analysis"] = calculator.missing_cargo_result()
+        parsed_data["cargo_analysis"]["vehicle_used"] = vehicle_type
+        return
+    
+    is_stackable = bool(parsed_data.get("is_stackable"))
+    if settings.CARGO_CACHE_ENABLED:
+        analysis = memoized_cargo_analysis(vehicle_type, cargo_items, is_stackable)
+    else:
+        analysis = analyze_cargo(calculator, vehicle_type, cargo_items, is_stackable)
+
+    # Rozszerz dane wyjściowe
+    parsed_data["cargo_analysis"] = analysis["cargo_analysis"]
+
+    # Wyznacz optymalny pojazd
+    parsed_data["vehicle_suggestion"] = analysis["vehicle_suggestion"]
+
+
+def analyze_cargo(calculator: "cargo_calculator.CargoCalculator", vehicle_type, cargo_items, is_stackable: bool) -> Dict[str, Any]:
+    """
+    Cargo analysis for the reported vehicle plus the optimal vehicle suggestion.
+
+    Returns:
+        Dict[str, Any]: {"cargo_analysis": ..., "vehicle_suggestion": ...}
+    """
+    # Jedna ocena dla całej floty - wynik dla wybranego pojazdu i sugestia bez ponownego liczenia
+    evaluation = cargo_calculator.CargoCalculator.evaluate_fleet(
+        cargo_items,
+        is_stackable=is_stackable,
+        plan_load=settings.LOAD_PLANNER_ENABLED,
+        time_budget=settings.LOAD_PLANNER_TIME_BUDGET_MS / 1000,
+        max_placements=settings.LOAD_PLANNER_MAX_PLACEMENTS
+    )
+    cargo_result = evaluation.result(calculator.vehicle_type)
+
+    load_plan = evaluation.load_plan(calculator.vehicle_type)
+    if load_plan is not None:
+        cargo_result["load_plan"] = load_plan.to_dict()
+
+    if calculator.check_ldm(cargo_result["ldm"]):
+        cargo_result["fit_in_vehicle"] = False
+        cargo_result["warnings"].append(f"Ładunek przekracza maksymalną dopuszczalną ładowność dla pojazdu {vehicle_type}.")
+
+    return {
+        "cargo_analysis": cargo_result,
+        "vehicle_suggestion": evaluation.suggest()["vehicle"]
+    }
+
+
+def memoized_cargo_analysis(vehicle_type, cargo_items, is_stackable: bool) -> Dict[str, Any]:
+    """
+    analyze_cargo() cached in cargo_cache as JSON under the canonical manifest,
+    so a hit is one json.loads into a fresh object. The analysis itself runs on
+    cargo_items as given - the canonical (rounded) manifest is only the key, so
+    results do not depend on CARGO_CACHE_ENABLED. The cache keeps load plan
+    placement indices in canonical order; they are mapped to cargo_items order.
+    """
+    manifest = cargo_calculator.canonical_manifest(cargo_items, vehicle_type, is_stackable)
+    key = cargo_calculator.manifest_key(manifest, settings.LOAD_PLANNER_ENABLED, settings.LOAD_PLANNER_MAX_PLACEMENTS)
+
+    cached = cargo_calculator.cargo_cache.get(key)
+    if cached is not MISSING:
+        analysis = json.loads(cached)
+        if _has_plan_items(analysis):
+            _reindex_load_plan(analysis, cargo_calculator.canonical_order(cargo_items))
+        return analysis
+
+    calculator = cargo_calculator.CargoCalculator(vehicle_type=vehicle_type)
+    analysis = analyze_cargo(calculator, vehicle_type, cargo_items, is_stackable)
+    if not _has_plan_items(analysis):
+        cargo_calculator.cargo_cache.set(key, json.dumps(analysis, ensure_ascii=False))
+        return analysis
+
+    # Do cache indeksy w kolejności kanonicznej, zwracamy w kolejności cargo_items
+    order = cargo_calculator.canonical_order(cargo_items)
+    position = [0] * len(order)
+    for canonical_index, index in enumerate(order):
+        position[index] = canonical_index
+    _reindex_load_plan(analysis, position)
+    cargo_calculator.cargo_cache.set(key, json.dumps(analysis, ensure_ascii=False))
+    _reindex_load_plan(analysis, order)
+    return analysis
+
+
+def _has_plan_items(analysis: Dict[str, Any]) -> bool:
+    load_plan = analysis["cargo_analysis"].get("load_plan")
+    return load_plan is not None and bool(load_plan["placements"] or load_plan["unplaced"])
+
+
+def _reindex_load_plan(analysis: Dict[str, Any], mapping) -> None:
+    load_plan = analysis["cargo_analysis"]["load_plan"]
+    for placement in load_plan["placements"]:
+        placement["item"] = mapping[placement["item"]]
+    load_plan["unplaced"] = sorted(mapping[i] for i in load_plan["unplaced"])
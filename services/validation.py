@@ -2,13 +2,17 @@
 Validation module
 Validates cargo dimensions and provides appropriate messages based on business rules.
 """
+from utils.cargo_model import as_records
+from utils.fleet import get_fleet
+
 
 def validate(data: dict, ldm: float) -> list[str]:
     """
     Validate the cargo data and LDM against business rules.
     
     Args:
-        data: Dictionary containing cargo and transport data
+        data: Dictionary containing cargo and transport data; "cargo" holds CargoRecord
+            objects or dicts with dimensions in cm
         ldm: Calculated Load Meter value
         
     Returns:
@@ -16,39 +20,31 @@ def validate(data: dict, ldm: float) -> list[str]:
     """
     messages = []
     
-    # Maximum LDM values for different vehicle types
-    max_ldm = {
-        "bus": 4.5,
-        "solówka": 7.3,
-        "naczepa": 13.6
-    }
-    
-    vehicle_type = data.get("vehicle_type", "")
+    fleet = get_fleet()
+    vehicle = fleet.get(data.get("vehicle_type", ""))
     
     # Validate LDM against vehicle type
-    if vehicle_type in max_ldm:
-        vehicle_max_ldm = max_ldm[vehicle_type]
-        
+    if vehicle is not None:
         # Check if LDM exceeds maximum for the vehicle
-        if ldm > vehicle_max_ldm:
+        if ldm > vehicle.max_ldm:
             messages.append("Gabaryt za duży na wybrany typ pojazdu – zmień pojazd.")
         
         # Check if LDM is less than 80% of the maximum
-        elif ldm < 0.8 * vehicle_max_ldm:
+        elif ldm < vehicle.underuse_ldm:
             messages.append("Wybranie konkretnego pojazdu oznacza wynajem jego całości – rozważ wybór 'dowolny'.")
     
-    # Validate cargo dimensions
-    for cargo in data.get("cargo", []):
-        height = cargo.get("height", 0)
-        width = cargo.get("width", 0)
-        length = cargo.get("length", 0)
+    # Validate cargo dimensions (rekordy trzymają wymiary w metrach)
+    for cargo in as_records(data.get("cargo", []), unit="cm"):
+        height = (cargo.height or 0) * 100
+        width = (cargo.width or 0) * 100
+        length = (cargo.length or 0) * 100
         
-        # Check if cargo is too high
-        if height > 260:
+        # Check if cargo is too high for every vehicle in the fleet
+        if height > fleet.max_height_cm:
             messages.append("Ładunek jest za wysoki.")
         
         # Check if cargo might be oversized
-        if width > 240 or length > 1360:
+        if width > fleet.max_width_cm or length > fleet.max_length_cm:
             messages.append("Ładunek może być ponadgabarytowy.")
     
     # Add urgent message if the delivery is marked as urgent
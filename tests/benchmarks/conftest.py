@@ -0,0 +1,18 @@
+import os
+
+import pytest
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Benchmarks (fresh interpreters, uvicorn servers, time budgets) run only with
+    --benchmark-only, so the default test run stays fast and independent of machine load.
+    """
+    if config.getoption("benchmark_only", default=False):
+        return
+    skip = pytest.mark.skip(reason="benchmark - uruchom z --benchmark-only")
+    for item in items:
+        if str(item.path).startswith(BENCHMARKS_DIR + os.sep):
+            item.add_marker(skip)
@@ -0,0 +1,94 @@
+"""
+Benchmarki ścieżki ładunku (pytest-benchmark).
+
+    python -m pytest tests/benchmarks --benchmark-only --benchmark-autosave
+    python -m pytest tests/benchmarks --benchmark-only --benchmark-compare
+
+ops/sec raportuje pytest-benchmark, szczytowe zużycie pamięci jednego wywołania
+(tracemalloc) trafia do extra_info["peak_memory_kb"] w zapisanym wyniku.
+"""
+import random
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from services.ldm_calculator import calculate_ldm
+from services.pipeline import analyze_cargo
+from utils.cargo_calculator import CargoCalculator, VehicleType
+from utils.cargo_model import as_records
+
+SIZES = [1, 10, 1000, 10000]
+
+PALLETS = [(1.2, 0.8), (1.2, 1.0), (0.6, 0.8)]
+
+
+def manifest(size, seed=20):
+    """Reprezentatywny manifest: ~2/3 standardowych palet, reszta nietypowe wymiary."""
+    rng = random.Random(seed)
+    items = []
+    for _ in range(size):
+        if rng.random() < 0.66:
+            length, width = rng.choice(PALLETS)
+        else:
+            length, width = rng.choice([0.5, 0.9, 1.5, 2.0, 3.0]), rng.choice([0.4, 0.7, 1.1, 1.3])
+        items.append({
+            "length": length,
+            "width": width,
+            "height": rng.choice([0.8, 1.2, 1.8, 2.4]),
+            "quantity": rng.randint(1, 33),
+            "weight": rng.choice([50, 200, 500]),
+        })
+    return items
+
+
+def record_memory(benchmark, func, *args):
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["peak_memory_kb"] = round(peak / 1024, 1)
+
+
+def run(benchmark, func, *args):
+    record_memory(benchmark, func, *args)
+    return benchmark(func, *args)
+
+
+@pytest.mark.benchmark(group="calculateLDM")
+@pytest.mark.parametrize("size", SIZES)
+def test_calculate_ldm_metres(benchmark, size):
+    cargo = as_records(manifest(size))
+    result = run(benchmark, CargoCalculator(VehicleType.NACZEPA).calculateLDM, cargo)
+    assert result["ldm"] > 0
+
+
+@pytest.mark.benchmark(group="ldm_calculator")
+@pytest.mark.parametrize("size", SIZES)
+def test_calculate_ldm_centimetres(benchmark, size):
+    cargo = [
+        {"length": item["length"] * 100, "width": item["width"] * 100, "count": item["quantity"]}
+        for item in manifest(size)
+    ]
+    assert run(benchmark, calculate_ldm, cargo, "naczepa") > 0
+
+
+@pytest.mark.benchmark(group="evaluate_fleet")
+@pytest.mark.parametrize("size", SIZES)
+def test_evaluate_fleet(benchmark, size):
+    cargo = as_records(manifest(size))
+    result = run(benchmark, lambda items: CargoCalculator.evaluate_fleet(items).suggest(), cargo)
+    assert "vehicle" in result
+
+
+@pytest.mark.benchmark(group="analyze_cargo")
+@pytest.mark.parametrize("size", SIZES)
+def test_analyze_cargo(benchmark, size):
+    # Pełna analiza jak w pipeline (z planerem załadunku), bez cache
+    cargo = as_records(manifest(size))
+    calculator = CargoCalculator(VehicleType.NACZEPA)
+    result = run(benchmark, analyze_cargo, calculator, "naczepa", cargo, True)
+    assert result["cargo_analysis"]["ldm"] > 0
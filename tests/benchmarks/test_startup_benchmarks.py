@@ -0,0 +1,77 @@
+"""
+Benchmarki zimnego startu (pytest-benchmark).
+
+    python -m pytest tests/benchmarks/test_startup_benchmarks.py --benchmark-only
+
+Każda runda to świeży interpreter: czas importu main (z budżetem
+STARTUP_IMPORT_BUDGET_MS) oraz czas od uruchomienia uvicorn main:app do
+pierwszej odpowiedzi 200, z FAST_START=true i bez.
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1000"))
+
+ENV = {**os.environ, "LANGFUSE_ENABLED": "false", "LOAD_DOTENV": "false", "LLM_API_KEY": "benchmark", "API_KEY": "benchmark"}
+
+
+def import_main_ms():
+    code = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=ENV, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_response_ms(fast_start):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api/v1/"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env={**ENV, "FAST_START": "true" if fast_start else "false"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < 30:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError("Serwer nie odpowiedział w ciągu 30 s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def test_import_main(benchmark):
+    samples = []
+    benchmark.pedantic(lambda: samples.append(import_main_ms()), rounds=5, iterations=1)
+    median = statistics.median(samples)
+    benchmark.extra_info["import_ms"] = round(median, 1)
+    assert median < IMPORT_BUDGET_MS
+
+
+@pytest.mark.parametrize("fast_start", [True, False], ids=["fast_start", "eager"])
+def test_time_to_first_response(benchmark, fast_start):
+    samples = []
+    benchmark.pedantic(lambda: samples.append(first_response_ms(fast_start)), rounds=3, iterations=1)
+    benchmark.extra_info["first_response_ms"] = round(statistics.median(samples), 1)
@@ -1,5 +1,71 @@
 import os
 import sys
+from unittest.mock import Mock, patch
+
+import pytest
 
 # Add the project root directory to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))) 
\ No newline at end of file
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Testy nie powinny zapisywać trwałych cache'y w katalogu roboczym
+os.environ.setdefault("GEOCODE_CACHE_DB_PATH", "")
+os.environ.setdefault("ROUTE_CACHE_DB_PATH", "")
+# Fałszywy Nominatim (fake_http) nie wymaga odstępów między zapytaniami
+os.environ.setdefault("NOMINATIM_MIN_INTERVAL_SECONDS", "0")
+
+from utils.cache import clear_caches
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    clear_caches()
+    yield
+    clear_caches()
+
+
+class FakeHTTP:
+    """
+    Stand-in for requests.get in utils.distance_tool answering Nominatim search,
+    OSRM route and OSRM table calls. Tests set `points` (address -> (lat, lon)
+    strings, as Nominatim returns them), `route` (OSRM route payload) or
+    `error` (raised on every call) and inspect `urls`.
+    """
+
+    def __init__(self):
+        self.points = {}
+        self.route = {"routes": []}
+        self.error = None
+        self.urls = []
+
+    def __call__(self, url, params=None, headers=None):
+        self.urls.append(url)
+        if self.error is not None:
+            raise self.error
+        response = Mock()
+        if "nominatim" in url:
+            point = self.points.get(params["q"])
+            response.json.return_value = [{"lat": point[0], "lon": point[1]}] if point else []
+        elif "/table/" in url:
+            sources = params["sources"].split(";")
+            destinations = params["destinations"].split(";")
+            # Odległość zależna od indeksów, żeby dało się sprawdzić składanie macierzy
+            response.json.return_value = {
+                "distances": [[(int(s) + 1) * 100000 + int(d) * 1000 for d in destinations] for s in sources]
+            }
+        else:
+            response.json.return_value = self.route
+        return response
+
+    def calls(self, service: str = "") -> int:
+        """Number of calls whose URL contains `service` ("nominatim", "/route/", "/table/")."""
+        return sum(service in url for url in self.urls)
+
+
+@pytest.fixture
+def fake_http(request):
+    """Patches utils.distance_tool.requests.get with a FakeHTTP; unittest classes get it as self.http."""
+    fake = FakeHTTP()
+    with patch("utils.distance_tool.requests.get", side_effect=fake):
+        if request.instance is not None:
+            request.instance.http = fake
+        yield fake
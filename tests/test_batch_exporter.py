@@ -0,0 +1,134 @@
+import threading
+import time
+from unittest import mock
+
+from utils.batch_exporter import BatchExporter
+from utils.langfuse_client import LangfuseClient
+
+
+class Recorder:
+    def __init__(self, block: threading.Event = None):
+        self.batches = []
+        self.block = block
+
+    def __call__(self, batch):
+        if self.block is not None:
+            self.block.wait(5)
+        self.batches.append(list(batch))
+
+
+def test_batches_by_size():
+    recorder = Recorder()
+    exporter = BatchExporter(recorder, batch_size=3, flush_interval=60)
+    for i in range(7):
+        assert exporter.submit(i)
+    exporter.flush(timeout=5)
+    exporter.shutdown()
+    assert recorder.batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert exporter.stats()["exported"] == 7
+
+
+def test_flushes_on_interval():
+    recorder = Recorder()
+    exporter = BatchExporter(recorder, batch_size=100, flush_interval=0.05)
+    exporter.submit("a")
+    deadline = time.monotonic() + 2
+    while not recorder.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    exporter.shutdown()
+    assert recorder.batches == [["a"]]
+
+
+def test_drops_and_samples_under_backpressure():
+    release = threading.Event()
+    recorder = Recorder(block=release)
+    exporter = BatchExporter(recorder, max_queue=10, batch_size=1, flush_interval=60, high_watermark=0.5, sample_rate=0.0)
+
+    exporter.submit("first")  # eksporter utknie na tej paczce
+    time.sleep(0.1)
+    accepted = sum(exporter.submit(i) for i in range(20))
+    stats = exporter.stats()
+    release.set()
+    exporter.shutdown()
+
+    assert accepted == 5
+    assert stats["sampled_out"] == 15
+    assert stats["dropped"] == 0
+
+    full = BatchExporter(Recorder(block=threading.Event()), max_queue=2, batch_size=1, flush_interval=60, high_watermark=2.0)
+    full.submit("first")
+    time.sleep(0.1)
+    results = [full.submit(i) for i in range(4)]
+    assert results == [True, True, False, False]
+    assert full.stats()["dropped"] == 2
+
+
+def test_submit_does_not_wait_for_export():
+    release = threading.Event()
+    exporter = BatchExporter(Recorder(block=release), batch_size=1, flush_interval=60)
+    started = time.perf_counter()
+    for i in range(50):
+        exporter.submit(i)
+    elapsed = time.perf_counter() - started
+    release.set()
+    exporter.shutdown()
+    assert elapsed < 0.5
+
+
+def test_shutdown_exports_pending_and_restarts():
+    recorder = Recorder()
+    exporter = BatchExporter(recorder, batch_size=100, flush_interval=60)
+    exporter.submit(1)
+    exporter.submit(2)
+    exporter.shutdown()
+    assert recorder.batches == [[1, 2]]
+
+    exporter.submit(3)
+    exporter.shutdown()
+    assert recorder.batches == [[1, 2], [3]]
+
+
+def test_export_errors_are_counted():
+    def failing(batch):
+        raise RuntimeError("langfuse niedostępny")
+
+    exporter = BatchExporter(failing, batch_size=2, flush_interval=60)
+    exporter.submit(1)
+    exporter.submit(2)
+    exporter.shutdown()
+    assert exporter.stats()["failed"] == 2
+
+
+def test_langfuse_client_flushes_per_batch():
+    langfuse = LangfuseClient()
+    fake_client = mock.MagicMock()
+    with mock.patch.object(langfuse, "client", fake_client):
+        for i in range(3):
+            langfuse.track_llm_request(f"prompt {i}", "system", {"vehicle_type": "bus"})
+        # Nic nie jest wysyłane w ścieżce zapytania
+        assert fake_client.flush.call_count == 0
+        langfuse.flush(timeout=5)
+        langfuse.shutdown()
+
+    assert fake_client.trace.call_count == 3
+    assert fake_client.flush.call_count >= 1
+    assert fake_client.flush.call_count < 3 + 1
+
+
+def test_langfuse_event_is_a_snapshot_of_the_llm_output():
+    langfuse = LangfuseClient()
+    fake_client = mock.MagicMock()
+    response = {"vehicle_type": "bus"}
+    metadata = {"prompt_name": "p_v1"}
+    with mock.patch.object(langfuse, "client", fake_client):
+        langfuse.track_llm_request("prompt", "system", response, metadata)
+        # Pipeline wzbogaca ten sam słownik po wywołaniu LLM
+        response["cargo_analysis"] = {"ldm": 2.4}
+        metadata["stream"] = True
+        langfuse.flush(timeout=5)
+        langfuse.shutdown()
+
+    generation = fake_client.trace.return_value.generation.call_args.kwargs
+    assert generation["output"] == {"vehicle_type": "bus"}
+    assert generation["completion"] == '{"vehicle_type": "bus"}'
+    assert fake_client.trace.call_args.kwargs["metadata"] == {"prompt_name": "p_v1"}
@@ -0,0 +1,93 @@
+import asyncio
+import copy
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from agents.llm_agent import LLMAgent
+from main import app
+from routers.parse import get_llm_agent
+from services.bulk_quote import main, run, save_checkpoint
+
+LLM_RESPONSE = {
+    "vehicle_type": "brak",
+    "cargo_items": [{"width": 0.8, "length": 1.2, "height": 1.5, "quantity": 2, "weight": 500}],
+    "pickup_postal_code": "86140",
+    "delivery_postal_code": "45-881",
+    "is_urgent": False
+}
+
+
+@pytest.fixture
+def llm_agent():
+    agent = LLMAgent(provider="openai", api_key="dummy_key")
+    agent.strategy.agenerate_response = AsyncMock(side_effect=lambda *args: copy.deepcopy(LLM_RESPONSE))
+    return agent
+
+
+def make_lines(count):
+    return [json.dumps({"request_id": f"r-{i}", "body": f"zlecenie {i}"}) + "\n" for i in range(count)]
+
+
+def read_output(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_results_are_written_in_input_order(tmp_path, llm_agent):
+    output = str(tmp_path / "out.ndjson")
+    lines = make_lines(5) + ["\n", "to nie jest json\n"]
+
+    with patch("utils.distance_tool.aget_distance", new=AsyncMock(return_value=(1000.0, False))):
+        processed = asyncio.run(run(iter(lines), output, concurrency=2, llm_agent=llm_agent))
+
+    results = read_output(output)
+    assert processed == 6
+    assert [r["line"] for r in results] == [0, 1, 2, 3, 4, 6]
+    assert results[0]["id"] == "r-0"
+    assert results[0]["result"]["parsed_data"]["pickup_postal_code"] == "86-140"
+    assert "error" in results[-1]
+
+
+def test_run_resumes_from_checkpoint(tmp_path, llm_agent):
+    output = str(tmp_path / "out.ndjson")
+    lines = make_lines(4)
+
+    with patch("utils.distance_tool.aget_distance", new=AsyncMock(return_value=(1000.0, False))):
+        asyncio.run(run(iter(lines[:2]), output, llm_agent=llm_agent))
+        written = (tmp_path / "out.ndjson").stat().st_size
+        # Niepełny zapis po checkpoincie (przerwany proces) zostanie obcięty
+        with open(output, "a", encoding="utf-8") as f:
+            f.write('{"line": 2, "resu')
+        save_checkpoint(output + ".ckpt", 2, written)
+
+        processed = asyncio.run(run(iter(lines), output, llm_agent=llm_agent))
+
+    assert processed == 2
+    assert [r["id"] for r in read_output(output)] == ["r-0", "r-1", "r-2", "r-3"]
+
+
+def test_results_match_parse_endpoint(tmp_path, llm_agent):
+    output = str(tmp_path / "out.ndjson")
+    app.dependency_overrides[get_llm_agent] = lambda: llm_agent
+    try:
+        with patch("utils.distance_tool.aget_distance", new=AsyncMock(return_value=(1000.0, False))):
+            asyncio.run(run(iter(make_lines(1)), output, llm_agent=llm_agent))
+            response = TestClient(app).post("/api/v1/parse", json={"prompt": "zlecenie 0"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert read_output(output)[0]["result"] == response.json()
+
+
+def test_main_configures_logging(tmp_path, llm_agent):
+    source = tmp_path / "in.jsonl"
+    source.write_text("")
+    with patch("services.bulk_quote.configure_logging") as configure, \
+            patch("services.bulk_quote.shutdown_logging") as shutdown, \
+            patch("services.bulk_quote.agent_registry.get", return_value=llm_agent):
+        main([str(source), "-o", str(tmp_path / "out.ndjson")])
+    configure.assert_called_once()
+    shutdown.assert_called_once()
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+from utils.cache import TieredCache, TTLCache, MISSING, cache_stats
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is MISSING
+
+
+def test_tiered_cache_counts_hits_and_misses():
+    cache = TieredCache("test_counts", max_entries=10)
+    assert cache.get("k") is MISSING
+    cache.set("k", None)
+    assert cache.get("k") is None
+
+    stats = cache_stats()["test_counts"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_tiered_cache_reads_through_disk_tier(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    writer = TieredCache("test_disk", max_entries=10, ttl_seconds=60, db_path=db_path)
+    writer.set("k", {"ldm": 1.6})
+
+    reader = TieredCache("test_disk", max_entries=10, ttl_seconds=60, db_path=db_path)
+    assert reader.get("k") == {"ldm": 1.6}
+    assert reader.stats()["disk_hits"] == 1
+    # Drugie trafienie obsługuje już pamięć
+    assert reader.get("k") == {"ldm": 1.6}
+    assert reader.stats()["disk_hits"] == 1
+
+
+def test_tiered_cache_async_disk_tier_runs_off_the_event_loop(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = TieredCache("test_async_disk", max_entries=10, ttl_seconds=60, db_path=db_path)
+    threads = []
+    original_get, original_set = cache.disk.get, cache.disk.set
+    monkeypatch.setattr(cache.disk, "get", lambda *a: threads.append(threading.get_ident()) or original_get(*a))
+    monkeypatch.setattr(cache.disk, "set", lambda *a: threads.append(threading.get_ident()) or original_set(*a))
+
+    async def run():
+        await cache.aset("k", {"ldm": 2.4})
+        cache.memory.clear()
+        return await cache.aget("k"), await cache.aget("k")
+
+    assert asyncio.run(run()) == ({"ldm": 2.4}, {"ldm": 2.4})
+    # Zapis i jeden odczyt z dysku, oba poza wątkiem pętli; drugi odczyt z pamięci
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_ttl_cache_is_bounded_by_bytes():
+    cache = TTLCache(max_entries=10, max_bytes=10)
+    cache.set("a", "xxxx")
+    cache.set("b", "yyyy")
+    assert cache.get("a") == "xxxx"
+    cache.set("c", "zzzz")
+    # Najdawniej używany wpis wypada, gdy suma przekracza limit
+    assert cache.get("b") is MISSING
+    assert cache.bytes == 8
+    cache.set("big", "x" * 11)
+    assert cache.get("big") is MISSING
+    assert len(cache) == 2
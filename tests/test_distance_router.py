@@ -0,0 +1,23 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from routers import distance
+
+client = TestClient(app)
+
+
+def test_distance_matrix_returns_rounded_distances():
+    with patch("utils.distance_tool.get_distance_matrix", return_value=[[204.34, -1.0]]):
+        response = client.post("/api/v1/distance/matrix", json={"origins": ["00-001"], "destinations": ["31-101", "?"]})
+    assert response.status_code == 200
+    assert response.json()["distances_km"] == [[204.3, None]]
+
+
+def test_distance_matrix_rejects_too_many_locations():
+    with patch.object(distance.settings, "DISTANCE_MATRIX_MAX_LOCATIONS", 3), \
+            patch("utils.distance_tool.get_distance_matrix") as matrix:
+        response = client.post("/api/v1/distance/matrix", json={"origins": ["00-001", "31-101"], "destinations": ["86-302", "22-405"]})
+    assert response.status_code == 422
+    matrix.assert_not_called()
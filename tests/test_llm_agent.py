@@ -1,9 +1,13 @@
+import asyncio
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, AsyncMock, patch
+import httpx
 import requests
 import json
-from agents.llm_agent import LLMAgent
+from datetime import date
+from agents.llm_agent import LLMAgent, build_cache_key
 from agents.llm_strategies import OpenAIStrategy, OllamaStrategy
+from agents.registry import AgentRegistry
 
 @pytest.fixture
 def llm_agent():
@@ -64,4 +68,95 @@ def test_llm_agent_default_provider():
 def test_llm_agent_ollama_provider():
     agent = LLMAgent(provider="ollama")
     assert agent.provider == 'ollama'
-    assert isinstance(agent.strategy, OllamaStrategy) 
\ No newline at end of file
+    assert isinstance(agent.strategy, OllamaStrategy) 
+
+def test_aparse_transport_request_success(llm_agent):
+    mock_response = {"vehicle_type": "bus", "cargo_items": []}
+
+    with patch.object(llm_agent.strategy, 'agenerate_response', new=AsyncMock(return_value=mock_response)):
+        result = asyncio.run(llm_agent.aparse_transport_request(
+            prompt="Test prompt",
+            system_prompt_path="prompts/p_v1.txt"
+        ))
+        assert result == mock_response
+
+def test_aparse_transport_request_http_error(llm_agent):
+    with patch.object(llm_agent.strategy, 'agenerate_response', new=AsyncMock(side_effect=httpx.ConnectError("HTTP Error"))):
+        with pytest.raises(Exception) as exc_info:
+            asyncio.run(llm_agent.aparse_transport_request(
+                prompt="Test prompt",
+                system_prompt_path="prompts/p_v1.txt"
+            ))
+        assert "Błąd zapytania HTTP" in str(exc_info.value)
+
+def test_openai_strategy_agenerate_response():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer dummy_key"
+        body = json.loads(request.content)
+        assert body["model"] == "gpt-3.5-turbo"
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": json.dumps({"vehicle_type": "naczepa"})}}]
+        })
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            strategy = OpenAIStrategy("dummy_key", client=client)
+            return await strategy.agenerate_response("prompt", "system", "gpt-3.5-turbo")
+
+    assert asyncio.run(run()) == {"vehicle_type": "naczepa"}
+
+def test_agent_registry_reuses_agents():
+    registry = AgentRegistry()
+    first = registry.get(provider="openai", model_name="gpt-3.5-turbo", api_key="dummy_key")
+    second = registry.get(provider="openai", model_name="gpt-3.5-turbo", api_key="dummy_key")
+    other = registry.get(provider="ollama")
+    assert first is second
+    assert first is not other
+
+    asyncio.run(registry.shutdown())
+    assert registry.get(provider="openai", model_name="gpt-3.5-turbo", api_key="dummy_key") is not first
+
+def test_agent_registry_picks_up_rotated_api_key():
+    registry = AgentRegistry()
+    old = registry.get(provider="openai", model_name="gpt-3.5-turbo", api_key="old_key")
+    new = registry.get(provider="openai", model_name="gpt-3.5-turbo", api_key="new_key")
+    assert new is not old
+    assert new.api_key == "new_key"
+    assert new.strategy.headers["Authorization"] == "Bearer new_key"
+    assert registry.get(provider="openai", model_name="gpt-3.5-turbo", api_key="new_key") is new
+    asyncio.run(registry.shutdown())
+
+def test_parse_transport_request_uses_cache(llm_agent):
+    with patch.object(llm_agent.strategy, 'generate_response', side_effect=lambda *args: {"vehicle_type": "bus", "cargo_items": []}) as mocked:
+        first = llm_agent.parse_transport_request("Test  prompt ", system_prompt_path="prompts/p_v1.txt")
+        first["vehicle_type"] = "naczepa"
+        second = llm_agent.parse_transport_request("Test prompt", system_prompt_path="prompts/p_v1.txt")
+
+    assert mocked.call_count == 1
+    assert second == {"vehicle_type": "bus", "cargo_items": []}
+
+def test_cache_key_depends_on_reference_day():
+    key_today = build_cache_key("jutro", "prompt", "gpt-3.5-turbo", "openai", date(2025, 5, 5))
+    key_tomorrow = build_cache_key("jutro", "prompt", "gpt-3.5-turbo", "openai", date(2025, 5, 6))
+    other_model = build_cache_key("jutro", "prompt", "gpt-4o", "openai", date(2025, 5, 5))
+    assert key_today != key_tomorrow
+    assert key_today != other_model
+
+def test_openai_strategy_astream_response():
+    events = [
+        {"choices": [{"delta": {"role": "assistant"}}]},
+        {"choices": [{"delta": {"content": '{"vehicle_type": '}}]},
+        {"choices": [{"delta": {"content": '"bus"}'}}]},
+    ]
+    body = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            strategy = OpenAIStrategy("dummy_key", client=client)
+            return [delta async for delta in strategy.astream_response("prompt", "system", "gpt-3.5-turbo")]
+
+    assert asyncio.run(run()) == ['{"vehicle_type": ', '"bus"}']
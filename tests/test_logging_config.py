@@ -0,0 +1,107 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+
+from config import settings
+from utils.logging_config import NonBlockingQueueHandler, configure_logging, shutdown_logging
+
+logger = logging.getLogger("tests.logging")
+
+
+@pytest.fixture
+def stream():
+    stream = io.StringIO()
+    yield stream
+    shutdown_logging()
+
+
+def read_lines(stream):
+    shutdown_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_json_with_extra_fields(stream, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+    configure_logging(level="INFO", log_file="", stream=stream)
+
+    logger.info("Wycena %s", "gotowa", extra={"vehicle_type": "bus"})
+    logger.debug("pominięte")
+    try:
+        raise ValueError("zły ładunek")
+    except ValueError:
+        logger.exception("Błąd")
+
+    lines = read_lines(stream)
+    assert len(lines) == 2
+    assert lines[0]["message"] == "Wycena gotowa"
+    assert lines[0]["level"] == "INFO"
+    assert lines[0]["logger"] == "tests.logging"
+    assert lines[0]["vehicle_type"] == "bus"
+    assert "ValueError: zły ładunek" in lines[1]["exception"]
+
+
+def test_payload_sampling(stream, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+    configure_logging(level="INFO", log_file="", stream=stream)
+    logger.info("Odpowiedź", extra={"payload": {"cargo_items": []}})
+    dropped = read_lines(stream)[0]
+
+    stream.seek(0)
+    stream.truncate()
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    configure_logging(level="INFO", log_file="", stream=stream)
+    payload = {"cargo_items": []}
+    logger.info("Odpowiedź", extra={"payload": payload})
+    # Zmiana po zalogowaniu nie trafia do wpisu
+    payload["cargo_items"].append({"quantity": 1})
+    kept = read_lines(stream)[0]
+
+    assert "payload" not in dropped
+    assert dropped["payload_sampled_out"] is True
+    assert kept["payload"] == {"cargo_items": []}
+
+
+def test_file_rotation(stream, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_FILE_MAX_BYTES", 500)
+    monkeypatch.setattr(settings, "LOG_FILE_BACKUP_COUNT", 2)
+    log_file = tmp_path / "app.log"
+    configure_logging(level="INFO", log_file=str(log_file), stream=stream)
+
+    for i in range(50):
+        logger.info("wpis %d", i)
+    shutdown_logging()
+
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert files == ["app.log", "app.log.1", "app.log.2"]
+    assert log_file.stat().st_size <= 500
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("tests", logging.INFO, __file__, 1, "wpis", None, None)
+
+    handler.handle(record)
+    handler.handle(record)
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+
+def test_uncopyable_payload_is_dropped_not_the_record(stream, monkeypatch):
+    class Changing:
+        def __deepcopy__(self, memo):
+            raise RuntimeError("dictionary changed size during iteration")
+
+    monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+    monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    configure_logging(level="INFO", log_file="", stream=stream)
+    logger.info("Odpowiedź", extra={"payload": Changing()})
+
+    line = read_lines(stream)[0]
+    assert line["message"] == "Odpowiedź"
+    assert "payload" not in line
+    assert line["payload_dropped"] is True
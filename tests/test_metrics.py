@@ -0,0 +1,121 @@
+import asyncio
+import copy
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from agents.llm_agent import LLMAgent
+from routers.parse import get_llm_agent
+from utils.cache import clear_caches
+from utils.metrics import (
+    StageHistogram, record_upstream_error, render_prometheus, reset_metrics, stage_stats, timed, upstream_errors
+)
+
+LLM_RESPONSE = {
+    "vehicle_type": "bus",
+    "cargo_items": [{"width": 0.8, "length": 1.2, "height": 1.0, "quantity": 2, "weight": 100}],
+    "pickup_postal_code": "00-001",
+    "delivery_postal_code": "30-001",
+    "is_urgent": False
+}
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+def test_timed_as_context_manager_and_decorator():
+    @timed("sync")
+    def work():
+        return 1
+
+    @timed("async")
+    async def awork():
+        return 2
+
+    with timed("block"):
+        pass
+    assert work() == 1
+    assert asyncio.run(awork()) == 2
+
+    with pytest.raises(ValueError):
+        with timed("block"):
+            raise ValueError("błąd")
+
+    stats = stage_stats()
+    assert stats["block"]["count"] == 2
+    assert stats["sync"]["count"] == 1
+    assert stats["async"]["count"] == 1
+    assert work.__name__ == "work"
+
+
+def test_quantiles_use_recent_window():
+    histogram = StageHistogram(window=100)
+    for i in range(1, 201):
+        histogram.observe(i / 1000)
+
+    quantiles = histogram.quantiles()
+    assert quantiles[0.5] == 0.15
+    assert quantiles[0.95] == 0.195
+    assert quantiles[0.99] == 0.199
+    # Liczniki obejmują wszystkie próbki, nie tylko okno
+    assert histogram.count == 200
+    assert histogram.max == 0.2
+
+
+def test_render_prometheus():
+    with timed("llm"):
+        pass
+    record_upstream_error("osrm")
+    record_upstream_error("osrm")
+
+    body = render_prometheus(
+        caches={"route": {"hits": 3, "misses": 1, "size": 4}, "postal_index": {"entries": 10, "hits": 0, "misses": 0}},
+        telemetry={"submitted": 5, "exported": 4, "dropped": 1, "queued": 0}
+    )
+
+    assert "# TYPE transport_stage_duration_seconds summary" in body
+    assert 'transport_stage_duration_seconds{stage="llm",quantile="0.99"}' in body
+    assert 'transport_stage_duration_seconds_count{stage="llm"} 1' in body
+    assert 'transport_upstream_errors_total{upstream="osrm"} 2' in body
+    assert 'transport_cache_hit_ratio{cache="route"} 0.75' in body
+    assert 'transport_cache_entries{cache="postal_index"} 10' in body
+    assert 'transport_telemetry_events_total{outcome="dropped"} 1' in body
+    assert upstream_errors() == {"osrm": 2}
+
+
+def test_metrics_endpoint_reports_parse_stages():
+    clear_caches()
+    agent = LLMAgent(provider="openai", api_key="dummy_key")
+    agent.strategy.agenerate_response = AsyncMock(side_effect=lambda *args: copy.deepcopy(LLM_RESPONSE))
+    app.dependency_overrides[get_llm_agent] = lambda: agent
+    try:
+        client = TestClient(app)
+        with patch("utils.distance_tool.aget_distance", new=AsyncMock(return_value=(290.0, False))):
+            assert client.post("/api/v1/parse", json={"prompt": "2 palety EUR"}).status_code == 200
+        response = client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for stage in ("parse", "llm", "distance", "dates", "cargo", "cargo.evaluate_fleet", "serialize"):
+        assert f'transport_stage_duration_seconds_count{{stage="{stage}"}} 1' in response.text
+    assert 'transport_cache_misses_total{cache="llm"} 1' in response.text
+
+
+def test_llm_errors_are_counted():
+    agent = LLMAgent(provider="openai", api_key="dummy_key")
+    agent.strategy.agenerate_response = AsyncMock(side_effect=httpx.ConnectError("brak połączenia"))
+
+    with pytest.raises(Exception):
+        asyncio.run(agent.aparse_transport_request("unikalny prompt metryk", "prompts/p_v1.txt"))
+
+    assert upstream_errors() == {"openai": 1}
+    assert stage_stats()["llm"]["count"] == 1
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import copy
+import threading
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+
+from main import app
+from agents.llm_agent import LLMAgent
+from routers.parse import get_llm_agent
+from services.pipeline import enrich_parsed_data
+
+LLM_RESPONSE = {
+    "vehicle_type": "brak",
+    "cargo_items": [{"width": 0.8, "length": 1.0, "height": 2.0, "quantity": 3, "weight": 200}],
+    "pickup_postal_code": "42445",
+    "delivery_postal_code": "34-442",
+    "pickup_date": "2025-05-05",
+    "delivery_date": "2025-05-06",
+    "is_urgent": False
+}
+
+
+@pytest.fixture
+def llm_agent():
+    agent = LLMAgent(provider="openai", api_key="dummy_key")
+    agent.strategy.agenerate_response = AsyncMock(side_effect=lambda *args: copy.deepcopy(LLM_RESPONSE))
+    app.dependency_overrides[get_llm_agent] = lambda: agent
+    yield agent
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client(llm_agent):
+    return TestClient(app)
+
+
+def test_parse_returns_enriched_data(client):
+    with patch("utils.distance_tool.aget_distance", new=AsyncMock(return_value=(204.34, False))):
+        response = client.post("/api/v1/parse", json={"prompt": "3 palety 100x80"})
+
+    assert response.status_code == 200
+    parsed = response.json()["parsed_data"]
+    assert parsed["pickup_postal_code"] == "42-445"
+    assert parsed["distance_km"] == 204.3
+    assert parsed["cargo_analysis"]["ldm"] == 1.0
+
+
+def test_enrich_runs_stages_concurrently():
+    # Każdy etap czeka na start drugiego - przy wykonaniu sekwencyjnym pierwszy nie doczekałby się (timeout)
+    distance_started, cargo_started = threading.Event(), threading.Event()
+    overlapped = {}
+
+    async def distance(origin, dest, mode):
+        distance_started.set()
+        overlapped["distance"] = await asyncio.to_thread(cargo_started.wait, 5)
+        return 100.0, False
+
+    def cargo(parsed_data, vehicle_type, cargo_items):
+        cargo_started.set()
+        overlapped["cargo"] = distance_started.wait(5)
+        parsed_data["cargo_analysis"] = {"ldm": 0}
+
+    parsed_data = copy.deepcopy(LLM_RESPONSE)
+    with patch("utils.distance_tool.aget_distance", new=distance), \
+            patch("services.pipeline.calculate_cargo", new=cargo):
+        asyncio.run(enrich_parsed_data(parsed_data))
+
+    assert overlapped == {"distance": True, "cargo": True}
+    assert parsed_data["distance_km"] == 100.0
+    assert parsed_data["cargo_analysis"] == {"ldm": 0}
+
+
+def test_batch_dedupes_prompts_and_keeps_order(client, llm_agent):
+    def llm(prompt, system_message, model_name):
+        if prompt == "zepsuty":
+            raise ValueError("Błąd LLM")
+        return copy.deepcopy(LLM_RESPONSE)
+
+    llm_agent.strategy.agenerate_response = AsyncMock(side_effect=llm)
+    items = [{"prompt": "3 palety"}, {"prompt": "zepsuty"}, {"prompt": "3 palety"}]
+
+    with patch("utils.distance_tool.aget_distance", new=AsyncMock(return_value=(204.34, False))), \
+            patch("utils.distance_tool.geocode_address", return_value=(50.0, 19.0)) as geocode:
+        response = client.post("/api/v1/parse/batch", json={"items": items})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0]["result"]["parsed_data"]["distance_km"] == 204.3
+    assert results[2]["result"] == results[0]["result"]
+    assert "Błąd LLM" in results[1]["error"]
+    assert llm_agent.strategy.agenerate_response.call_count == 2
+    assert geocode.call_count == 2
+
+
+def test_stream_emits_fields_stages_and_done(client, llm_agent):
+    text = json.dumps(LLM_RESPONSE)
+
+    async def astream(prompt, system_message, model_name):
+        for i in range(0, len(text), 10):
+            yield text[i:i + 10]
+
+    llm_agent.strategy.astream_response = astream
+
+    with patch("utils.distance_tool.aget_distance", new=AsyncMock(return_value=(204.34, False))):
+        response = client.post("/api/v1/parse/stream", json={"prompt": "3 palety 100x80"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    names = [e["event"] for e in events]
+
+    assert names[:len(LLM_RESPONSE)] == ["field"] * len(LLM_RESPONSE)
+    assert events[0] == {"event": "field", "name": "vehicle_type", "value": "brak"}
+    assert names[len(LLM_RESPONSE)] == "parsed"
+    assert set(names[len(LLM_RESPONSE) + 1:-1]) == {"distance", "dates", "cargo"}
+    assert names[-1] == "done"
+    assert events[-1]["data"]["parsed_data"]["distance_km"] == 204.3
+    assert events[-1]["data"]["parsed_data"]["cargo_analysis"]["ldm"] == 1.0
@@ -0,0 +1,117 @@
+import os
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from agents.llm_agent import LLMAgent
+from agents.prompt_registry import PromptRegistry, get_prompt_registry
+from routers.parse import get_llm_agent
+
+DAY = date(2025, 5, 5)
+
+
+def write(path, text, bump_ns=0):
+    path.write_text(text, encoding="utf-8")
+    if bump_ns:
+        # Zapis w tej samej chwili nie zawsze zmienia mtime - przesuwamy go jawnie
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump_ns))
+
+
+@pytest.fixture
+def prompt_dir(tmp_path):
+    write(tmp_path / "p_v1.txt", "Prompt pierwszy")
+    write(tmp_path / "p_v2.txt", "Prompt drugi")
+    (tmp_path / "notatki.md").write_text("nie prompt", encoding="utf-8")
+    return tmp_path
+
+
+def test_loads_directory_once_and_resolves_names(prompt_dir):
+    registry = PromptRegistry(str(prompt_dir), reload_interval=-1)
+
+    assert registry.names() == ["p_v1", "p_v2"]
+    template = registry.get("p_v1")
+    assert registry.get("p_v1.txt") is template
+    assert registry.get(str(prompt_dir / "p_v1.txt")) is template
+    assert template.version != registry.get("p_v2").version
+    with pytest.raises(KeyError):
+        registry.get("p_v9")
+
+
+def test_rendered_prompt_is_cached_per_day(prompt_dir):
+    registry = PromptRegistry(str(prompt_dir), reload_interval=-1)
+
+    with patch("builtins.open", side_effect=AssertionError("odczyt z dysku")):
+        first, template = registry.render("p_v1", DAY)
+        second, _ = registry.render("p_v1", DAY)
+        next_day, _ = registry.render("p_v1", date(2025, 5, 6))
+
+    assert first is second
+    assert first == "Dzisiaj jest 2025-05-05.\n\nPrompt pierwszy"
+    assert next_day.startswith("Dzisiaj jest 2025-05-06.")
+    assert template.name == "p_v1"
+
+
+def test_hot_reload_on_file_change(prompt_dir):
+    registry = PromptRegistry(str(prompt_dir), reload_interval=0)
+    old_version = registry.get("p_v1").version
+    registry.render("p_v1", DAY)
+
+    write(prompt_dir / "p_v1.txt", "Prompt pierwszy, poprawiony", bump_ns=1_000_000)
+    write(prompt_dir / "p_v3.txt", "Prompt trzeci")
+    os.remove(prompt_dir / "p_v2.txt")
+
+    template = registry.get("p_v1")
+    assert template.version != old_version
+    assert registry.render("p_v1", DAY)[0].endswith("Prompt pierwszy, poprawiony")
+    assert registry.names() == ["p_v1", "p_v3"]
+    assert registry.reloads == 1
+
+
+def test_reload_is_throttled(prompt_dir):
+    registry = PromptRegistry(str(prompt_dir), reload_interval=3600)
+    version = registry.get("p_v1").version
+    write(prompt_dir / "p_v1.txt", "Zmieniony", bump_ns=1_000_000)
+
+    assert registry.get("p_v1").version == version
+    registry.reload()
+    assert registry.get("p_v1").version != version
+
+
+def test_agent_cache_key_and_telemetry_follow_prompt_version(prompt_dir):
+    registry = PromptRegistry(str(prompt_dir), reload_interval=0)
+    agent = LLMAgent(provider="openai", api_key="dummy_key")
+
+    with patch("agents.llm_agent.get_prompt_registry", return_value=registry), \
+            patch.object(agent.strategy, "generate_response", side_effect=lambda *args: {"vehicle_type": "bus"}) as generate, \
+            patch.object(agent.langfuse, "track_llm_request") as track:
+        agent.parse_transport_request("3 palety", "p_v1")
+        agent.parse_transport_request("3 palety", "p_v1")
+        agent.parse_transport_request("3 palety", "p_v2")
+        write(prompt_dir / "p_v1.txt", "Nowa treść", bump_ns=1_000_000)
+        agent.parse_transport_request("3 palety", "p_v1")
+
+    # Ta sama wersja z cache, inna wersja (lub zmieniona treść) to nowe zapytanie
+    assert generate.call_count == 3
+    assert generate.call_args_list[1].args[1].endswith("Prompt drugi")
+    metadata = [call.kwargs["metadata"] for call in track.call_args_list]
+    assert [m["prompt_name"] for m in metadata] == ["p_v1", "p_v2", "p_v1"]
+    assert metadata[0]["prompt_version"] != metadata[2]["prompt_version"]
+
+
+def test_parse_rejects_unknown_prompt_version():
+    app.dependency_overrides[get_llm_agent] = lambda: LLMAgent(provider="openai", api_key="dummy_key")
+    try:
+        client = TestClient(app)
+        response = client.post("/api/v1/parse", json={"prompt": "3 palety", "prompt_version": "../config.py"})
+        prompts = client.get("/api/v1/prompts").json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 400
+    names = [prompt["name"] for prompt in prompts]
+    assert names == get_prompt_registry().names()
+    assert "p_v1" in names
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from unittest.mock import patch
+
+from utils.lazy import LazyModule, lazy_import
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Zależności ładowane dopiero przy pierwszym użyciu
+HEAVY_MODULES = [
+    "langfuse", "numpy", "requests", "httpx", "sqlite3",
+    "agents.llm_agent", "utils.cargo_calculator", "utils.distance_tool", "utils.postal_index"
+]
+
+
+def imported_after(code, cwd=ROOT, **env):
+    """Runs code in a fresh interpreter and returns which HEAVY_MODULES got imported."""
+    script = code + "\nimport json, sys\nprint(json.dumps([m for m in %r if m in sys.modules]))" % HEAVY_MODULES
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=cwd,
+        env={
+            **os.environ, "LANGFUSE_ENABLED": "false", "LOAD_DOTENV": "false",
+            "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])), **env
+        },
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_importing_app_skips_heavy_dependencies():
+    assert imported_after("import main") == []
+
+
+def test_importing_app_writes_no_files(tmp_path):
+    # Cache SQLite (geokodowanie, trasy) powstają przy pierwszym użyciu - import działa na systemie tylko do odczytu
+    loaded = imported_after(
+        "import main", cwd=str(tmp_path),
+        GEOCODE_CACHE_DB_PATH="geocode_cache.sqlite", ROUTE_CACHE_DB_PATH="route_cache.sqlite"
+    )
+    assert loaded == []
+    assert os.listdir(tmp_path) == []
+
+
+def test_distance_stack_loads_on_first_use():
+    loaded = imported_after(
+        "from routers import distance\n"
+        "assert distance.distance_tool.road_factor('00-001', '31-101') > 1"
+    )
+    assert "utils.distance_tool" in loaded
+
+
+def test_disabled_langfuse_is_never_imported():
+    loaded = imported_after(
+        "from utils.langfuse_client import LangfuseClient\n"
+        "LangfuseClient().track_llm_request('prompt', 'system', {})"
+    )
+    assert "langfuse" not in loaded
+
+
+def test_cargo_stack_loads_on_first_use():
+    loaded = imported_after(
+        "from services.pipeline import calculate_cargo\n"
+        "data = {}\n"
+        "calculate_cargo(data, 'bus', [{'length': 1.2, 'width': 0.8, 'height': 1, 'quantity': 1, 'weight': 10}])\n"
+        "assert data['cargo_analysis']['ldm'] > 0"
+    )
+    assert "numpy" in loaded
+    assert "utils.cargo_calculator" in loaded
+
+
+def test_lazy_module_is_patchable_and_thread_safe():
+    module = LazyModule("json")
+    with patch.object(module, "dumps", return_value="patched"):
+        assert module.dumps({}) == "patched"
+    assert module.dumps({}) == "{}"
+
+    lazy = LazyModule("utils.partial_json")
+    original = sys.modules.pop("utils.partial_json", None)
+    results = []
+    try:
+        threads = [threading.Thread(target=lambda: results.append(lazy.PartialJSONObjectParser)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if original is not None:
+            sys.modules["utils.partial_json"] = original
+    assert len(results) == 8
+    assert len(set(results)) == 1
+
+    assert lazy_import("json") is sys.modules["json"]
@@ -0,0 +1,118 @@
+import unittest
+from unittest import mock
+
+from services.pipeline import calculate_cargo
+from utils.cargo_calculator import (
+    CargoCalculator, canonical_manifest, cargo_cache, manifest_items
+)
+from utils import ldm_engine
+
+PALLETS = {"length": 1.2, "width": 0.8, "height": 1.0, "quantity": 4, "weight": 100}
+CRATE = {"length": 0.6, "width": 0.8, "height": 1.0, "quantity": 3, "weight": 50}
+LONG = {"length": 1.2, "width": 1.0, "height": 1.0, "quantity": 1, "weight": 200}
+
+
+class TestCargoCache(unittest.TestCase):
+
+    def setUp(self):
+        cargo_cache.clear()
+
+    def test_canonical_manifest_ignores_order_and_noise(self):
+        noisy = dict(PALLETS, length=1.2000001)
+        self.assertEqual(
+            canonical_manifest([PALLETS, CRATE], "bus", False),
+            canonical_manifest([CRATE, noisy], "bus", False)
+        )
+        self.assertNotEqual(
+            canonical_manifest([PALLETS], "bus", False),
+            canonical_manifest([PALLETS], "bus", True)
+        )
+        self.assertEqual(hash(canonical_manifest([PALLETS])), hash(canonical_manifest([dict(PALLETS)])))
+
+    def test_manifest_items_round_trip(self):
+        manifest = canonical_manifest([CRATE, PALLETS])
+        self.assertEqual(canonical_manifest(manifest_items(manifest)), manifest)
+
+    @mock.patch("services.pipeline.settings.LOAD_PLANNER_ENABLED", True)
+    @mock.patch("services.pipeline.settings.LOAD_PLANNER_MAX_PLACEMENTS", 100)
+    def test_repeated_manifest_skips_calculator(self):
+        with mock.patch.object(ldm_engine.LDMEvaluation, "__init__", autospec=True,
+                               side_effect=ldm_engine.LDMEvaluation.__init__) as init:
+            first = {"vehicle_type": "naczepa"}
+            calculate_cargo(first, "naczepa", [dict(PALLETS), dict(CRATE), dict(LONG)])
+            second = {"vehicle_type": "naczepa"}
+            calculate_cargo(second, "naczepa", [dict(LONG), dict(PALLETS), dict(CRATE)])
+
+        self.assertEqual(init.call_count, 1)
+        self.assertEqual(cargo_cache.stats()["hits"], 1)
+        self.assertEqual(first["cargo_analysis"]["ldm"], second["cargo_analysis"]["ldm"])
+        self.assertEqual(first["vehicle_suggestion"], second["vehicle_suggestion"])
+
+        # Indeksy w planie załadunku odnoszą się do kolejności pozycji wywołującego
+        for parsed, items in ((first, [PALLETS, CRATE, LONG]), (second, [LONG, PALLETS, CRATE])):
+            placed = {}
+            for p in parsed["cargo_analysis"]["load_plan"]["placements"]:
+                placed[p["item"]] = placed.get(p["item"], 0) + p["layers"]
+            self.assertEqual(placed, {i: item["quantity"] for i, item in enumerate(items)})
+
+    def test_cached_result_is_not_shared(self):
+        first = {}
+        calculate_cargo(first, "bus", [dict(PALLETS)])
+        first["cargo_analysis"]["warnings"].append("zmiana")
+        second = {}
+        calculate_cargo(second, "bus", [dict(PALLETS)])
+        self.assertNotIn("zmiana", second["cargo_analysis"]["warnings"])
+
+    def test_cache_holds_compact_json(self):
+        first = {}
+        calculate_cargo(first, "naczepa", [dict(PALLETS), dict(CRATE)])
+        with mock.patch("copy.deepcopy") as deepcopy:
+            second = {}
+            calculate_cargo(second, "naczepa", [dict(CRATE), dict(PALLETS)])
+        deepcopy.assert_not_called()
+        self.assertEqual(first, second)
+        stats = cargo_cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertLess(stats["bytes"], 1024)
+
+    def test_suggest_optimal_vehicle_is_memoized(self):
+        cargo = [dict(PALLETS)]
+        self.assertEqual(CargoCalculator.suggest_optimal_vehicle(cargo), {"vehicle": "bus"})
+        with mock.patch.object(CargoCalculator, "evaluate_fleet") as evaluate_fleet:
+            self.assertEqual(CargoCalculator.suggest_optimal_vehicle(cargo), {"vehicle": "bus"})
+        evaluate_fleet.assert_not_called()
+
+    @mock.patch("services.pipeline.settings.LOAD_PLANNER_ENABLED", True)
+    @mock.patch("services.pipeline.settings.LOAD_PLANNER_MAX_PLACEMENTS", 100)
+    def test_results_do_not_depend_on_cache(self):
+        # Wymiary tuż przy granicy zaokrąglenia manifestu kanonicznego (1 mm)
+        manifests = [
+            ("naczepa", [{"length": 0.5, "width": 1.2004, "height": 1.0, "quantity": 10, "weight": 10}]),
+            ("naczepa", [{"length": 0.5, "width": 1.1996, "height": 1.0, "quantity": 10, "weight": 10}]),
+            ("bus", [dict(PALLETS, length=1.2004), dict(CRATE, width=0.8004)]),
+            ("solówka", [dict(LONG, width=1.2254, quantity=7), dict(PALLETS, width=0.8004)]),
+        ]
+        for vehicle_type, items in manifests:
+            with self.subTest(vehicle_type=vehicle_type, items=items):
+                cargo_cache.clear()
+                with mock.patch("services.pipeline.settings.CARGO_CACHE_ENABLED", False):
+                    expected = {"is_stackable": True}
+                    calculate_cargo(expected, vehicle_type, [dict(item) for item in items])
+                    expected_suggestion = CargoCalculator.suggest_optimal_vehicle(items)
+
+                with mock.patch("services.pipeline.settings.CARGO_CACHE_ENABLED", True):
+                    for _ in range(2):  # chybienie, potem trafienie
+                        parsed = {"is_stackable": True}
+                        calculate_cargo(parsed, vehicle_type, [dict(item) for item in items])
+                        self.assertEqual(parsed, expected)
+                        self.assertEqual(CargoCalculator.suggest_optimal_vehicle(items), expected_suggestion)
+                self.assertEqual(cargo_cache.stats()["hits"], 2)
+
+    def test_cache_can_be_disabled(self):
+        with mock.patch("services.pipeline.settings.CARGO_CACHE_ENABLED", False):
+            calculate_cargo({}, "bus", [dict(PALLETS)])
+        self.assertEqual(cargo_cache.stats()["misses"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
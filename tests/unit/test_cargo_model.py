@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+
+from services.pipeline import build_enrichment_stages
+from services.validation import validate
+from utils.cargo_calculator import CargoCalculator, VehicleType
+from utils.cargo_model import CargoRecord, as_records, serialize_cargo
+
+
+class TestCargoRecord(unittest.TestCase):
+
+    def test_from_dict_sanitizes_numeric_fields(self):
+        record = CargoRecord.from_dict({"length": 1.2, "width": None, "height": "1.5", "quantity": 3})
+        self.assertEqual(record.length, 1.2)
+        self.assertEqual(record.width, 0)
+        self.assertEqual(record.height, 0)
+        self.assertEqual(record.quantity, 3)
+        self.assertIsNone(record.weight)
+        self.assertFalse(record.has_dimensions())
+
+    def test_slots(self):
+        record = CargoRecord(1.2, 0.8, 1.0, 1, 100)
+        with self.assertRaises(AttributeError):
+            record.extra = 1
+
+    def test_cm_input(self):
+        record = CargoRecord.from_dict({"length": 120, "width": 80, "height": 150, "count": 2}, unit="cm")
+        self.assertEqual((record.length, record.width, record.height, record.quantity), (1.2, 0.8, 1.5, 2))
+
+    def test_records_pass_through(self):
+        record = CargoRecord(1.2, 0.8, 1.0, 1, 100)
+        self.assertIs(as_records([record])[0], record)
+
+    def test_calculator_accepts_records_and_dicts(self):
+        raw = [{"length": 1.2, "width": 0.8, "height": 2.8, "quantity": 10, "weight": 100}]
+        calc = CargoCalculator(VehicleType.SOLO)
+        self.assertEqual(calc.calculateLDM(as_records(raw)), calc.calculateLDM(raw))
+
+    def test_validation_accepts_records(self):
+        data = {"vehicle_type": "naczepa", "cargo": [CargoRecord(14.0, 0.8, 2.7, 1, 100)]}
+        messages = validate(data, 13.0)
+        self.assertIn("Ładunek jest za wysoki.", messages)
+        self.assertIn("Ładunek może być ponadgabarytowy.", messages)
+        self.assertEqual(validate({"cargo": [{"length": 1400, "width": 80, "height": 270}]}, 0), messages[:2])
+
+    def test_cargo_stage_serializes_once(self):
+        parsed_data = {
+            "vehicle_type": "bus",
+            "cargo_items": [{"length": 1.2, "width": 0.8, "height": 1.0, "quantity": None, "weight": "ciężki"}],
+        }
+        stages = build_enrichment_stages(parsed_data)
+        stages["distance"].close()
+        stages["dates"].close()
+        asyncio.run(stages["cargo"])
+        self.assertEqual(
+            parsed_data["cargo_items"],
+            serialize_cargo([CargoRecord(1.2, 0.8, 1.0, 0, 0, pallet="EUR")])
+        )
+        self.assertIn("cargo_analysis", parsed_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from utils import distance_tool
+
+
+@pytest.mark.usefixtures("fake_http")
+class TestDistanceEstimate(unittest.TestCase):
+
+    def setUp(self):
+        self.http.points = {"00-001": ("52.2297", "21.0122"), "31-101": ("50.0647", "19.9450")}
+        self.http.route = {"routes": [{"distance": 293000}]}
+
+    def test_haversine_warszawa_krakow(self):
+        self.assertAlmostEqual(distance_tool.haversine_km(52.2297, 21.0122, 50.0647, 19.9450), 252.0, delta=1.0)
+
+    def test_estimate_mode_does_not_call_osrm(self):
+        distance_km, estimated = distance_tool.get_distance("00-001", "31-101", mode="estimate")
+        self.assertTrue(estimated)
+        self.assertTrue(280 < distance_km < 340)
+        self.assertEqual(self.http.calls("osrm"), 0)
+
+    def test_estimate_mode_prefers_cached_exact_distance(self):
+        self.assertEqual(distance_tool.get_distance("00-001", "31-101"), (293.0, False))
+        self.assertEqual(distance_tool.get_distance("00-001", "31-101", mode="estimate"), (293.0, False))
+
+    def test_exact_mode_falls_back_to_estimate(self):
+        with patch("utils.distance_tool._osrm_route", return_value=-1.0):
+            distance_km, estimated = distance_tool.get_distance("00-001", "31-101")
+        self.assertTrue(estimated)
+        self.assertGreater(distance_km, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
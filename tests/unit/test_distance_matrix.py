@@ -0,0 +1,41 @@
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from utils import distance_tool
+
+POINTS = {
+    "00-001": ("52.23", "21.01"),
+    "31-101": ("50.06", "19.94"),
+    "86-302": ("53.48", "18.75"),
+}
+
+
+@pytest.mark.usefixtures("fake_http")
+class TestDistanceMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.http.points = POINTS
+
+    def test_matrix_uses_single_table_request(self):
+        matrix = distance_tool.get_distance_matrix(["00-001", "31-101", "00-001"], ["86-302", "nieznane"])
+
+        self.assertEqual(self.http.calls("/table/"), 1)
+        # 3 unikalne adresy + 1 nierozwiązany, każdy geokodowany raz
+        self.assertEqual(self.http.calls("nominatim"), 4)
+        self.assertEqual(matrix, [[102.0, -1.0], [202.0, -1.0], [102.0, -1.0]])
+
+    def test_matrix_is_chunked_and_cached(self):
+        with patch.object(distance_tool.settings, "OSRM_TABLE_MAX_COORDS", 2):
+            distance_tool.get_distance_matrix(["00-001", "31-101"], ["86-302"])
+            self.assertEqual(self.http.calls("/table/"), 2)
+
+            calls = self.http.calls()
+            matrix = distance_tool.get_distance_matrix(["00-001", "31-101"], ["86-302"])
+            self.assertEqual(self.http.calls(), calls)
+            self.assertEqual(matrix, [[101.0], [101.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
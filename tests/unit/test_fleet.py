@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from services.validation import validate
+from utils import cargo_calculator
+from utils.cargo_calculator import CargoCalculator, get_max_ldm
+from utils.fleet import Fleet, VehicleClass, get_fleet, load_fleet
+
+
+def write_fleet(config):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    return path
+
+
+class TestFleet(unittest.TestCase):
+
+    def setUp(self):
+        self.path = write_fleet({
+            "default": "naczepa",
+            "vehicles": [
+                {"key": "bus", "length_cm": 450, "width_cm": 240, "height_cm": 260, "max_weight": 1500},
+                {"key": "7.5t", "length_cm": 620, "width_cm": 245, "height_cm": 240, "max_weight": 3000},
+                {"key": "naczepa", "length_cm": 1360, "width_cm": 240, "height_cm": 260, "max_weight": 24000},
+                {"key": "mega", "length_cm": 1360, "width_cm": 248, "height_cm": 300, "max_weight": 24000,
+                 "max_ldm": 13.6, "enabled": False},
+            ]
+        })
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_default_fleet_is_consistent(self):
+        fleet = get_fleet()
+        self.assertEqual([v.key for v in fleet], ["bus", "solówka", "naczepa"])
+        self.assertEqual(get_max_ldm("bus"), fleet.get("bus").max_ldm)
+        self.assertEqual(validate({"vehicle_type": "solówka"}, 7.4), ["Gabaryt za duży na wybrany typ pojazdu – zmień pojazd."])
+
+    def test_load_fleet(self):
+        fleet = load_fleet(self.path)
+        self.assertEqual([v.key for v in fleet], ["bus", "7.5t", "naczepa"])
+        self.assertNotIn("mega", fleet)
+        self.assertEqual(fleet.get("7.5t").max_ldm, 6.2)
+        self.assertEqual(fleet.resolve("nieznany").key, "naczepa")
+        # Ta sama przestrzeń ładunkowa - jeden plan załadunku dla busa i naczepy
+        self.assertEqual(fleet.spaces[(240, 260)], [0, 2])
+        self.assertEqual(fleet.max_width_cm, 245)
+
+    def test_pallet_tables(self):
+        trailer = VehicleClass("naczepa", 1360, 240, 260, 24000)
+        self.assertEqual(trailer.pallet_rows["EUR"], (3, 120, 33))
+        self.assertEqual(trailer.pallet_rows["industrial"], (2, 100, 26))
+        self.assertEqual(trailer.underuse_ldm, 0.8 * 13.6)
+
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            Fleet([VehicleClass("bus", 450, 240, 260, 1500)], default="naczepa")
+        path = write_fleet({"vehicles": [{"key": "bus", "length_cm": 450}]})
+        try:
+            with self.assertRaises(ValueError):
+                load_fleet(path)
+        finally:
+            os.remove(path)
+
+    def test_custom_vehicle_class_in_evaluation(self):
+        cargo = [{"length": 1.2, "width": 0.8, "height": 2.0, "quantity": 15, "weight": 150}]
+        with mock.patch.object(cargo_calculator, "FLEET", load_fleet(self.path)):
+            evaluation = CargoCalculator.evaluate_fleet(cargo)
+            self.assertTrue(evaluation.fits("7.5t"))
+            self.assertFalse(evaluation.fits("bus"))
+            self.assertEqual(evaluation.suggest(), {"vehicle": "7.5t"})
+
+            result = CargoCalculator("7.5t").calculateLDM(cargo)
+            self.assertEqual(result["vehicle_used"], "7.5t")
+            self.assertEqual(result["max_ldm"], 6.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from utils import distance_tool
+
+
+@pytest.mark.usefixtures("fake_http")
+class TestGeocodeCache(unittest.TestCase):
+
+    def test_repeat_lookup_hits_cache(self):
+        self.http.points = {"00-001": ("52.23", "21.01")}
+        first = distance_tool.geocode_address("00-001")
+        second = distance_tool.geocode_address(" 00-001 ")
+        self.assertEqual(first, (52.23, 21.01))
+        self.assertEqual(second, (52.23, 21.01))
+        self.assertEqual(self.http.calls(), 1)
+
+    def test_unresolved_address_is_negatively_cached(self):
+        self.assertEqual(distance_tool.geocode_address("nieistniejące miejsce"), (None, None))
+        self.assertEqual(distance_tool.geocode_address("nieistniejące miejsce"), (None, None))
+        self.assertEqual(self.http.calls(), 1)
+
+    def test_network_error_is_not_cached(self):
+        self.http.error = ConnectionError("offline")
+        with self.assertRaises(ConnectionError):
+            distance_tool.geocode_address("31-101")
+        self.http.error = None
+        self.http.points = {"31-101": ("50.06", "19.94")}
+        self.assertEqual(distance_tool.geocode_address("31-101"), (50.06, 19.94))
+
+    def test_nominatim_calls_go_through_the_limiter(self):
+        self.http.points = {"00-001": ("52.23", "21.01")}
+        with patch.object(distance_tool.nominatim_limiter, "wait") as wait:
+            distance_tool.geocode_address("00-001")
+            distance_tool.geocode_address("00-001")
+            distance_tool.get_postal_code_from_city("00-001")
+        # Wyszukiwanie (raz - potem cache) i reverse
+        self.assertEqual(wait.call_count, 2)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_concurrent_callers_are_spaced(self):
+        limiter = distance_tool.RateLimiter(1.0)
+        sleeps = []
+        with patch("utils.distance_tool.time.monotonic", return_value=100.0), \
+                patch("utils.distance_tool.time.sleep", side_effect=sleeps.append):
+            threads = [threading.Thread(target=limiter.wait) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        # Pierwszy od razu, kolejne w odstępach 1 s niezależnie od liczby wątków
+        self.assertEqual(sorted(sleeps), [1.0, 2.0, 3.0])
+
+    def test_zero_interval_never_waits(self):
+        with patch("utils.distance_tool.time.sleep") as sleep:
+            limiter = distance_tool.RateLimiter(0)
+            for _ in range(3):
+                limiter.wait()
+        sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
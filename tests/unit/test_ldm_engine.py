@@ -0,0 +1,195 @@
+import random
+import unittest
+from math import floor
+
+from utils.cargo_calculator import CargoCalculator, VehicleType, VEHICLES
+from utils import ldm_engine
+
+
+def reference_calculate_ldm(vehicle_type, cargo_items):
+    """Pętla per ładunek - poprzednia implementacja calculateLDM, punkt odniesienia."""
+    vehicle = VEHICLES[vehicle_type]
+    total_ldm = 0.0
+    total_weight = 0
+    warnings = []
+    fit_in_vehicle = True
+
+    for item in cargo_items:
+        l = item["length"] * 100
+        w = item["width"] * 100
+        h = item["height"] * 100
+        qty = item["quantity"]
+        weight_per_piece = item.get("weight", 0)
+
+        if h > vehicle["height_cm"]:
+            warnings.append(f"Ładunek o wysokości {h} cm przekracza wysokość pojazdu ({vehicle['height_cm']} cm).")
+            fit_in_vehicle = False
+
+        best_ldm = None
+        for orient_l, orient_w in [(l, w), (w, l)]:
+            pieces_per_row = floor(vehicle["width_cm"] / orient_w)
+            if pieces_per_row == 0:
+                continue
+            full_rows = qty // pieces_per_row
+            leftover = qty % pieces_per_row
+            ldm_m = ((full_rows * orient_l) + (orient_l if leftover else 0)) / 100
+            if best_ldm is None or ldm_m < best_ldm:
+                best_ldm = ldm_m
+
+        if best_ldm is None:
+            warnings.append("Ładunek jest zbyt szeroki, by zmieścić się w pojeździe.")
+            fit_in_vehicle = False
+            continue
+
+        total_ldm += best_ldm
+        total_weight += weight_per_piece * qty
+
+    if total_ldm > vehicle["max_ldm"]:
+        warnings.append(f"Łączna długość LDM ({round(total_ldm, 2)}) przekracza maksymalną dla {vehicle_type} ({vehicle['max_ldm']}).")
+        fit_in_vehicle = False
+    if total_weight > vehicle["max_weight"]:
+        warnings.append(f"Łączna waga ładunku ({total_weight} kg) przekracza maksymalną dla {vehicle_type} ({vehicle['max_weight']} kg).")
+        fit_in_vehicle = False
+    if 0 < total_ldm < (0.8 * vehicle["max_ldm"]):
+        warnings.append("Zajmujesz mniej niż 80% przestrzeni pojazdu – rozważ wybór opcji 'dowolny typ pojazdu'.")
+
+    return {
+        "ldm": round(total_ldm, 2),
+        "max_ldm": vehicle["max_ldm"],
+        "fit_in_vehicle": fit_in_vehicle,
+        "warnings": warnings,
+        "total_weight": total_weight,
+        "vehicle_used": vehicle_type.value,
+        "vehicle_suggestion": vehicle_type.value if fit_in_vehicle else VehicleType.NACZEPA.value
+    }
+
+
+def random_manifest(rng, size, weights=(0, 50, 200, 750)):
+    return [
+        {
+            "length": rng.choice([0.6, 0.8, 1.0, 1.2, 2.0, 2.5, 3.0]),
+            "width": rng.choice([0.4, 0.8, 1.0, 1.2, 2.4, 2.6]),
+            "height": rng.choice([0.5, 1.5, 2.0, 2.7]),
+            "quantity": rng.randint(1, 40),
+            "weight": rng.choice(weights),
+        }
+        for _ in range(size)
+    ]
+
+
+class TestLDMEngine(unittest.TestCase):
+
+    def test_matches_reference_loop(self):
+        rng = random.Random(7)
+        for size in (1, 2, 5, 30):
+            for _ in range(50):
+                cargo = random_manifest(rng, size)
+                for vehicle_type in VehicleType:
+                    with self.subTest(size=size, vehicle=vehicle_type):
+                        self.assertEqual(
+                            CargoCalculator(vehicle_type).calculateLDM(cargo),
+                            reference_calculate_ldm(vehicle_type, cargo)
+                        )
+
+    def test_int_weight_total_stays_int(self):
+        # Pozycja z wagą float, która się nie mieści, nie zmienia typu sumy (komunikat "26400 kg", nie "26400.0 kg")
+        cargo = [
+            {"length": 1.2, "width": 0.8, "height": 1.0, "quantity": 33, "weight": 800},
+            {"length": 2.6, "width": 2.6, "height": 1.0, "quantity": 1, "weight": 12.5},
+        ]
+        for vehicle_type in VehicleType:
+            with self.subTest(vehicle=vehicle_type):
+                result = CargoCalculator(vehicle_type).calculateLDM(cargo)
+                expected = reference_calculate_ldm(vehicle_type, cargo)
+                self.assertEqual(result, expected)
+                self.assertIs(type(result["total_weight"]), int)
+                self.assertIn("Łączna waga ładunku (26400 kg)", " ".join(result["warnings"]))
+
+        rng = random.Random(13)
+        for _ in range(200):
+            cargo = random_manifest(rng, rng.randint(1, 6), weights=(0, 50, 750, 12.5, 1000.0))
+            for vehicle_type in VehicleType:
+                with self.subTest(cargo=cargo, vehicle=vehicle_type):
+                    result = CargoCalculator(vehicle_type).calculateLDM(cargo)
+                    expected = reference_calculate_ldm(vehicle_type, cargo)
+                    self.assertEqual(result, expected)
+                    self.assertIs(type(result["total_weight"]), type(expected["total_weight"]))
+
+    def test_all_vehicles_in_one_pass(self):
+        cargo = [{"length": 1.2, "width": 0.8, "height": 1.5, "quantity": 33, "weight": 500}]
+        vehicles = [VEHICLES[v] for v in VehicleType]
+        evaluation = ldm_engine.evaluate(cargo, vehicles)
+        self.assertEqual(evaluation.item_ldm.shape, (3, 1))
+        self.assertEqual([round(x, 2) for x in evaluation.total_ldm.tolist()], [13.2, 13.2, 13.2])
+        self.assertEqual([evaluation.fit_in_vehicle(v) for v in range(3)], [False, False, True])
+
+    def test_columnar_input(self):
+        cargo = ldm_engine.CargoArrays(
+            length=[1.2, 1.2], width=[0.8, 1.0], height=[1.5, 2.8], quantity=[10, 4], weight=[100, 100]
+        )
+        evaluation = ldm_engine.LDMEvaluation(cargo, ldm_engine.FleetArrays([VEHICLES[VehicleType.NACZEPA]]))
+        self.assertAlmostEqual(float(evaluation.total_ldm[0]), 6.0)
+        self.assertFalse(evaluation.fit_in_vehicle(0))
+        warnings = evaluation.warnings(0, VehicleType.NACZEPA, VEHICLES[VehicleType.NACZEPA])
+        self.assertIn("Ładunek o wysokości 280.0 cm przekracza wysokość pojazdu (260 cm).", warnings)
+
+    def test_fleet_evaluation_matches_per_vehicle(self):
+        rng = random.Random(14)
+        for size in (1, 3, 8):
+            for _ in range(50):
+                cargo = random_manifest(rng, size)
+                with self.subTest(cargo=cargo):
+                    evaluation = CargoCalculator.evaluate_fleet(cargo)
+                    expected_suggestion = None
+                    for vehicle_type in VehicleType:
+                        expected = reference_calculate_ldm(vehicle_type, cargo)
+                        self.assertEqual(evaluation.result(vehicle_type), expected)
+                        self.assertEqual(evaluation.fits(vehicle_type), expected["fit_in_vehicle"])
+                        self.assertEqual(evaluation.ldm(vehicle_type), expected["ldm"])
+                        if expected["fit_in_vehicle"] and (
+                            expected_suggestion is None or expected["ldm"] < expected_suggestion[1]
+                        ):
+                            expected_suggestion = (vehicle_type.value, expected["ldm"])
+                    suggestion = evaluation.suggest()
+                    self.assertEqual(suggestion["vehicle"], expected_suggestion[0] if expected_suggestion else "brak")
+
+    def test_calculate_cargo_single_evaluation(self):
+        from unittest import mock
+        from services.pipeline import calculate_cargo
+
+        cargo = [{"length": 1.2, "width": 0.8, "height": 1.5, "quantity": 10, "weight": 100}]
+        parsed_data = {"vehicle_type": "bus", "cargo_items": cargo}
+        with mock.patch.object(ldm_engine.LDMEvaluation, "__init__", autospec=True,
+                               side_effect=ldm_engine.LDMEvaluation.__init__) as init:
+            calculate_cargo(parsed_data, "bus", cargo)
+        self.assertEqual(init.call_count, 1)
+        parsed_data["cargo_analysis"].pop("load_plan", None)
+        self.assertEqual(parsed_data["cargo_analysis"], reference_calculate_ldm(VehicleType.BUS, cargo))
+        self.assertEqual(parsed_data["vehicle_suggestion"], "bus")
+
+    def test_ldm_calculator_uses_same_engine(self):
+        from services.ldm_calculator import calculate_ldm
+
+        rng = random.Random(20)
+        for vehicle_type in VehicleType:
+            for _ in range(50):
+                cargo = random_manifest(rng, rng.randint(1, 6))
+                cargo_cm = [
+                    {"length": item["length"] * 100, "width": item["width"] * 100,
+                     "height": item["height"] * 100, "count": item["quantity"]}
+                    for item in cargo
+                ]
+                with self.subTest(vehicle=vehicle_type, cargo=cargo):
+                    self.assertEqual(
+                        calculate_ldm(cargo_cm, vehicle_type.value),
+                        CargoCalculator(vehicle_type).calculateLDM(cargo)["ldm"]
+                    )
+
+    def test_empty_manifest(self):
+        evaluation = ldm_engine.evaluate([], [VEHICLES[VehicleType.BUS]])
+        self.assertEqual(evaluation.total_ldm.tolist(), [0.0])
+        self.assertTrue(evaluation.fit_in_vehicle(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
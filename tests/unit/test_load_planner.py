@@ -0,0 +1,149 @@
+import random
+import time
+import unittest
+
+from utils.cargo_calculator import CargoCalculator, VehicleType, VEHICLES
+from utils.load_planner import plan_load
+
+TRAILER = VEHICLES[VehicleType.NACZEPA]
+
+
+def overlaps(a, b):
+    return (
+        a["x"] < b["x"] + b["length"] - 1e-6 and b["x"] < a["x"] + a["length"] - 1e-6
+        and a["y"] < b["y"] + b["width"] - 1e-6 and b["y"] < a["y"] + a["width"] - 1e-6
+    )
+
+
+class TestLoadPlanner(unittest.TestCase):
+
+    def assertValidPlan(self, plan, cargo, vehicle):
+        placed = {}
+        for p in plan.placements:
+            self.assertGreaterEqual(p["y"], 0)
+            self.assertLessEqual(p["y"] + p["width"], vehicle["width_cm"] + 1e-6)
+            self.assertLessEqual(p["x"] + p["length"], plan.length_cm + 1e-6)
+            placed[p["item"]] = placed.get(p["item"], 0) + p["layers"]
+        for a_index, a in enumerate(plan.placements):
+            for b in plan.placements[a_index + 1:]:
+                self.assertFalse(overlaps(a, b), (a, b))
+        for index, item in enumerate(cargo):
+            if index not in plan.unplaced:
+                self.assertEqual(placed.get(index, 0), item["quantity"])
+
+    def test_single_type_matches_rows(self):
+        cargo = [{"length": 1.2, "width": 0.8, "height": 1.5, "quantity": 33, "weight": 500}]
+        plan = plan_load(cargo, TRAILER)
+        self.assertEqual(plan.strategy, "rows")
+        self.assertEqual(plan.ldm, 13.2)
+        self.assertValidPlan(plan, cargo, TRAILER)
+
+    def test_stacking_halves_floor(self):
+        cargo = [{"length": 1.2, "width": 0.8, "height": 1.2, "quantity": 33, "weight": 100}]
+        plan = plan_load(cargo, TRAILER, stackable=True)
+        self.assertEqual(plan.ldm, 7.2)
+        self.assertEqual({p["layers"] for p in plan.placements}, {1, 2})
+        self.assertValidPlan(plan, cargo, TRAILER)
+
+    def test_too_high_is_not_stacked(self):
+        cargo = [{"length": 1.2, "width": 0.8, "height": 2.8, "quantity": 6, "weight": 100}]
+        plan = plan_load(cargo, TRAILER, stackable=True)
+        self.assertEqual(plan.ldm, 2.4)
+        self.assertTrue(all(p["layers"] == 1 for p in plan.placements))
+
+    def test_mixed_load_shares_rows(self):
+        cargo = [
+            {"length": 1.2, "width": 0.8, "height": 1.0, "quantity": 4, "weight": 100},
+            {"length": 1.2, "width": 1.0, "height": 1.0, "quantity": 1, "weight": 100},
+            {"length": 0.6, "width": 0.8, "height": 1.0, "quantity": 3, "weight": 100},
+        ]
+        plan = plan_load(cargo, TRAILER)
+        self.assertEqual(plan.strategy, "skyline")
+        self.assertLess(plan.ldm, CargoCalculator(VehicleType.NACZEPA).calculateLDM(cargo)["ldm"])
+        self.assertValidPlan(plan, cargo, TRAILER)
+
+    def test_too_wide_is_unplaced(self):
+        cargo = [
+            {"length": 3.0, "width": 2.5, "height": 1.0, "quantity": 1, "weight": 100},
+            {"length": 1.2, "width": 0.8, "height": 1.0, "quantity": 3, "weight": 100},
+        ]
+        plan = plan_load(cargo, TRAILER)
+        self.assertEqual(plan.unplaced, [0])
+        self.assertEqual(plan.ldm, 1.2)
+
+    def test_never_worse_than_rows(self):
+        rng = random.Random(15)
+        for _ in range(100):
+            cargo = [
+                {
+                    "length": rng.choice([0.6, 0.8, 1.0, 1.2, 2.0]),
+                    "width": rng.choice([0.4, 0.6, 0.8, 1.0, 1.2]),
+                    "height": rng.choice([0.5, 1.0, 1.5]),
+                    "quantity": rng.randint(1, 12),
+                    "weight": 10,
+                }
+                for _ in range(rng.randint(1, 6))
+            ]
+            stackable = rng.random() < 0.5
+            with self.subTest(cargo=cargo, stackable=stackable):
+                plan = plan_load(cargo, TRAILER, stackable=stackable)
+                rows = CargoCalculator(VehicleType.NACZEPA).calculateLDM(cargo)["ldm"]
+                self.assertLessEqual(plan.ldm, rows)
+                self.assertValidPlan(plan, cargo, TRAILER)
+
+    def test_time_budget_falls_back_to_rows(self):
+        cargo = [
+            {"length": 1.2, "width": 0.8, "height": 1.0, "quantity": 4, "weight": 100},
+            {"length": 1.2, "width": 1.0, "height": 1.0, "quantity": 1, "weight": 100},
+            {"length": 0.6, "width": 0.8, "height": 1.0, "quantity": 3, "weight": 100},
+        ]
+        # Zerowy budżet - skyline nie zdąży niczego ułożyć, zostaje układ w rzędach
+        plan = plan_load(cargo, TRAILER, time_budget=0)
+        self.assertEqual(plan.strategy, "rows")
+        self.assertEqual(plan.ldm, CargoCalculator(VehicleType.NACZEPA).calculateLDM(cargo)["ldm"])
+        self.assertValidPlan(plan, cargo, TRAILER)
+
+    def test_placements_are_capped(self):
+        cargo = [
+            {"length": 1.2, "width": 0.8, "height": 1.0, "quantity": 4, "weight": 100},
+            {"length": 0.6, "width": 0.8, "height": 1.0, "quantity": 3, "weight": 100},
+        ]
+        full = plan_load(cargo, TRAILER)
+        capped = plan_load(cargo, TRAILER, max_placements=6)
+        self.assertEqual(full.stacks, 7)
+        self.assertEqual(len(full.placements), 7)
+        # Ten sam LDM bez rozmieszczenia stosów
+        self.assertEqual((capped.ldm, capped.stacks, capped.placements), (full.ldm, 7, None))
+        self.assertEqual(capped.to_dict()["placements"], [])
+
+    def test_budget_covers_large_manifests(self):
+        rng = random.Random(20)
+        cargo = [
+            {"length": rng.choice([0.6, 1.2, 2.0]), "width": rng.choice([0.8, 1.0]), "height": 1.0,
+             "quantity": rng.randint(1, 33), "weight": 10}
+            for _ in range(10000)
+        ]
+        # Budżet wyczerpany już przy grupowaniu manifestu - brak planu
+        self.assertIsNone(plan_load(cargo, TRAILER, time_budget=0))
+
+        # Z budżetem 50 ms plan (lub jego brak) jest gotowy w granicach budżetu, nie sekund
+        started = time.perf_counter()
+        plan_load(cargo, TRAILER, stackable=True, time_budget=0.05, max_placements=0)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+        plan = plan_load(cargo, TRAILER, stackable=True, max_placements=0)
+        self.assertGreater(plan.stacks, 10000)
+        self.assertIsNone(plan.placements)
+
+    def test_fleet_evaluation_uses_plan(self):
+        cargo = [{"length": 1.2, "width": 0.8, "height": 1.2, "quantity": 33, "weight": 100}]
+        evaluation = CargoCalculator.evaluate_fleet(cargo, is_stackable=True, plan_load=True)
+        self.assertEqual(evaluation.ldm(VehicleType.NACZEPA), 7.2)
+        self.assertTrue(evaluation.fits(VehicleType.SOLO))
+        self.assertEqual(evaluation.suggest(), {"vehicle": "solówka"})
+        self.assertEqual(evaluation.result(VehicleType.SOLO)["ldm"], 7.2)
+        self.assertIs(evaluation.load_plan(VehicleType.BUS), evaluation.load_plan(VehicleType.NACZEPA))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from services.ldm_calculator import calculate_ldm
+from utils import ldm_engine
+from utils.cargo_calculator import CargoCalculator, FLEET, VehicleType
+from utils.cargo_model import CargoRecord
+from utils.pallets import match_pallet, pallet_codes, pallet_row, snap_pallets
+
+
+def generic_ldm(cargo, vehicle):
+    """Silnik bez tablic palet - ogólne szukanie orientacji."""
+    return ldm_engine.LDMEvaluation(ldm_engine.CargoArrays.from_items(cargo), ldm_engine.FleetArrays([vehicle]))
+
+
+class TestPallets(unittest.TestCase):
+
+    def test_match_pallet(self):
+        self.assertEqual(match_pallet(120, 80), "EUR")
+        self.assertEqual(match_pallet(80, 120), "EUR")
+        self.assertEqual(match_pallet(100, 120), "industrial")
+        self.assertEqual(match_pallet(60, 80), "half")
+        self.assertIsNone(match_pallet(119, 80))
+        self.assertEqual(match_pallet(119, 81, tolerance_cm=2), "EUR")
+
+    def test_snap_keeps_orientation(self):
+        records = [CargoRecord(0.79, 1.21, 1.0, 2, 100), CargoRecord(1.5, 0.8, 1.0, 1, 100)]
+        snap_pallets(records, tolerance_cm=2)
+        self.assertEqual((records[0].length, records[0].width, records[0].pallet), (0.8, 1.2, "EUR"))
+        self.assertEqual((records[1].length, records[1].width, records[1].pallet), (1.5, 0.8, None))
+
+    def test_pallet_codes(self):
+        codes = pallet_codes(np.array([120.0, 80.0, 100.0, 60.0, 50.0]), np.array([80.0, 120.0, 120.0, 80.0, 50.0]))
+        self.assertEqual(codes.tolist(), [0, 0, 1, 2, -1])
+
+    def test_table_lookup_matches_generic_path(self):
+        for vehicle in FLEET:
+            for length, width in ((1.2, 0.8), (1.2, 1.0), (0.6, 0.8), (0.8, 1.2)):
+                for quantity in (0, 1, 2, 3, 7, 33, 40, 200, 250):
+                    cargo = [{"length": length, "width": width, "height": 1.0, "quantity": quantity, "weight": 10}]
+                    with self.subTest(vehicle=vehicle.key, footprint=(length, width), quantity=quantity):
+                        fast = ldm_engine.LDMEvaluation(ldm_engine.CargoArrays.from_items(cargo), vehicle.arrays)
+                        generic = generic_ldm(cargo, vehicle.spec)
+                        self.assertEqual(fast.total_ldm.tolist(), generic.total_ldm.tolist())
+
+    def test_pallet_quote(self):
+        trailer = FLEET.get("naczepa")
+        self.assertEqual(trailer.pallet_quote("EUR", 1), (2, 1, 0.8))
+        self.assertEqual(trailer.pallet_quote("EUR", 33), (3, 11, 13.2))
+        self.assertEqual(trailer.pallet_quote("EUR", 1000), pallet_row(120, 80, 240, 1000))
+
+    def test_mixed_manifest(self):
+        cargo = [
+            {"length": 1.2, "width": 0.8, "height": 1.0, "quantity": 10, "weight": 100},
+            {"length": 1.5, "width": 1.1, "height": 1.0, "quantity": 3, "weight": 100},
+        ]
+        calc = CargoCalculator(VehicleType.NACZEPA)
+        generic = generic_ldm(cargo, calc.vehicle)
+        self.assertEqual(calc.calculateLDM(cargo)["ldm"], round(float(generic.total_ldm[0]), 2))
+
+    def test_ldm_calculator_pallets(self):
+        self.assertEqual(calculate_ldm([{"length": 120, "width": 80, "count": 33}], "naczepa"), 13.2)
+        self.assertEqual(calculate_ldm([{"length": 100, "width": 120, "count": 4}], "naczepa"), 2.0)
+        self.assertEqual(calculate_ldm([{"length": 150, "width": 110, "count": 3}], "naczepa"), 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import json
+import unittest
+
+from utils.partial_json import PartialJSONObjectParser
+
+
+class TestPartialJSONObjectParser(unittest.TestCase):
+
+    def feed_all(self, text, chunk_size):
+        parser = PartialJSONObjectParser()
+        fields = []
+        for i in range(0, len(text), chunk_size):
+            fields.extend(parser.feed(text[i:i + chunk_size]))
+        return parser, fields
+
+    def test_fields_are_emitted_as_they_complete(self):
+        parser = PartialJSONObjectParser()
+        self.assertEqual(parser.feed('{"vehicle_type": "bus", "cargo_items": [{"width": 0.8'), [("vehicle_type", "bus")])
+        self.assertEqual(parser.feed(', "quantity": 2}], "is_urgent"'), [("cargo_items", [{"width": 0.8, "quantity": 2}])])
+        self.assertEqual(parser.feed(': true}'), [("is_urgent", True)])
+        self.assertTrue(parser.done)
+
+    def test_strings_with_delimiters_and_code_fence(self):
+        payload = {"pickup_date": "jutro, rano {8:00}", "note": "cudzysłów \" i przecinek,", "delivery_postal_code": None}
+        text = "```json\n" + json.dumps(payload, ensure_ascii=False) + "\n```"
+        for chunk_size in (1, 3, 7, len(text)):
+            parser, fields = self.feed_all(text, chunk_size)
+            self.assertEqual(dict(fields), payload)
+            self.assertTrue(parser.done)
+
+
+if __name__ == '__main__':
+    unittest.main()
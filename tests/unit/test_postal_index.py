@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+from utils import postal_index
+from utils.postal_index import PostalCodeIndex, build_from_source, build_index
+
+GEONAMES_ROWS = (
+    "PL\t31-101\tKraków\tMałopolskie\t72\t\t\t\t\t50.06\t19.93\t4\n"
+    "PL\t86-302\tGrudziądz\tKujawsko-Pomorskie\t73\t\t\t\t\t53.48\t18.75\t4\n"
+)
+
+
+class TestPostalCodeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "codes.bin")
+        build_index([
+            ("31-101", 50.06, 19.93),
+            ("00-001", 52.20, 21.00),
+            ("00-001", 52.26, 21.02),
+            ("86-302", 53.48, 18.75),
+            ("D-45881", 51.5, 7.1),
+        ], self.path)
+        self.index = PostalCodeIndex(self.path)
+
+    def tearDown(self):
+        self.index = None
+        self.tmpdir.cleanup()
+
+    def test_lookup_known_codes(self):
+        self.assertEqual(len(self.index), 3)
+        lat, lon = self.index.lookup("31-101")
+        self.assertAlmostEqual(lat, 50.06, places=4)
+        self.assertAlmostEqual(lon, 19.93, places=4)
+        # Kilka wierszy dla jednego kodu jest uśrednianych
+        lat, lon = self.index.lookup("00001")
+        self.assertAlmostEqual(lat, 52.23, places=4)
+        self.assertAlmostEqual(lon, 21.01, places=4)
+
+    def test_lookup_misses(self):
+        self.assertIsNone(self.index.lookup("31-102"))
+        self.assertIsNone(self.index.lookup("Warszawa, Aleje Jerozolimskie 200"))
+        self.assertEqual(self.index.stats()["misses"], 2)
+
+    def test_missing_file_gives_empty_index(self):
+        index = PostalCodeIndex(os.path.join(self.tmpdir.name, "missing.bin"))
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.lookup("31-101"))
+
+
+    def test_builds_index_from_geonames_zip(self):
+        source = os.path.join(self.tmpdir.name, "PL.zip")
+        with zipfile.ZipFile(source, "w") as archive:
+            archive.writestr("readme.txt", "GeoNames")
+            archive.writestr("PL.txt", GEONAMES_ROWS)
+        path = os.path.join(self.tmpdir.name, "built.bin")
+
+        self.assertEqual(build_from_source(source, path), 2)
+        index = PostalCodeIndex(path)
+        self.assertEqual(len(index), 2)
+        self.assertAlmostEqual(index.lookup("86-302")[0], 53.48, places=4)
+
+    def test_missing_index_is_logged_at_startup(self):
+        source = os.path.join(self.tmpdir.name, "PL.txt")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(GEONAMES_ROWS)
+        path = os.path.join(self.tmpdir.name, "missing.bin")
+        # Nawet ze źródłem w konfiguracji aplikacja nie buduje (ani nie pobiera) indeksu
+        with patch.object(postal_index.settings, "POSTAL_INDEX_PATH", path), \
+                patch.object(postal_index.settings, "POSTAL_INDEX_SOURCE", source), \
+                patch.object(postal_index, "build_from_source") as build, \
+                patch.object(postal_index, "_index", None):
+            with self.assertLogs("utils.postal_index", "WARNING") as logs:
+                self.assertEqual(len(postal_index.get_postal_index()), 0)
+        build.assert_not_called()
+        self.assertFalse(os.path.exists(path))
+        self.assertIn("missing.bin", logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+from utils.cache import SQLiteCache
+from utils.road_factors import (
+    DEFAULT_ROAD_FACTORS, RegionLocator, cached_routes, calibrate, load_road_factors, write_road_factors
+)
+
+# Centroidy kodów: region 0 wokół Warszawy, region 3 wokół Krakowa
+CENTROIDS = [(1001, 52.23, 21.01), (5800, 52.10, 21.20), (31101, 50.06, 19.94), (35001, 50.04, 22.00)]
+
+
+class TestRoadFactors(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.locate = RegionLocator(CENTROIDS)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_locator_uses_nearest_populated_cell(self):
+        self.assertEqual(self.locate(52.23, 21.01), "0")
+        self.assertEqual(self.locate(50.25, 20.10), "3")
+        self.assertIsNone(self.locate(40.0, 0.0))
+
+    def test_calibrate_takes_median_ratio_per_region(self):
+        # Warszawa - Kraków: ~252 km po łuku
+        routes = [(52.23, 21.01, 50.06, 19.94, km) for km in (290.0, 300.0, 330.0)]
+        # Krótka trasa (zaszumiony stosunek) jest pomijana
+        routes.append((52.23, 21.01, 52.10, 21.20, 90.0))
+        factors, samples = calibrate(routes, self.locate, min_samples=3)
+        self.assertEqual(samples, {"0": 3, "3": 3})
+        self.assertAlmostEqual(factors["0"], 300.0 / 252.0, places=2)
+        self.assertEqual(factors["0"], factors["3"])
+        self.assertEqual(factors["5"], DEFAULT_ROAD_FACTORS["5"])
+
+        factors, _ = calibrate(routes, self.locate, min_samples=4)
+        self.assertEqual(factors, DEFAULT_ROAD_FACTORS)
+
+    def test_routes_are_read_from_the_route_cache(self):
+        db_path = os.path.join(self.tmpdir.name, "route_cache.sqlite")
+        cache = SQLiteCache(db_path, namespace="route")
+        cache.set("50.0600,19.9400;52.2300,21.0100", 293.0)
+        cache.close()
+        self.assertEqual(list(cached_routes(db_path)), [(50.06, 19.94, 52.23, 21.01, 293.0)])
+
+    def test_load_merges_file_over_defaults(self):
+        path = os.path.join(self.tmpdir.name, "road_factors.json")
+        self.assertEqual(load_road_factors(path), DEFAULT_ROAD_FACTORS)
+
+        write_road_factors(path, {"3": 1.4}, {"3": 120})
+        factors = load_road_factors(path)
+        self.assertEqual(factors["3"], 1.4)
+        self.assertEqual(factors["0"], DEFAULT_ROAD_FACTORS["0"])
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"factors": "?"}, f)
+        with self.assertLogs("utils.road_factors", "WARNING"):
+            self.assertEqual(load_road_factors(path), DEFAULT_ROAD_FACTORS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+import pytest
+
+from utils import distance_tool
+
+
+@pytest.mark.usefixtures("fake_http")
+class TestRouteCache(unittest.TestCase):
+
+    def test_popular_lane_is_served_from_cache(self):
+        self.http.route = {"routes": [{"distance": 293000}]}
+        first = distance_tool.get_osrm_distance(52.2297, 21.0122, 50.0647, 19.9450)
+        again = distance_tool.get_osrm_distance(52.22971, 21.01221, 50.06469, 19.94501)
+        reverse = distance_tool.get_osrm_distance(50.0647, 19.9450, 52.2297, 21.0122)
+        self.assertEqual(first, 293.0)
+        self.assertEqual(again, 293.0)
+        self.assertEqual(reverse, 293.0)
+        self.assertEqual(self.http.calls(), 1)
+        self.assertEqual(distance_tool.route_cache.stats()["hits"], 2)
+
+    def test_failed_route_is_not_cached(self):
+        self.http.route = {"code": "NoRoute", "routes": []}
+        self.assertEqual(distance_tool.get_osrm_distance(52.0, 21.0, 50.0, 19.0), -1.0)
+        self.http.route = {"routes": [{"distance": 1500}]}
+        self.assertEqual(distance_tool.get_osrm_distance(52.0, 21.0, 50.0, 19.0), 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+Batch exporter.
+Bounded in-process queue drained by a background thread. Producers only enqueue
+(never block on the network); the exporter hands batches to an export callable
+when batch_size events are waiting or flush_interval has passed, and flushes
+whatever is left on shutdown. Under backpressure events are sampled once the
+queue passes the high watermark and dropped once it is full.
+"""
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Flush:
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class BatchExporter:
+    def __init__(
+        self,
+        export: Callable[[List[Any]], None],
+        name: str = "exporter",
+        max_queue: int = 1000,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        high_watermark: float = 0.8,
+        sample_rate: float = 0.1
+    ):
+        """
+        Args:
+            export: Called from the exporter thread with a list of events
+            high_watermark: Queue fill ratio above which events are sampled
+            sample_rate: Fraction of events kept above the high watermark
+        """
+        self.export = export
+        self.name = name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.high_watermark = high_watermark
+        self.sample_rate = sample_rate
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "sampled_out": 0, "dropped": 0, "exported": 0, "failed": 0, "batches": 0}
+
+    def submit(self, event: Any) -> bool:
+        """Enqueues an event without blocking. Returns False if it was sampled out or dropped."""
+        self._ensure_started()
+
+        if self._queue.qsize() >= self.high_watermark * self.max_queue and random.random() >= self.sample_rate:
+            self._count("sampled_out")
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("submitted")
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Exports everything enqueued so far; returns False on timeout."""
+        if self._thread is None:
+            return True
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """Exports pending events and stops the thread. submit() starts it again."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def _count(self, counter: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += n
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        batch: List[Any] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._drain(batch)
+                return
+            if isinstance(item, _Flush):
+                self._export(batch)
+                batch = []
+                item.done.set()
+                continue
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _drain(self, batch: List[Any]) -> None:
+        # Przy zamykaniu eksportujemy wszystko, co zostało w kolejce
+        markers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _Flush):
+                markers.append(item)
+            elif item is not _STOP:
+                batch.append(item)
+        for start in range(0, len(batch), self.batch_size):
+            self._export(batch[start:start + self.batch_size])
+        for marker in markers:
+            marker.done.set()
+
+    def _export(self, batch: List[Any]) -> None:
+        if not batch:
+            return
+        try:
+            self.export(batch)
+            self._count("exported", len(batch))
+        except Exception as e:
+            self._count("failed", len(batch))
+            logger.warning("[%s] Błąd eksportu %d zdarzeń: %s", self.name, len(batch), e)
+        self._count("batches")
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from utils.lazy import lazy_import
+
+# sqlite3 ładowany dopiero przy otwarciu pierwszego cache na dysku
+sqlite3 = lazy_import("sqlite3")
+
+# Znacznik braku wpisu - pozwala odróżnić brak wpisu od zapisanego None
+MISSING = object()
+
+_registry: Dict[str, "TieredCache"] = {}
+
+
+class TTLCache:
+    """
+    Ograniczony cache LRU w pamięci z czasem życia wpisów (TTL).
+    Opcjonalnie ograniczony także rozmiarem: przy max_bytes rozmiar wpisu
+    liczy size_of (domyślnie len - np. dla wartości zapisanych jako JSON).
+    Bezpieczny wątkowo.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        size_of: Callable[[Any], int] = len
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.bytes = 0
+        self._data: "OrderedDict[str, tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._pop(key)
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else None
+        size = self.size_of(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Wpis większy niż cały limit - nie zapisujemy, żeby nie wypychać reszty
+            with self._lock:
+                self._pop(key)
+            return
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self._pop(next(iter(self._data)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    Trwały cache na dysku (SQLite). Wartości zapisywane są jako JSON.
+    """
+
+    def __init__(self, path: str, namespace: str):
+        self.path = path
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL, PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (namespace, time.time())
+            )
+
+    def get(self, key: str) -> tuple[Any, Optional[float]]:
+        """Zwraca (wartość, pozostały TTL) albo (MISSING, None)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        if row is None:
+            return MISSING, None
+
+        value, expires_at = row
+        if expires_at is None:
+            return json.loads(value), None
+
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            self.delete(key)
+            return MISSING, None
+        return json.loads(value), remaining
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, payload, expires_at)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    Cache dwupoziomowy: LRU w pamięci + opcjonalny zapis do SQLite (write-through).
+    Zlicza trafienia i chybienia, dostępne przez cache_stats().
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        db_path: Optional[str] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+        self.disk = SQLiteCache(db_path, namespace=name) if db_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        _registry[name] = self
+
+    def get(self, key: str) -> Any:
+        value = self.memory.get(key)
+        if value is MISSING and self.disk is not None:
+            value = self._from_disk(key, *self.disk.get(key))
+        return self._count(value)
+
+    async def aget(self, key: str) -> Any:
+        """
+        Jak get(), ale odczyt z SQLite wykonywany jest w wątku roboczym,
+        żeby nie blokować pętli zdarzeń. Poziom pamięci sprawdzany jest od razu.
+        """
+        value = self.memory.get(key)
+        if value is MISSING and self.disk is not None:
+            value = self._from_disk(key, *await asyncio.to_thread(self.disk.get, key))
+        return self._count(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.memory.set(key, value, ttl_seconds=ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl_seconds=ttl)
+
+    async def aset(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Jak set(), ale zapis do SQLite wykonywany jest w wątku roboczym."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.memory.set(key, value, ttl_seconds=ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, ttl)
+
+    def _from_disk(self, key: str, value: Any, remaining: Optional[float]) -> Any:
+        if value is not MISSING:
+            self.memory.set(key, value, ttl_seconds=remaining)
+            self.disk_hits += 1
+        return value
+
+    def _count(self, value: Any) -> Any:
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.memory),
+            "max_entries": self.memory.max_entries
+        }
+        if self.memory.max_bytes is not None:
+            stats.update(bytes=self.memory.bytes, max_bytes=self.memory.max_bytes)
+        return stats
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Statystyki wszystkich zarejestrowanych cache'y."""
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+def clear_caches() -> None:
+    """Czyści wszystkie zarejestrowane cache'e (np. w testach)."""
+    for cache in _registry.values():
+        cache.clear()
@@ -1,56 +1,105 @@
-from typing import List, Dict
-from math import floor
+import hashlib
+import json
+import time
+from typing import List, Dict, Optional, Tuple
 from enum import Enum
 
+import numpy as np
+
+from config import settings
+from utils import ldm_engine, load_planner
+from utils.cache import TieredCache, MISSING
+from utils.cargo_model import CargoInput, CargoRecord, as_records
+from utils.fleet import VehicleClass, get_fleet
+from utils.metrics import timed
+
+# Wyniki analiz ładunku per kanoniczny manifest (bez TTL - wynik zależy tylko od danych).
+# Wpisy to JSON: trafienie to json.loads zamiast deepcopy, a limit bajtów liczy długość tekstu
+cargo_cache = TieredCache(
+    "cargo",
+    max_entries=settings.CARGO_CACHE_MAX_ENTRIES,
+    max_bytes=settings.CARGO_CACHE_MAX_BYTES
+)
+
+# Zaokrąglenie wymiarów w manifeście kanonicznym: 3 miejsca w metrach = 1 mm
+MANIFEST_PRECISION = 3
+
 class VehicleType(Enum):
     BUS = "bus"
     SOLO = "solówka"
     NACZEPA = "naczepa"
 
-VEHICLES = {
-    VehicleType.BUS: {
-        "length_cm": 450,
-        "width_cm": 240,
-        "height_cm": 260,
-        "max_ldm": 4.4,
-        "max_weight": 1500
-    },
-    VehicleType.SOLO: {
-        "length_cm": 730,
-        "width_cm": 240,
-        "height_cm": 260,
-        "max_ldm": 7.7,
-        "max_weight": 9000
-    },
-    VehicleType.NACZEPA: {
-        "length_cm": 1360,
-        "width_cm": 240,
-        "height_cm": 260,
-        "max_ldm": 13.6,
-        "max_weight": 24000
-    }
-}
+# Flota z konfiguracji (FLEET_CONFIG_PATH) - tabele pojemności liczone raz przy starcie
+FLEET = get_fleet()
+
+# Widok podstawowych pojazdów w dotychczasowym formacie
+VEHICLES = {vt: FLEET.get(vt.value).spec for vt in VehicleType if vt.value in FLEET}
+
+
+def vehicle_key(vehicle_type: str | VehicleType | None) -> Optional[str]:
+    return vehicle_type.value if isinstance(vehicle_type, VehicleType) else vehicle_type
+
+
+def vehicle_label(key: str) -> str | VehicleType:
+    # Podstawowe pojazdy w komunikatach jak dotąd (VehicleType), pozostałe po kluczu
+    try:
+        return VehicleType(key)
+    except ValueError:
+        return key
+
+
+def canonical_order(cargo_items: List[CargoInput]) -> List[int]:
+    """Indeksy cargo_items w kolejności manifestu kanonicznego."""
+    rows = [_canonical_item(record) for record in as_records(cargo_items)]
+    return sorted(range(len(rows)), key=rows.__getitem__)
+
+
+def canonical_manifest(
+    cargo_items: List[CargoInput],
+    vehicle_type: str | VehicleType | None = None,
+    is_stackable: bool = False
+) -> Tuple:
+    """
+    Postać kanoniczna (hashowalna) manifestu: posortowane, zaokrąglone pozycje
+    (length, width, height, quantity, weight) oraz typ pojazdu i piętrowanie.
+    Manifesty różniące się kolejnością pozycji lub szumem w wymiarach dają ten sam klucz.
+    """
+    vehicle_type = vehicle_key(vehicle_type)
+    items = tuple(sorted(_canonical_item(record) for record in as_records(cargo_items)))
+    return (vehicle_type, bool(is_stackable), items)
+
+
+def manifest_items(manifest: Tuple) -> List[CargoRecord]:
+    """Pozycje manifestu kanonicznego jako rekordy ładunku."""
+    return [CargoRecord(*item) for item in manifest[2]]
+
+
+def manifest_key(manifest: Tuple, *extra) -> str:
+    # Skrót zamiast pełnego JSON - klucz dużego manifestu nie zajmuje pamięci cache
+    payload = json.dumps([manifest, *extra], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _canonical_item(record: CargoRecord) -> Tuple:
+    return (
+        round(record.length or 0, MANIFEST_PRECISION),
+        round(record.width or 0, MANIFEST_PRECISION),
+        round(record.height or 0, MANIFEST_PRECISION),
+        int(record.quantity or 0),
+        round(record.weight or 0, 2),
+    )
+
 
 def get_max_ldm(vehicle_type: str | VehicleType) -> float:
-    if isinstance(vehicle_type, str):
-        try:
-            vehicle_type = VehicleType(vehicle_type)
-        except ValueError:
-            vehicle_type = VehicleType.NACZEPA
-    if vehicle_type not in VEHICLES:
-        return VEHICLES[VehicleType.NACZEPA]["max_ldm"]
-    return VEHICLES[vehicle_type]["max_ldm"]
+    return FLEET.resolve(vehicle_key(vehicle_type)).max_ldm
 
 
 class CargoCalculator:
     def __init__(self, vehicle_type: str | VehicleType = VehicleType.NACZEPA):
-        if isinstance(vehicle_type, str):
-            try:
-                vehicle_type = VehicleType(vehicle_type)
-            except ValueError:
-                vehicle_type = VehicleType.NACZEPA
-        self.vehicle_type = vehicle_type if vehicle_type in VEHICLES else VehicleType.NACZEPA
-        self.vehicle = VEHICLES[self.vehicle_type]
+        # Nieznany typ pojazdu - domyślny pojazd floty (naczepa)
+        self.vehicle_class = FLEET.resolve(vehicle_key(vehicle_type))
+        self.vehicle_type = vehicle_label(self.vehicle_class.key)
+        self.vehicle = self.vehicle_class.spec
 
     def check_ldm(self, ldm):
         #spr czy dla danego typu nie przekracza ldm
@@ -61,84 +110,150 @@ class CargoCalculator:
 
     def get_max_ldm(self) -> float:
         return self.vehicle["max_ldm"]
+
+    def missing_cargo_result(self) -> Dict:
+        """Wynik, gdy brak danych o ładunku - maksymalny LDM pojazdu."""
+        return _missing_cargo_result(self.vehicle_class)
     
-    def calculateLDM(self, cargo_items: List[Dict]) -> Dict:
-       
+    @timed("cargo.calculate_ldm")
+    def calculateLDM(self, cargo_items: List[CargoInput]) -> Dict:
+        # Obliczenia wektorowe (utils/ldm_engine.py) - te same wyniki co pętla per ładunek
+        cargo = ldm_engine.CargoArrays.from_items(cargo_items)
+        evaluation = ldm_engine.LDMEvaluation(cargo, self.vehicle_class.arrays)
+        return _build_result(evaluation, 0, self.vehicle_class)
 
-        total_ldm = 0.0
-        total_weight = 0
-        warnings = []
-        fit_in_vehicle = True
+    def plan_load(
+        self,
+        cargo_items: List[CargoInput],
+        is_stackable: bool = False,
+        time_budget: Optional[float] = None,
+        max_placements: Optional[int] = None
+    ) -> Optional[load_planner.LoadPlan]:
+        """Plan rozmieszczenia ładunku na podłodze pojazdu (z piętrowaniem, jeśli dozwolone)."""
+        return load_planner.plan_load(cargo_items, self.vehicle, is_stackable, time_budget, max_placements)
 
-        for item in cargo_items:
-            l = item["length"] * 100
-            w = item["width"] * 100
-            h = item["height"] * 100
-            qty = item["quantity"]
-            weight_per_piece = item.get("weight", 0)
+    @staticmethod
+    @timed("cargo.evaluate_fleet")
+    def evaluate_fleet(
+        cargo_items: List[CargoInput],
+        is_stackable: bool = False,
+        plan_load: bool = False,
+        time_budget: Optional[float] = None,
+        max_placements: Optional[int] = None
+    ) -> "FleetEvaluation":
+        """Ocenia ładunek dla wszystkich pojazdów floty w jednym przebiegu."""
+        return FleetEvaluation(cargo_items, is_stackable, plan_load, time_budget, max_placements)
 
-            if h > self.vehicle["height_cm"]:
-                warnings.append(f"Ładunek o wysokości {h} cm przekracza wysokość pojazdu ({self.vehicle['height_cm']} cm).")
-                fit_in_vehicle = False
+    @staticmethod
+    def suggest_optimal_vehicle(cargo_items: List[CargoInput]) -> Dict:
+        if not settings.CARGO_CACHE_ENABLED:
+            return CargoCalculator.evaluate_fleet(cargo_items).suggest()
 
-            orientations = [(l, w), (w, l)]
-            best_ldm = None
+        manifest = canonical_manifest(cargo_items)
+        key = manifest_key(manifest, "suggest")
+        cached = cargo_cache.get(key)
+        if cached is not MISSING:
+            return json.loads(cached)
+        # Manifest kanoniczny to tylko klucz - liczymy na rzeczywistych wymiarach
+        suggestion = CargoCalculator.evaluate_fleet(cargo_items).suggest()
+        cargo_cache.set(key, json.dumps(suggestion, ensure_ascii=False))
+        return suggestion
 
-            for orient_l, orient_w in orientations:
-                pieces_per_row = floor(self.vehicle["width_cm"] / orient_w)
-                if pieces_per_row == 0:
-                    continue
 
-                full_rows = qty // pieces_per_row
-                leftover = qty % pieces_per_row
+class FleetEvaluation:
+    """
+    Wynik oceny ładunku dla całej floty. Obrysy ładunków liczone są raz,
+    werdykty (LDM, waga, zmieszczenie) dla każdego pojazdu są od razu dostępne,
+    a ostrzeżenia formatowane są dopiero dla pojazdu, o który pytamy.
 
-                ldm_cm = (full_rows * orient_l) + (orient_l if leftover else 0)
-                ldm_m = ldm_cm / 100
+    Z plan_load=True LDM pochodzi z planera załadunku (utils/load_planner.py),
+    który łączy rzędy różnych ładunków i piętruje - plan liczony jest raz
+    dla każdego rozmiaru przestrzeni ładunkowej, a time_budget obejmuje
+    wszystkie plany razem. Pojazdy bez planu (budżet wyczerpany) zachowują
+    LDM z calculateLDM.
+    """
 
-                if best_ldm is None or ldm_m < best_ldm:
-                    best_ldm = ldm_m
+    def __init__(
+        self,
+        cargo_items: List[CargoInput],
+        is_stackable: bool = False,
+        plan_load: bool = False,
+        time_budget: Optional[float] = None,
+        max_placements: Optional[int] = None
+    ):
+        records = as_records(cargo_items)
+        self.evaluation = ldm_engine.LDMEvaluation(ldm_engine.CargoArrays.from_items(records), FLEET.arrays)
+        self.plans: List[Optional[load_planner.LoadPlan]] = [None] * len(FLEET)
 
-            if best_ldm is None:
-                warnings.append("Ładunek jest zbyt szeroki, by zmieścić się w pojeździe.")
-                fit_in_vehicle = False
-                continue
+        if plan_load:
+            deadline = time.perf_counter() + time_budget if time_budget is not None else None
+            for indices in FLEET.spaces.values():
+                # Kolejne przestrzenie ładunkowe dostają tylko to, co zostało z budżetu
+                budget = max(0.0, deadline - time.perf_counter()) if deadline is not None else None
+                with timed("cargo.load_plan"):
+                    plan = load_planner.plan_load(
+                        records, FLEET.vehicles[indices[0]].spec, is_stackable, budget, max_placements
+                    )
+                for i in indices:
+                    self.plans[i] = plan
 
-            total_ldm += best_ldm
-            total_weight += weight_per_piece * qty
+            planned = np.array([plan.length_cm / 100 if plan is not None else np.inf for plan in self.plans])
+            self.evaluation.total_ldm = np.minimum(self.evaluation.total_ldm, planned)
 
-        if total_ldm > self.vehicle["max_ldm"]:
-            warnings.append(f"Łączna długość LDM ({round(total_ldm, 2)}) przekracza maksymalną dla {self.vehicle_type} ({self.vehicle['max_ldm']}).")
-            fit_in_vehicle = False
+    def _index(self, vehicle_type: str | VehicleType) -> int:
+        return FLEET.index[FLEET.resolve(vehicle_key(vehicle_type)).key]
 
-        if total_weight > self.vehicle["max_weight"]:
-            warnings.append(f"Łączna waga ładunku ({total_weight} kg) przekracza maksymalną dla {self.vehicle_type} ({self.vehicle['max_weight']} kg).")
-            fit_in_vehicle = False
+    def load_plan(self, vehicle_type: str | VehicleType) -> Optional[load_planner.LoadPlan]:
+        return self.plans[self._index(vehicle_type)]
 
-        if 0 < total_ldm < (0.8 * self.vehicle["max_ldm"]):
-            warnings.append("Zajmujesz mniej niż 80% przestrzeni pojazdu – rozważ wybór opcji 'dowolny typ pojazdu'.")
+    def ldm(self, vehicle_type: str | VehicleType) -> float:
+        return round(float(self.evaluation.total_ldm[self._index(vehicle_type)]), 2)
 
-        total_ldm = round(total_ldm, 2)
+    def fits(self, vehicle_type: str | VehicleType) -> bool:
+        return self.evaluation.fit_in_vehicle(self._index(vehicle_type))
 
-        return {
-            "ldm": total_ldm,
-            "fit_in_vehicle": fit_in_vehicle,
-            "warnings": warnings,
-            "total_weight": total_weight,
-            "vehicle_used": self.vehicle_type.value,
-            "vehicle_suggestion": self.vehicle_type.value if fit_in_vehicle else VehicleType.NACZEPA.value
-        }
+    def result(self, vehicle_type: str | VehicleType) -> Dict:
+        """Pełny wynik jak z calculateLDM dla danego pojazdu."""
+        index = self._index(vehicle_type)
+        return _build_result(self.evaluation, index, FLEET.vehicles[index])
 
-    @staticmethod
-    def suggest_optimal_vehicle(cargo_items: List[Dict]) -> Dict:
-        candidates = []
-        for vehicle_type in [VehicleType.BUS, VehicleType.SOLO, VehicleType.NACZEPA]:
-            calc = CargoCalculator(vehicle_type)
-            result = calc.calculateLDM(cargo_items)
-            if result["fit_in_vehicle"]:
-                candidates.append((vehicle_type, result["ldm"]))
+    def suggest(self) -> Dict:
+        candidates = [
+            (vehicle.key, round(float(self.evaluation.total_ldm[i]), 2))
+            for i, vehicle in enumerate(FLEET.vehicles) if self.evaluation.fit_in_vehicle(i)
+        ]
 
         if not candidates:
             return {"vehicle": "brak", "reason": "Żaden pojazd nie mieści ładunku"}
 
         best = min(candidates, key=lambda x: x[1])
-        return {"vehicle": best[0].value}
+        return {"vehicle": best[0]}
+
+
+def _missing_cargo_result(vehicle: VehicleClass) -> Dict:
+    return {
+        "ldm": vehicle.max_ldm,
+        "max_ldm": vehicle.max_ldm,
+        "fit_in_vehicle": True,
+        "warnings": ["Brak danych o ładunku. Zwracamy maksymalny LDM dla podanego pojazdu."],
+        "vehicle_used": vehicle.key,
+        "vehicle_suggestion": "brak",
+        "total_weight": 0,
+    }
+
+
+def _build_result(evaluation: ldm_engine.LDMEvaluation, index: int, vehicle: VehicleClass) -> Dict:
+    if len(evaluation.cargo) == 0:
+        return _missing_cargo_result(vehicle)
+
+    fit_in_vehicle = evaluation.fit_in_vehicle(index)
+
+    return {
+        "ldm": round(float(evaluation.total_ldm[index]), 2),
+        "max_ldm": vehicle.max_ldm,
+        "fit_in_vehicle": fit_in_vehicle,
+        "warnings": evaluation.warnings(index, vehicle_label(vehicle.key), vehicle.spec),
+        "total_weight": evaluation.total_weight[index],
+        "vehicle_used": vehicle.key,
+        "vehicle_suggestion": vehicle.key if fit_in_vehicle else FLEET.default.key
+    }
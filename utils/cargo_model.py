@@ -0,0 +1,88 @@
+"""
+Cargo model.
+Compact internal representation of cargo items shared by the calculator, the load
+planner, validation and the response serializer. Records are built once from the
+LLM output (numeric fields sanitized on the way in) and serialized back to plain
+dicts only when the response is assembled.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+CARGO_FIELDS = ("length", "width", "height", "quantity", "weight")
+
+
+class CargoRecord:
+    """
+    One cargo line: dimensions in metres, weight of one piece in kg. `pallet` names
+    the standard pallet the line was snapped to (utils/pallets.py), if any.
+    """
+
+    __slots__ = CARGO_FIELDS + ("pallet",)
+
+    def __init__(
+        self,
+        length: Optional[float] = None,
+        width: Optional[float] = None,
+        height: Optional[float] = None,
+        quantity: Optional[int] = None,
+        weight: Optional[float] = None,
+        pallet: Optional[str] = None
+    ):
+        self.length = length
+        self.width = width
+        self.height = height
+        self.quantity = quantity
+        self.weight = weight
+        self.pallet = pallet
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any], unit: str = "m") -> "CargoRecord":
+        """
+        Builds a record from an LLM/API dict. Fields present with a non-numeric
+        value become 0, missing fields stay None. unit="cm" converts dimensions
+        given in centimetres; "count" is accepted as an alias of "quantity".
+        """
+        values = {}
+        for key in CARGO_FIELDS:
+            source = "count" if key == "quantity" and "quantity" not in raw and "count" in raw else key
+            if source not in raw:
+                values[key] = None
+                continue
+            value = raw[source]
+            values[key] = value if isinstance(value, (int, float)) else 0
+
+        if unit == "cm":
+            for key in ("length", "width", "height"):
+                if values[key] is not None:
+                    values[key] = values[key] / 100
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {key: getattr(self, key) for key in CARGO_FIELDS}
+        data["pallet_type"] = self.pallet
+        return data
+
+    def has_dimensions(self) -> bool:
+        """Whether width and height are known (otherwise the max LDM fallback applies)."""
+        return bool(self.width) and bool(self.height)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CargoRecord):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"CargoRecord({fields})"
+
+
+CargoInput = Union[CargoRecord, Dict[str, Any]]
+
+
+def as_records(items: Iterable[CargoInput], unit: str = "m") -> List[CargoRecord]:
+    """Converts dicts to records; records are passed through unchanged."""
+    return [item if isinstance(item, CargoRecord) else CargoRecord.from_dict(item, unit) for item in items]
+
+
+def serialize_cargo(records: Sequence[CargoRecord]) -> List[Dict[str, Any]]:
+    """Response form of cargo_items (validated by Pydantic at the API boundary)."""
+    return [record.to_dict() for record in records]
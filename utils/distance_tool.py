@@ -1,4 +1,65 @@
-import requests
+import asyncio
+import re
+import threading
+import time
+
+from config import settings
+from utils.cache import TieredCache, MISSING
+from utils.lazy import lazy_import
+from utils.metrics import record_upstream_error, timed
+from utils.postal_index import get_postal_index
+from utils.road_factors import haversine_km, load_road_factors
+
+# requests ładowany przy pierwszym zapytaniu do Nominatim/OSRM (szybszy start)
+requests = lazy_import("requests")
+
+geocode_cache = TieredCache(
+    "geocode",
+    max_entries=settings.GEOCODE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.GEOCODE_CACHE_TTL_SECONDS,
+    db_path=settings.GEOCODE_CACHE_DB_PATH or None
+)
+
+route_cache = TieredCache(
+    "route",
+    max_entries=settings.ROUTE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ROUTE_CACHE_TTL_SECONDS,
+    db_path=settings.ROUTE_CACHE_DB_PATH or None
+)
+
+# Współczynniki krętości sieci drogowej per region pocztowy (zob. utils/road_factors.py)
+ROAD_FACTORS = load_road_factors(settings.ROAD_FACTORS_PATH)
+
+
+class RateLimiter:
+    """
+    Spaces calls at least min_interval seconds apart across all threads of the
+    process. Each caller reserves the next free slot under the lock and sleeps
+    outside it, so waiting callers go out in arrival order.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Wspólny dla wszystkich zapytań do Nominatim (wyszukiwanie i reverse), także z /parse/batch
+nominatim_limiter = RateLimiter(settings.NOMINATIM_MIN_INTERVAL_SECONDS)
+
+
+def _geocode_key(address: str) -> str:
+    return "search:" + " ".join(address.lower().split())
 
 
 def get_postal_code_from_city(city: str) -> str:
@@ -10,22 +71,60 @@ def get_postal_code_from_city(city: str) -> str:
     if lat is None or lon is None:
         return ""
 
+    cache_key = f"reverse:{lat:.5f},{lon:.5f}"
+    cached = geocode_cache.get(cache_key)
+    if cached is not MISSING:
+        return cached
+
     # 🔹 Pobieranie kodu pocztowego na podstawie współrzędnych
     url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json"
     headers = {"User-Agent": "TransportAgent/1.0"}
     
     try:
-        response = requests.get(url, headers=headers)
-        data = response.json()
-
-        if "address" in data and "postcode" in data["address"]:
-            return data["address"]["postcode"]
+        nominatim_limiter.wait()
+        with timed("geocode.reverse"):
+            response = requests.get(url, headers=headers)
+            data = response.json()
     except:
-        pass
+        record_upstream_error("nominatim")
+        return ""
+
+    if "address" in data and "postcode" in data["address"]:
+        postcode = data["address"]["postcode"]
+        geocode_cache.set(cache_key, postcode)
+        return postcode
 
+    geocode_cache.set(cache_key, "", ttl_seconds=settings.GEOCODE_NEGATIVE_TTL_SECONDS)
     return ""
 
 def geocode_address(address: str) -> tuple[float, float]:
+    """
+    Zwraca (latitude, longitude) dla podanego adresu/miasta.
+    Polskie kody pocztowe rozwiązywane są z lokalnego indeksu, pozostałe adresy
+    przez cache, a Nominatim odpytywany jest tylko przy chybieniu.
+    """
+    coords = get_postal_index().lookup(address)
+    if coords is not None:
+        return coords
+
+    cache_key = _geocode_key(address)
+    cached = geocode_cache.get(cache_key)
+    if cached is not MISSING:
+        return tuple(cached) if cached else (None, None)
+
+    # Czekanie na limit poza pomiarem geocode.nominatim
+    nominatim_limiter.wait()
+    coords = _nominatim_search(address)
+    if coords[0] is None:
+        # Cache negatywny - adres się nie rozwiązuje, nie pytamy ponownie przez krótszy czas
+        geocode_cache.set(cache_key, None, ttl_seconds=settings.GEOCODE_NEGATIVE_TTL_SECONDS)
+    else:
+        geocode_cache.set(cache_key, list(coords))
+    return coords
+
+
+@timed("geocode.nominatim")
+def _nominatim_search(address: str) -> tuple[float, float]:
     """
     Zwraca (latitude, longitude) dla podanego adresu/miasta
     korzystając z Nominatim (OpenStreetMap).
@@ -39,8 +138,12 @@ def geocode_address(address: str) -> tuple[float, float]:
     headers = {
         "User-Agent": "MojaAplikacja/1.0 (kontakt@twojadomena.pl)"
     }
-    response = requests.get(url, params=params, headers=headers)
-    data = response.json()
+    try:
+        response = requests.get(url, params=params, headers=headers)
+        data = response.json()
+    except Exception:
+        record_upstream_error("nominatim")
+        raise
 
     if not data:
         return (None, None)
@@ -53,7 +156,38 @@ def geocode_address(address: str) -> tuple[float, float]:
         return (None, None)
 
 
+def _route_key(lat1: float, lon1: float, lat2: float, lon2: float) -> str:
+    """
+    Klucz cache trasy z zaokrąglonych współrzędnych. Przy ROUTE_CACHE_SYMMETRIC
+    para jest porządkowana, więc A->B i B->A dzielą jeden wpis.
+    """
+    precision = settings.ROUTE_CACHE_PRECISION
+    a = f"{lat1:.{precision}f},{lon1:.{precision}f}"
+    b = f"{lat2:.{precision}f},{lon2:.{precision}f}"
+    if settings.ROUTE_CACHE_SYMMETRIC and b < a:
+        a, b = b, a
+    return f"{a};{b}"
+
+
 def get_osrm_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Zwraca dystans drogowy (w km) między dwoma punktami.
+    Popularne relacje obsługuje cache, publiczny OSRM odpytywany jest tylko przy chybieniu.
+    """
+    cache_key = _route_key(lat1, lon1, lat2, lon2)
+    cached = route_cache.get(cache_key)
+    if cached is not MISSING:
+        return cached
+
+    dist_km = _osrm_route(lat1, lon1, lat2, lon2)
+    # Błędów OSRM nie zapamiętujemy - kolejne zapytanie spróbuje ponownie
+    if dist_km >= 0:
+        route_cache.set(cache_key, dist_km)
+    return dist_km
+
+
+@timed("osrm.route")
+def _osrm_route(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Korzysta z publicznego OSRM do obliczenia dystansu (w km)
     między dwoma punktami.
@@ -77,6 +211,7 @@ def get_osrm_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> flo
         dist_km = dist_meters / 1000.0
         return dist_km
     except:
+        record_upstream_error("osrm")
         return -1.0
 
 
@@ -95,6 +230,147 @@ def get_distance_osm(origin: str, destination: str) -> float:
     return dist_km
 
 
+def road_factor(origin: str, destination: str) -> float:
+    """Średni współczynnik drogowy dla regionów pocztowych obu końców trasy."""
+    factors = []
+    for code in (origin, destination):
+        match = re.match(r"^\s*(\d)\d-?\d{3}\s*$", code)
+        factors.append(ROAD_FACTORS.get(match.group(1), settings.ROAD_FACTOR_DEFAULT) if match else settings.ROAD_FACTOR_DEFAULT)
+    return sum(factors) / len(factors)
+
+
+def estimate_distance(origin: str, destination: str) -> float:
+    """
+    Szybki szacunek dystansu drogowego (w km): odległość po łuku
+    pomnożona przez współczynnik drogowy regionu. Bez zapytania do OSRM.
+    """
+    lat1, lon1 = geocode_address(origin)
+    lat2, lon2 = geocode_address(destination)
+
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return -1.0
+
+    return haversine_km(lat1, lon1, lat2, lon2) * road_factor(origin, destination)
+
+
+def get_cached_distance(origin: str, destination: str) -> float | None:
+    """Zwraca dokładny dystans OSRM, jeśli jest już w cache, w przeciwnym razie None."""
+    lat1, lon1 = geocode_address(origin)
+    lat2, lon2 = geocode_address(destination)
+
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+
+    cached = route_cache.get(_route_key(lat1, lon1, lat2, lon2))
+    return None if cached is MISSING else cached
+
+
+def get_distance(origin: str, destination: str, mode: str = "exact") -> tuple[float, bool]:
+    """
+    Zwraca (dystans_km, czy_szacunek).
+    W trybie "estimate" dokładny dystans brany jest tylko z cache, w przeciwnym razie
+    zwracany jest szacunek. W trybie "exact" szacunek jest używany tylko, gdy OSRM zawiedzie.
+    """
+    if mode == "estimate":
+        cached = get_cached_distance(origin, destination)
+        if cached is not None:
+            return cached, False
+    else:
+        dist_km = get_distance_osm(origin, destination)
+        if dist_km >= 0:
+            return dist_km, False
+
+    estimate = estimate_distance(origin, destination)
+    return estimate, estimate >= 0
+
+
+async def aget_distance(origin: str, destination: str, mode: str = "exact") -> tuple[float, bool]:
+    """
+    Asynchroniczny odpowiednik get_distance: oba adresy geokodowane są równolegle
+    (wyniki trafiają do cache), a następnie liczona jest trasa.
+    """
+    await asyncio.gather(
+        asyncio.to_thread(geocode_address, origin),
+        asyncio.to_thread(geocode_address, destination)
+    )
+    return await asyncio.to_thread(get_distance, origin, destination, mode)
+
+
+def get_distance_matrix(origins: list[str], destinations: list[str]) -> list[list[float]]:
+    """
+    Zwraca macierz dystansów (w km) origins x destinations.
+    Każdy unikalny punkt geokodowany jest raz, relacje spoza cache liczone są
+    zapytaniami OSRM /table (z podziałem na porcje zgodnie z limitem serwera).
+    Niepoliczalne relacje mają wartość -1.0.
+    """
+    coords = {address: geocode_address(address) for address in dict.fromkeys(origins + destinations)}
+    resolved = {address: c for address, c in coords.items() if c[0] is not None and c[1] is not None}
+
+    src_points = list(dict.fromkeys(resolved[a] for a in origins if a in resolved))
+    dst_points = list(dict.fromkeys(resolved[a] for a in destinations if a in resolved))
+
+    distances: dict[tuple, float] = {}
+    missing_src, missing_dst = set(), set()
+    for src in src_points:
+        for dst in dst_points:
+            cached = route_cache.get(_route_key(*src, *dst))
+            if cached is MISSING:
+                missing_src.add(src)
+                missing_dst.add(dst)
+            else:
+                distances[(src, dst)] = cached
+
+    sources = [p for p in src_points if p in missing_src]
+    targets = [p for p in dst_points if p in missing_dst]
+    chunk = max(1, settings.OSRM_TABLE_MAX_COORDS // 2)
+    for i in range(0, len(sources), chunk):
+        for j in range(0, len(targets), chunk):
+            table = _osrm_table(sources[i:i + chunk], targets[j:j + chunk])
+            for (src, dst), dist_km in table.items():
+                if (src, dst) not in distances:
+                    distances[(src, dst)] = dist_km
+                    route_cache.set(_route_key(*src, *dst), dist_km)
+
+    return [
+        [distances.get((resolved.get(o), resolved.get(d)), -1.0) for d in destinations]
+        for o in origins
+    ]
+
+
+@timed("osrm.table")
+def _osrm_table(sources: list[tuple[float, float]], targets: list[tuple[float, float]]) -> dict[tuple, float]:
+    """
+    Jedno zapytanie OSRM /table dla podanych źródeł i celów.
+    Zwraca {(źródło, cel): dystans_km} tylko dla relacji, które udało się policzyć.
+    """
+    points = sources + targets
+    base_url = "https://router.project-osrm.org/table/v1/driving"
+    url = f"{base_url}/" + ";".join(f"{lon},{lat}" for lat, lon in points)
+    params = {
+        "sources": ";".join(str(i) for i in range(len(sources))),
+        "destinations": ";".join(str(len(sources) + i) for i in range(len(targets))),
+        "annotations": "distance"
+    }
+    headers = {
+        "User-Agent": "MojaAplikacja/1.0 (kontakt@twojadomena.pl)"
+    }
+
+    try:
+        r = requests.get(url, params=params, headers=headers)
+        data = r.json()
+        rows = data["distances"]
+    except:
+        record_upstream_error("osrm")
+        return {}
+
+    result = {}
+    for src, row in zip(sources, rows):
+        for dst, dist_meters in zip(targets, row):
+            if dist_meters is not None:
+                result[(src, dst)] = dist_meters / 1000.0
+    return result
+
+
 def distance_tool(input_text: str) -> str:
     """
     Oczekuje inputu w formacie "Origin->Destination", np. "Warszawa->Kraków".
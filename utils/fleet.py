@@ -0,0 +1,175 @@
+"""
+Fleet registry.
+Vehicle classes are loaded once from FLEET_CONFIG_PATH (JSON) and every derived
+table is computed at load time: engine arrays for the vectorized LDM pass, pallet
+pieces-per-row, floor capacity and per-quantity rows/LDM per vehicle, and the
+fleet-wide dimension thresholds used by validation. The per-quote path only indexes into these tables.
+
+Config format:
+    {
+      "default": "naczepa",
+      "vehicles": [
+        {"key": "bus", "length_cm": 450, "width_cm": 240, "height_cm": 260, "max_weight": 1500},
+        {"key": "mega", "length_cm": 1360, "width_cm": 248, "height_cm": 300, "max_weight": 24000,
+         "max_ldm": 13.6, "enabled": false}
+      ]
+    }
+max_ldm defaults to length_cm / 100; entries with "enabled": false are skipped.
+"""
+import json
+from math import floor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import settings
+from utils import ldm_engine
+from utils.pallets import STANDARD_PALLETS, pallet_row
+
+# Poniżej tego progu wykorzystania LDM sugerujemy opcję 'dowolny typ pojazdu'
+UNDERUSE_RATIO = 0.8
+
+
+class VehicleClass:
+    """One vehicle class with its precomputed capacity tables."""
+
+    __slots__ = (
+        "key", "length_cm", "width_cm", "height_cm", "max_weight", "max_ldm",
+        "underuse_ldm", "pallet_rows", "pallet_table", "spec", "arrays"
+    )
+
+    def __init__(
+        self,
+        key: str,
+        length_cm: float,
+        width_cm: float,
+        height_cm: float,
+        max_weight: float,
+        max_ldm: Optional[float] = None
+    ):
+        self.key = key
+        self.length_cm = length_cm
+        self.width_cm = width_cm
+        self.height_cm = height_cm
+        self.max_weight = max_weight
+        self.max_ldm = max_ldm if max_ldm is not None else round(length_cm / 100, 2)
+        self.underuse_ldm = UNDERUSE_RATIO * self.max_ldm
+
+        # (sztuk w rzędzie, długość rzędu w cm, maks. liczba palet na podłodze) per typ palety
+        self.pallet_rows: Dict[str, Tuple[int, float, int]] = {
+            name: _pallet_row(length, width, self) for name, (length, width) in STANDARD_PALLETS.items()
+        }
+        # (sztuk w rzędzie, rzędy, LDM) per typ palety i ilość 0..PALLET_TABLE_MAX_QUANTITY
+        self.pallet_table: Dict[str, List[Tuple[int, int, float]]] = {
+            name: [pallet_row(length, width, width_cm, q) for q in range(settings.PALLET_TABLE_MAX_QUANTITY + 1)]
+            for name, (length, width) in STANDARD_PALLETS.items()
+        }
+        # Słownik w formacie, którego używa silnik LDM i komunikaty ostrzeżeń
+        self.spec = {
+            "length_cm": length_cm,
+            "width_cm": width_cm,
+            "height_cm": height_cm,
+            "max_ldm": self.max_ldm,
+            "max_weight": max_weight,
+        }
+        # Tablice silnika dla obliczeń tylko tego pojazdu (CargoCalculator.calculateLDM)
+        self.arrays = ldm_engine.FleetArrays([self.spec], pallet_quantity=settings.PALLET_TABLE_MAX_QUANTITY)
+
+    def pallet_quote(self, pallet: str, quantity: int) -> Tuple[int, int, float]:
+        """(pieces per row, rows, LDM) for quantity standard pallets."""
+        table = self.pallet_table[pallet]
+        if 0 <= quantity < len(table):
+            return table[quantity]
+        length, width = STANDARD_PALLETS[pallet]
+        return pallet_row(length, width, self.width_cm, quantity)
+
+    def __repr__(self) -> str:
+        return f"VehicleClass({self.key!r}, max_ldm={self.max_ldm}, max_weight={self.max_weight})"
+
+
+def _pallet_row(length: float, width: float, vehicle: VehicleClass) -> Tuple[int, float, int]:
+    # Orientacja z najkrótszym LDM na sztukę (tak jak wybiera ją silnik przy dużej liczbie sztuk)
+    best = (0, 0.0, 0)
+    for orient_l, orient_w in ((length, width), (width, length)):
+        per_row = floor(vehicle.width_cm / orient_w)
+        if per_row == 0:
+            continue
+        if best[0] == 0 or orient_l / per_row < best[1] / best[0]:
+            best = (per_row, orient_l, floor(vehicle.length_cm / orient_l) * per_row)
+    return best
+
+
+class Fleet:
+    """Ordered set of vehicle classes with fleet-wide precomputed tables."""
+
+    def __init__(self, vehicles: Sequence[VehicleClass], default: str):
+        if not vehicles:
+            raise ValueError("Flota musi zawierać co najmniej jeden pojazd")
+        self.vehicles: List[VehicleClass] = list(vehicles)
+        self.by_key: Dict[str, VehicleClass] = {v.key: v for v in self.vehicles}
+        if len(self.by_key) != len(self.vehicles):
+            raise ValueError("Klucze pojazdów we flocie muszą być unikalne")
+        if default not in self.by_key:
+            raise ValueError(f"Domyślny pojazd '{default}' nie należy do floty")
+        self.default = self.by_key[default]
+
+        self.index: Dict[str, int] = {v.key: i for i, v in enumerate(self.vehicles)}
+        self.arrays = ldm_engine.FleetArrays(
+            [v.spec for v in self.vehicles], pallet_quantity=settings.PALLET_TABLE_MAX_QUANTITY
+        )
+
+        # Pojazdy o tej samej przestrzeni ładunkowej dzielą jeden plan załadunku
+        self.spaces: Dict[Tuple[float, float], List[int]] = {}
+        for i, v in enumerate(self.vehicles):
+            self.spaces.setdefault((v.width_cm, v.height_cm), []).append(i)
+
+        # Progi gabarytów dla walidacji - największy pojazd w danym wymiarze
+        self.max_length_cm = max(v.length_cm for v in self.vehicles)
+        self.max_width_cm = max(v.width_cm for v in self.vehicles)
+        self.max_height_cm = max(v.height_cm for v in self.vehicles)
+
+    def get(self, key: Optional[str]) -> Optional[VehicleClass]:
+        return self.by_key.get(key)
+
+    def resolve(self, key: Optional[str]) -> VehicleClass:
+        """Vehicle class for key, falling back to the default vehicle."""
+        return self.by_key.get(key, self.default)
+
+    def __iter__(self) -> Iterator[VehicleClass]:
+        return iter(self.vehicles)
+
+    def __len__(self) -> int:
+        return len(self.vehicles)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.by_key
+
+
+def load_fleet(path: str) -> Fleet:
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    vehicles = []
+    for entry in config["vehicles"]:
+        if not entry.get("enabled", True):
+            continue
+        try:
+            vehicles.append(VehicleClass(
+                key=entry["key"],
+                length_cm=entry["length_cm"],
+                width_cm=entry["width_cm"],
+                height_cm=entry["height_cm"],
+                max_weight=entry["max_weight"],
+                max_ldm=entry.get("max_ldm")
+            ))
+        except KeyError as e:
+            raise ValueError(f"Brak pola {e} w definicji pojazdu {entry.get('key', '?')} ({path})")
+    return Fleet(vehicles, config.get("default", vehicles[-1].key if vehicles else ""))
+
+
+_fleet: Optional[Fleet] = None
+
+
+def get_fleet() -> Fleet:
+    global _fleet
+    if _fleet is None:
+        _fleet = load_fleet(settings.FLEET_CONFIG_PATH)
+    return _fleet
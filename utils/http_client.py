@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from config import settings
+from utils.lazy import lazy_import
+
+# httpx ładowany przy tworzeniu pierwszego klienta
+httpx = lazy_import("httpx")
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def build_async_client() -> httpx.AsyncClient:
+    """
+    Tworzy asynchronicznego klienta HTTP z pulą połączeń (keep-alive),
+    limitami połączeń i timeoutami z konfiguracji.
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            settings.LLM_HTTP_TIMEOUT,
+            connect=settings.LLM_HTTP_CONNECT_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Zwraca współdzielonego klienta HTTP dla całego procesu.
+    Klient tworzony jest leniwie przy pierwszym użyciu.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = build_async_client()
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Zamyka współdzielonego klienta HTTP i zwalnia pulę połączeń."""
+    global _async_client
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
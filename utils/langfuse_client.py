@@ -1,9 +1,15 @@
-from langfuse import Langfuse
 from config import settings
-from typing import Optional, Dict, Any
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+import copy
 import json
+import logging
 import os
 
+from utils.batch_exporter import BatchExporter
+
+logger = logging.getLogger(__name__)
+
 class LangfuseClient:
     _instance = None
 
@@ -15,6 +21,8 @@ class LangfuseClient:
 
     def _initialize(self):
         if settings.LANGFUSE_ENABLED:
+            # SDK Langfuse importowany tylko, gdy integracja jest włączona (długi import)
+            from langfuse import Langfuse
             self.client = Langfuse(
                 public_key=settings.LANGFUSE_PUBLIC_KEY,
                 secret_key=settings.LANGFUSE_SECRET_KEY,
@@ -23,6 +31,17 @@ class LangfuseClient:
         else:
             self.client = None
 
+        # Zdarzenia trafiają do kolejki, wysyłka i flush() odbywają się w wątku eksportera
+        self.exporter = BatchExporter(
+            self._export_batch,
+            name="langfuse-exporter",
+            max_queue=settings.LANGFUSE_QUEUE_SIZE,
+            batch_size=settings.LANGFUSE_BATCH_SIZE,
+            flush_interval=settings.LANGFUSE_FLUSH_INTERVAL_SECONDS,
+            high_watermark=settings.LANGFUSE_QUEUE_HIGH_WATERMARK,
+            sample_rate=settings.LANGFUSE_BACKPRESSURE_SAMPLE_RATE
+        )
+
 
     def track_llm_request(
         self,
@@ -33,6 +52,7 @@ class LangfuseClient:
     ) -> None:
         """
         Track an LLM request in Langfuse.
+        Only enqueues the event - it is sent in batches by the background exporter.
         
         Args:
             prompt: The user prompt
@@ -40,44 +60,66 @@ class LangfuseClient:
             response: The LLM response
             metadata: Additional metadata to track
         """
-        print("[Langfuse] track_llm_request called")
+        logger.debug("track_llm_request called")
 
         if not self.client:
             return
 
-        try:
-            # Create a new trace
-            trace = self.client.trace(
-                name="transport_request_parse",
-                user_id=settings.LANGFUSE_USER_ID,
-                tags=[os.getenv("ENVIRONMENT", "dev")],
-                metadata=metadata or {}
-            )
+        # Migawka w chwili zgłoszenia - pipeline dalej modyfikuje słownik odpowiedzi
+        # (cargo_analysis, daty), a eksporter czyta zdarzenie w innym wątku
+        self.exporter.submit({
+            "prompt": prompt,
+            "system_message": system_message,
+            "completion": json.dumps(response, ensure_ascii=False),
+            "metadata": copy.deepcopy(metadata or {}),
+            "timestamp": datetime.now(timezone.utc)
+        })
 
-            # Create a generation
-            generation = trace.generation(
-                name="parse_transport_request",
-                model=settings.OLLAMA_MODEL if settings.LLM_PROVIDER == "ollama" else "gpt-3.5-turbo",
-                completion=json.dumps(response, ensure_ascii=False),
-                input=prompt,
-                output=response,
-                metadata={
-                    "system_message": system_message,
-                    "provider": settings.LLM_PROVIDER
-                }
-            )
+    def _export_batch(self, events: List[Dict[str, Any]]) -> None:
+        for event in events:
+            try:
+                # Create a new trace
+                trace = self.client.trace(
+                    name="transport_request_parse",
+                    user_id=settings.LANGFUSE_USER_ID,
+                    tags=[os.getenv("ENVIRONMENT", "dev")],
+                    metadata=event["metadata"],
+                    timestamp=event["timestamp"]
+                )
 
-            # Update the generation and trace
-            generation.update()
-            trace.update()
+                # Create a generation
+                generation = trace.generation(
+                    name="parse_transport_request",
+                    model=settings.OLLAMA_MODEL if settings.LLM_PROVIDER == "ollama" else "gpt-3.5-turbo",
+                    completion=event["completion"],
+                    input=event["prompt"],
+                    output=json.loads(event["completion"]),
+                    end_time=event["timestamp"],
+                    metadata={
+                        "system_message": event["system_message"],
+                        "provider": settings.LLM_PROVIDER
+                    }
+                )
 
-            self.client.flush()
+                # Update the generation and trace
+                generation.update()
+                trace.update()
+            except Exception as e:
+                logger.warning("Error tracking LLM request in Langfuse: %s", e, exc_info=True)
 
+        # Jeden flush na paczkę zdarzeń zamiast na każde zapytanie
+        self.client.flush()
 
-        except Exception as e:
-            print(f"Error tracking LLM request in Langfuse: {str(e)}")
+    def stats(self) -> Dict[str, int]:
+        return self.exporter.stats()
 
-    def flush(self):
+    def flush(self, timeout: Optional[float] = None):
         """Flush any pending events to Langfuse."""
         if self.client:
-            self.client.flush() 
\ No newline at end of file
+            self.exporter.flush(timeout)
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """Sends pending events and stops the exporter thread."""
+        self.exporter.shutdown(timeout)
+        if self.client:
+            self.client.flush()
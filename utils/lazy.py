@@ -0,0 +1,27 @@
+"""
+Lazy imports.
+lazy_import() returns a stand-in module that imports the real one on first
+attribute access, so heavy dependencies that only some requests need do not
+slow down cold start. Loading goes through importlib.import_module, which is
+safe when several threads touch the module for the first time at once.
+"""
+import importlib
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Forwards attribute access to the module named like itself, importing it when needed."""
+
+    def __getattr__(self, attr: str):
+        return getattr(importlib.import_module(self.__name__), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__name__ in sys.modules else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Returns module `name` if it is already imported, otherwise a LazyModule for it."""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
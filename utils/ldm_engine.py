@@ -0,0 +1,188 @@
+"""
+Vectorized LDM engine.
+Evaluates a whole cargo manifest against several vehicles at once: cargo is held as
+columnar NumPy arrays and pieces-per-row, rows and LDM are computed for both
+orientations x all vehicles in one pass, with the same arithmetic as the original
+per-item loop in CargoCalculator.calculateLDM. Standard pallet lines are looked up
+in precomputed per-quantity tables (utils/pallets.py) when the fleet has them.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from utils.cargo_model import CargoInput, as_records
+from utils.pallets import pallet_codes, pallet_ldm_table
+
+
+class CargoArrays:
+    """Columnar view of cargo items (dimensions in cm, as the calculator uses them)."""
+
+    __slots__ = ("height_m", "length_cm", "width_cm", "height_cm", "quantity", "weight", "integral", "pallet")
+
+    def __init__(self, length, width, height, quantity, weight):
+        """Columns in metres (as in CargoItem)."""
+        # Wysokości w postaci źródłowej - do komunikatów
+        self.height_m = height
+        self.length_cm = np.asarray(length, dtype=np.float64) * 100
+        self.width_cm = np.asarray(width, dtype=np.float64) * 100
+        self.height_cm = np.asarray(height, dtype=np.float64) * 100
+        self.quantity = np.asarray(quantity)
+        self.weight = np.asarray(weight)
+        # Pozycje z wagą i ilością typu int - ich suma zostaje int, jak w pętli calculateLDM
+        self.integral = _integral(weight, self.weight) & _integral(quantity, self.quantity)
+        # Kod standardowej palety per pozycja (-1 = inny wymiar)
+        self.pallet = pallet_codes(self.length_cm, self.width_cm)
+
+    @classmethod
+    def from_items(cls, items: Sequence[CargoInput]) -> "CargoArrays":
+        records = as_records(items)
+        return cls(
+            [record.length or 0 for record in records],
+            [record.width or 0 for record in records],
+            [record.height or 0 for record in records],
+            [record.quantity or 0 for record in records],
+            [record.weight or 0 for record in records]
+        )
+
+    def height_label(self, i: int):
+        # Wysokość w cm w tej samej postaci, w jakiej liczyła ją pętla (int * 100 zostaje int)
+        return self.height_m[i] * 100
+
+    def __len__(self) -> int:
+        return len(self.length_cm)
+
+
+def _integral(values, column: np.ndarray):
+    """Which entries of a column were ints (one bool when the column dtype decides it)."""
+    if column.dtype.kind != "f" or isinstance(values, np.ndarray):
+        return column.dtype.kind != "f"
+    return np.array([isinstance(value, (int, np.integer)) for value in values], dtype=bool)
+
+
+class FleetArrays:
+    """
+    Vehicle capacities as arrays, one entry per vehicle. With pallet_quantity > 0
+    LDM of standard pallets is precomputed for quantities 0..pallet_quantity.
+    """
+
+    __slots__ = ("width_cm", "height_cm", "max_ldm", "max_weight", "pallet_ldm")
+
+    def __init__(self, vehicles: Sequence[Dict], pallet_quantity: int = 0):
+        self.width_cm = np.array([v["width_cm"] for v in vehicles], dtype=np.float64)
+        self.height_cm = np.array([v["height_cm"] for v in vehicles], dtype=np.float64)
+        self.max_ldm = np.array([v["max_ldm"] for v in vehicles], dtype=np.float64)
+        self.max_weight = np.array([v["max_weight"] for v in vehicles], dtype=np.float64)
+        # Tablica (pojazd, paleta, ilość) -> LDM
+        self.pallet_ldm = (
+            np.stack([pallet_ldm_table(width, pallet_quantity) for width in self.width_cm.tolist()])
+            if pallet_quantity > 0 else None
+        )
+
+
+class LDMEvaluation:
+    """
+    Per-vehicle x per-item results of one engine pass. Rows follow the vehicles,
+    columns follow the cargo items.
+    """
+
+    __slots__ = ("cargo", "fleet", "item_ldm", "fits_width", "too_high", "total_ldm", "total_weight")
+
+    def __init__(self, cargo: CargoArrays, fleet: FleetArrays):
+        self.cargo = cargo
+        self.fleet = fleet
+
+        n_vehicles, n_items = len(fleet.width_cm), len(cargo)
+        if n_items == 0:
+            shape = (n_vehicles, 0)
+            self.item_ldm = np.zeros(shape)
+            self.fits_width = np.ones(shape, dtype=bool)
+            self.too_high = np.zeros(shape, dtype=bool)
+            self.total_ldm = np.zeros(n_vehicles)
+            self.total_weight = [0] * n_vehicles
+            return
+
+        if np.any(cargo.width_cm == 0) or np.any(cargo.length_cm == 0):
+            # Tak samo jak pętla w calculateLDM (dzielenie przez szerokość orientacji)
+            raise ZeroDivisionError("float division by zero")
+
+        best = np.full((n_vehicles, n_items), np.inf)
+        generic = np.ones(n_items, dtype=bool)
+
+        if fleet.pallet_ldm is not None:
+            # Szybka ścieżka - standardowe palety w całkowitej ilości mieszczącej się w tablicy
+            quantity = cargo.quantity
+            fast = (cargo.pallet >= 0) & (quantity >= 0) & (quantity < fleet.pallet_ldm.shape[2]) & (quantity == np.floor(quantity))
+            if fast.any():
+                best[:, fast] = fleet.pallet_ldm[:, cargo.pallet[fast], quantity[fast].astype(np.int64)]
+                generic = ~fast
+
+        if generic.any():
+            # Ogólne szukanie orientacji tylko dla nietypowych wymiarów
+            columns = slice(None) if generic.all() else np.flatnonzero(generic)
+            length_cm, width_cm, quantity = cargo.length_cm[columns], cargo.width_cm[columns], cargo.quantity[columns]
+            vehicle_width = fleet.width_cm[:, None]
+            generic_best = np.full((n_vehicles, len(length_cm)), np.inf)
+            for orient_l, orient_w in ((length_cm, width_cm), (width_cm, length_cm)):
+                pieces_per_row = np.floor(vehicle_width / orient_w)
+                valid = pieces_per_row != 0
+                safe_ppr = np.where(valid, pieces_per_row, 1)
+
+                full_rows = np.floor_divide(quantity, safe_ppr)
+                leftover = np.mod(quantity, safe_ppr) != 0
+                ldm_m = (full_rows * orient_l + np.where(leftover, orient_l, 0)) / 100
+
+                generic_best = np.where(valid & (ldm_m < generic_best), ldm_m, generic_best)
+            best[:, columns] = generic_best
+
+        self.fits_width = np.isfinite(best)
+        self.too_high = cargo.height_cm[None, :] > fleet.height_cm[:, None]
+        self.item_ldm = np.where(self.fits_width, best, 0.0)
+
+        # cumsum sumuje sekwencyjnie - ten sam wynik co akumulacja w pętli
+        self.total_ldm = np.cumsum(self.item_ldm, axis=1)[:, -1]
+        item_weight = cargo.weight * cargo.quantity
+        totals = np.cumsum(np.where(self.fits_width, item_weight, 0), axis=1)[:, -1]
+        self.total_weight = totals.tolist()
+        if totals.dtype.kind == "f" and np.any(cargo.integral):
+            # Kolumna float przez część pozycji - pojazd, w którym liczą się tylko wagi int, ma sumę int
+            int_only = ~(self.fits_width & ~cargo.integral).any(axis=1)
+            self.total_weight = [
+                int(total) if exact else total for total, exact in zip(self.total_weight, int_only.tolist())
+            ]
+
+    def fit_in_vehicle(self, v: int) -> bool:
+        return bool(
+            not self.too_high[v].any()
+            and self.fits_width[v].all()
+            and self.total_ldm[v] <= self.fleet.max_ldm[v]
+            and self.total_weight[v] <= self.fleet.max_weight[v]
+        )
+
+    def warnings(self, v: int, vehicle_label, vehicle: Dict) -> List[str]:
+        """Formats warnings for vehicle v exactly as calculateLDM does."""
+        warnings = []
+        flagged = np.flatnonzero(self.too_high[v] | ~self.fits_width[v])
+        for i in flagged.tolist():
+            if self.too_high[v, i]:
+                h = self.cargo.height_label(i)
+                warnings.append(f"Ładunek o wysokości {h} cm przekracza wysokość pojazdu ({vehicle['height_cm']} cm).")
+            if not self.fits_width[v, i]:
+                warnings.append("Ładunek jest zbyt szeroki, by zmieścić się w pojeździe.")
+
+        total_ldm = float(self.total_ldm[v])
+        total_weight = self.total_weight[v]
+        if total_ldm > vehicle["max_ldm"]:
+            warnings.append(f"Łączna długość LDM ({round(total_ldm, 2)}) przekracza maksymalną dla {vehicle_label} ({vehicle['max_ldm']}).")
+
+        if total_weight > vehicle["max_weight"]:
+            warnings.append(f"Łączna waga ładunku ({total_weight} kg) przekracza maksymalną dla {vehicle_label} ({vehicle['max_weight']} kg).")
+
+        if 0 < total_ldm < (0.8 * vehicle["max_ldm"]):
+            warnings.append("Zajmujesz mniej niż 80% przestrzeni pojazdu – rozważ wybór opcji 'dowolny typ pojazdu'.")
+
+        return warnings
+
+
+def evaluate(cargo_items: Sequence[CargoInput], vehicles: Sequence[Dict]) -> LDMEvaluation:
+    """Evaluates cargo items against every vehicle in one vectorized pass."""
+    return LDMEvaluation(CargoArrays.from_items(cargo_items), FleetArrays(vehicles))
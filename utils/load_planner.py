@@ -0,0 +1,306 @@
+"""
+Load planner.
+Heuristic 2D floor packing of a cargo manifest across the vehicle width, with
+vertical stacking of identical pieces when the load is stackable. Two layouts are
+built and the shorter one is reported:
+
+- "rows":    every item type in whole rows across the width (the calculateLDM model),
+             stacked where allowed,
+- "skyline": bottom-left skyline packing of all stacks together, so leftover row
+             space of one item type is filled by the next one.
+
+The time budget covers the whole plan: grouping the manifest into stacks,
+skyline packing (stacks not placed before the deadline are laid out in rows
+behind the skyline) and the row layout, which is computed per item type rather
+than per stack. Stacks are kept as counts per item type, so the plan length is
+known without building one record per stack; placements are materialized only
+up to max_placements stacks.
+"""
+import time
+from math import ceil, floor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.cargo_model import CargoInput, as_records
+
+# Co ile pozycji manifestu sprawdzamy, czy nie minął termin
+DEADLINE_CHECK_EVERY = 1024
+
+
+class LoadPlan:
+    """
+    Result of planning: floor length used, number of floor stacks and, when
+    materialized, the placement of every stack (cm).
+    """
+
+    __slots__ = ("length_cm", "placements", "unplaced", "strategy", "complete", "stacks")
+
+    def __init__(
+        self,
+        length_cm: float,
+        placements: Optional[List[Dict]],
+        unplaced: List[int],
+        strategy: str,
+        complete: bool = True,
+        stacks: int = 0
+    ):
+        self.length_cm = length_cm
+        # None - plan bez rozmieszczenia stosów (więcej niż max_placements)
+        self.placements = placements
+        self.unplaced = unplaced
+        self.strategy = strategy
+        self.complete = complete
+        self.stacks = stacks
+
+    @property
+    def ldm(self) -> float:
+        return round(self.length_cm / 100, 2)
+
+    def to_dict(self) -> Dict:
+        return {
+            "ldm": self.ldm,
+            "strategy": self.strategy,
+            "complete": self.complete,
+            "stacks": self.stacks,
+            "placements": self.placements or [],
+            "unplaced": self.unplaced,
+        }
+
+
+class _Group:
+    """Stacks of one item type: `count` stacks of `layers` pieces, the last one of `last_layers`."""
+
+    __slots__ = ("item", "length", "width", "height", "layers", "count", "last_layers")
+
+    def __init__(self, item: int, length: float, width: float, height: float, layers: int, count: int, last_layers: int):
+        self.item = item
+        self.length = length
+        self.width = width
+        self.height = height
+        self.layers = layers
+        self.count = count
+        self.last_layers = last_layers
+
+    def stack_layers(self, k: int) -> int:
+        return self.last_layers if k == self.count - 1 else self.layers
+
+    def tail(self, first: int) -> "_Group":
+        """The stacks of this group from index `first` on."""
+        return _Group(self.item, self.length, self.width, self.height, self.layers, self.count - first, self.last_layers)
+
+
+def plan_load(
+    cargo_items: Sequence[CargoInput],
+    vehicle: Dict,
+    stackable: bool = False,
+    time_budget: Optional[float] = None,
+    max_placements: Optional[int] = None
+) -> Optional[LoadPlan]:
+    """
+    Plans the floor layout of cargo_items (dimensions in metres) in vehicle.
+
+    Args:
+        stackable: Stack identical pieces up to the vehicle height
+        time_budget: Seconds allowed for the whole plan (None = no limit)
+        max_placements: Materialize placements only for plans of at most this
+            many stacks (None = always, 0 = never)
+
+    Returns:
+        Optional[LoadPlan]: The shorter of the "rows" and "skyline" layouts, or
+        None when the budget ran out before the manifest was grouped into stacks
+    """
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    built = _build_groups(cargo_items, vehicle, stackable, deadline)
+    if built is None:
+        return None
+    groups, unplaced = built
+
+    vehicle_width = vehicle["width_cm"]
+    stacks = sum(group.count for group in groups)
+    with_placements = max_placements is None or stacks <= max_placements
+
+    rows_placements = [] if with_placements else None
+    rows_length = _place_rows(groups, vehicle_width, 0.0, rows_placements)
+    rows_plan = LoadPlan(rows_length, rows_placements, unplaced, "rows", stacks=stacks)
+
+    # Jeden rodzaj ładunku - układ w rzędach jest już optymalny dla tego modelu
+    if len(groups) < 2:
+        return rows_plan
+
+    skyline_plan = _place_skyline(groups, vehicle_width, unplaced, deadline, [] if with_placements else None)
+    skyline_plan.stacks = stacks
+    return skyline_plan if skyline_plan.length_cm < rows_plan.length_cm else rows_plan
+
+
+def _build_groups(
+    cargo_items: Sequence[CargoInput],
+    vehicle: Dict,
+    stackable: bool,
+    deadline: Optional[float]
+) -> Optional[Tuple[List[_Group], List[int]]]:
+    """Groups pieces into stacks per item type; returns (groups, unplaced item indices) or None past the deadline."""
+    vehicle_width = vehicle["width_cm"]
+    vehicle_height = vehicle["height_cm"]
+    groups: List[_Group] = []
+    unplaced: List[int] = []
+
+    for index, record in enumerate(as_records(cargo_items)):
+        if deadline is not None and index and index % DEADLINE_CHECK_EVERY == 0 and time.perf_counter() > deadline:
+            return None
+
+        length = (record.length or 0) * 100
+        width = (record.width or 0) * 100
+        height = (record.height or 0) * 100
+        quantity = int(record.quantity or 0)
+        if quantity <= 0:
+            continue
+        if length <= 0 or width <= 0 or min(length, width) > vehicle_width:
+            # Tak jak w calculateLDM - ładunek zbyt szeroki nie jest wliczany do LDM
+            unplaced.append(index)
+            continue
+
+        # Za wysoki ładunek zajmuje podłogę jak w calculateLDM, ale nie jest piętrowany
+        layers = 1
+        if stackable and 0 < height <= vehicle_height:
+            layers = max(1, floor(vehicle_height / height))
+
+        # Orientacja z większą liczbą sztuk w rzędzie (przy remisie - krótsza)
+        if _rows_length(quantity, length, width, vehicle_width) > _rows_length(quantity, width, length, vehicle_width):
+            length, width = width, length
+
+        full_stacks, rest = divmod(quantity, layers)
+        count = full_stacks + (1 if rest else 0)
+        groups.append(_Group(index, length, width, height, layers, count, rest or layers))
+
+    return groups, unplaced
+
+
+def _rows_length(count: int, length: float, width: float, vehicle_width: float) -> float:
+    per_row = floor(vehicle_width / width)
+    if per_row == 0:
+        return float("inf")
+    return ceil(count / per_row) * length
+
+
+def _placement(group: _Group, k: int, x: float, y: float, length: float, width: float) -> Dict:
+    layers = group.stack_layers(k)
+    return {
+        "item": group.item,
+        "x": round(x, 1),
+        "y": round(y, 1),
+        "length": round(length, 1),
+        "width": round(width, 1),
+        "layers": layers,
+        "height": round(group.height * layers, 1),
+    }
+
+
+def _place_rows(groups: List[_Group], vehicle_width: float, start: float, placements: Optional[List[Dict]]) -> float:
+    """
+    Lays out every group in whole rows, one group after another, from `start`.
+    Returns the end of the layout; placements are appended only when a list is given.
+    """
+    x = start
+    for group in groups:
+        if not group.count:
+            continue
+        length, width = group.length, group.width
+        per_row = floor(vehicle_width / width)
+        if per_row == 0:
+            length, width = width, length
+            per_row = floor(vehicle_width / width)
+        if placements is not None:
+            for k in range(group.count):
+                row, slot = divmod(k, per_row)
+                placements.append(_placement(group, k, x + row * length, slot * width, length, width))
+        x += ceil(group.count / per_row) * length
+    return x
+
+
+def _place_skyline(
+    groups: List[_Group],
+    vehicle_width: float,
+    unplaced: List[int],
+    deadline: Optional[float],
+    placements: Optional[List[Dict]]
+) -> LoadPlan:
+    # Odcinki skyline w poprzek szerokości: [y, szerokość, zajęta długość x]
+    skyline = [[0.0, vehicle_width, 0.0]]
+    end = 0.0
+    placed = 0
+
+    # Najpierw największe podstawy, w obrębie rodzaju kolejność zachowana
+    ordered = sorted(groups, key=lambda group: -(group.length * group.width))
+
+    for g, group in enumerate(ordered):
+        for k in range(group.count):
+            if deadline is not None and placed % 32 == 0 and time.perf_counter() > deadline:
+                # Budżet czasu wyczerpany - resztę układamy w rzędach za skyline
+                rest = [group.tail(k)] + ordered[g + 1:]
+                end = _place_rows(rest, vehicle_width, end, placements)
+                return LoadPlan(end, placements, unplaced, "skyline", complete=False)
+            placed += 1
+
+            best = None
+            for length, width in ((group.length, group.width), (group.width, group.length)):
+                if width > vehicle_width:
+                    continue
+                position = _find_position(skyline, width, vehicle_width)
+                if position is None:
+                    continue
+                x, i = position
+                candidate = (x, skyline[i][0], x + length, length, width, i)
+                # Przy tej samej pozycji wygrywa orientacja z układu w rzędach
+                if best is None or candidate[:2] < best[:2]:
+                    best = candidate
+
+            x, y, top, length, width, i = best
+            if placements is not None:
+                placements.append(_placement(group, k, x, y, length, width))
+            _update_skyline(skyline, i, width, top)
+            end = max(end, top)
+
+    return LoadPlan(end, placements, unplaced, "skyline")
+
+
+def _find_position(skyline: List[List[float]], width: float, vehicle_width: float):
+    """Lowest (x) bottom-left position for a piece of the given width: (x, segment index)."""
+    best = None
+    for i, (y, _, _) in enumerate(skyline):
+        if y + width > vehicle_width + 1e-9:
+            break
+        x = 0.0
+        covered = 0.0
+        j = i
+        while covered < width - 1e-9:
+            x = max(x, skyline[j][2])
+            covered += skyline[j][1]
+            j += 1
+        if best is None or x < best[0]:
+            best = (x, i)
+    return best
+
+
+def _update_skyline(skyline: List[List[float]], i: int, width: float, top: float) -> None:
+    y = skyline[i][0]
+    remaining = width
+    # Usuń odcinki całkowicie przykryte, ostatni częściowo przykryty skróć
+    while remaining > 1e-9:
+        segment = skyline[i]
+        if segment[1] <= remaining + 1e-9:
+            remaining -= segment[1]
+            skyline.pop(i)
+        else:
+            segment[0] += remaining
+            segment[1] -= remaining
+            remaining = 0.0
+    skyline.insert(i, [y, width, top])
+
+    # Scal sąsiednie odcinki o tej samej wysokości
+    k = 0
+    while k < len(skyline) - 1:
+        if abs(skyline[k][2] - skyline[k + 1][2]) < 1e-9:
+            skyline[k][1] += skyline[k + 1][1]
+            skyline.pop(k + 1)
+        else:
+            k += 1
+
@@ -0,0 +1,169 @@
+"""
+Logging configuration.
+Application loggers write through a bounded in-memory queue: the calling thread
+(or the event loop) only enqueues the record, a QueueListener thread formats it
+as one JSON object per line and writes it to stdout and, optionally, to a
+size-rotated file. Large payloads (raw LLM responses, parsed requests) are
+attached with extra={"payload": ...} and kept only for a sampled fraction of
+records; the log line itself is always written.
+"""
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from config import settings
+
+# Atrybuty LogRecord - wszystko poza nimi to pola przekazane przez extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class PayloadSampler(logging.Filter):
+    """
+    Keeps the "payload" extra field for a sampled fraction of records. Kept
+    payloads are copied, so later changes by the caller do not reach the log;
+    a payload that cannot be copied (e.g. mutated by another thread meanwhile)
+    is dropped, the record itself is kept.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if hasattr(record, "payload"):
+            if random.random() < self.rate:
+                try:
+                    record.payload = copy.deepcopy(record.payload)
+                except Exception:
+                    del record.payload
+                    record.payload_dropped = True
+            else:
+                del record.payload
+                record.payload_sampled_out = True
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking or raising."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatowanie (JSON) odbywa się w wątku listenera - tu tylko scalamy argumenty i wyjątek
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    log_file: Optional[str] = None,
+    stream=None
+) -> logging.Logger:
+    """
+    Routes the root logger through the logging queue (idempotent - a second call
+    replaces the previous configuration). Returns the root logger.
+    """
+    global _listener, _queue_handler
+
+    level = (level or settings.LOG_LEVEL).upper()
+    log_file = settings.LOG_FILE if log_file is None else log_file
+
+    formatter = JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    handlers = [logging.StreamHandler(stream or sys.stdout)]
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=settings.LOG_FILE_MAX_BYTES,
+            backupCount=settings.LOG_FILE_BACKUP_COUNT,
+            encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    with _lock:
+        _stop_listener()
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        _queue_handler = NonBlockingQueueHandler(log_queue)
+        _queue_handler.addFilter(PayloadSampler(settings.LOG_PAYLOAD_SAMPLE_RATE))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, NonBlockingQueueHandler):
+                root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    return root
+
+
+def shutdown_logging() -> None:
+    """Writes out queued records and closes the log handlers."""
+    global _queue_handler
+    with _lock:
+        _stop_listener()
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+            _queue_handler = None
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
@@ -0,0 +1,215 @@
+"""
+Metrics.
+In-process stage timers and upstream error counters. Every timed stage keeps a
+count, a running sum and a sliding window of the latest durations, from which
+p50/p95/p99 are computed; render_prometheus() exposes them together with cache
+hit ratios in the Prometheus text format (GET /metrics).
+
+    with timed("distance"):
+        ...
+
+    @timed("osrm.route")
+    def _osrm_route(...): ...
+"""
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import settings
+
+QUANTILES = (0.5, 0.95, 0.99)
+METRICS_PREFIX = "transport_"
+
+_stages: Dict[str, "StageHistogram"] = {}
+_errors: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+class StageHistogram:
+    """Durations of one stage: totals since start plus a window of recent samples for quantiles."""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._window: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+            self._window.append(seconds)
+
+    def quantiles(self, quantiles: Iterable[float] = QUANTILES) -> Dict[float, float]:
+        with self._lock:
+            samples = sorted(self._window)
+        if not samples:
+            return {q: 0.0 for q in quantiles}
+        # Metoda najbliższej rangi - wartość z próbek, bez interpolacji
+        return {q: samples[min(len(samples) - 1, max(0, int(q * len(samples) + 0.5) - 1))] for q in quantiles}
+
+    def stats(self) -> Dict[str, Any]:
+        summary = {f"p{round(q * 100)}": round(v, 6) for q, v in self.quantiles().items()}
+        with self._lock:
+            summary.update(count=self.count, sum=round(self.sum, 6), max=round(self.max, 6))
+        return summary
+
+
+class timed:
+    """
+    Measures the duration of a stage. Works as a context manager and as a
+    decorator of sync and async functions; the duration is recorded also
+    when the stage raises.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._started: List[float] = []
+
+    def __enter__(self) -> "timed":
+        self._started.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        observe(self.stage, time.perf_counter() - self._started.pop())
+
+    def __call__(self, func: Callable) -> Callable:
+        stage = self.stage
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    observe(stage, time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(stage, time.perf_counter() - started)
+        return wrapper
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Records one duration of stage (in seconds)."""
+    if not settings.METRICS_ENABLED:
+        return
+    histogram = _stages.get(stage)
+    if histogram is None:
+        with _lock:
+            histogram = _stages.setdefault(stage, StageHistogram(settings.METRICS_WINDOW_SIZE))
+    histogram.observe(seconds)
+
+
+def record_upstream_error(upstream: str) -> None:
+    """Counts a failed call to an external service (LLM, Nominatim, OSRM)."""
+    if not settings.METRICS_ENABLED:
+        return
+    with _lock:
+        _errors[upstream] = _errors.get(upstream, 0) + 1
+
+
+def stage_stats() -> Dict[str, Dict[str, Any]]:
+    """p50/p95/p99, count, sum and max per stage."""
+    return {stage: histogram.stats() for stage, histogram in sorted(_stages.items())}
+
+
+def upstream_errors() -> Dict[str, int]:
+    with _lock:
+        return dict(sorted(_errors.items()))
+
+
+def reset_metrics() -> None:
+    """Clears all stages and counters (e.g. in tests)."""
+    with _lock:
+        _stages.clear()
+        _errors.clear()
+
+
+def render_prometheus(
+    caches: Optional[Dict[str, Dict[str, Any]]] = None,
+    telemetry: Optional[Dict[str, int]] = None
+) -> str:
+    """
+    Prometheus text exposition of stage durations (summary), upstream errors
+    and, if given, cache statistics (as returned by /cache/stats) and
+    telemetry exporter counters.
+    """
+    lines: List[str] = []
+
+    name = METRICS_PREFIX + "stage_duration_seconds"
+    _header(lines, name, "summary", "Duration of request processing stages")
+    for stage, histogram in sorted(_stages.items()):
+        for q, value in histogram.quantiles().items():
+            lines.append(_sample(name, value, stage=stage, quantile=q))
+        lines.append(_sample(name + "_sum", histogram.sum, stage=stage))
+        lines.append(_sample(name + "_count", histogram.count, stage=stage))
+
+    name = METRICS_PREFIX + "upstream_errors_total"
+    _header(lines, name, "counter", "Failed calls to external services")
+    for upstream, count in upstream_errors().items():
+        lines.append(_sample(name, count, upstream=upstream))
+
+    if caches:
+        for metric, kind, help_text, value_of in (
+            ("cache_hits_total", "counter", "Cache hits", lambda stats: stats.get("hits")),
+            ("cache_misses_total", "counter", "Cache misses", lambda stats: stats.get("misses")),
+            ("cache_hit_ratio", "gauge", "Cache hit ratio since start", _hit_ratio),
+            # Indeks kodów pocztowych podaje liczbę wpisów jako "entries"
+            ("cache_entries", "gauge", "Entries held in memory", lambda stats: stats.get("size", stats.get("entries"))),
+        ):
+            name = METRICS_PREFIX + metric
+            _header(lines, name, kind, help_text)
+            for cache, stats in sorted(caches.items()):
+                value = value_of(stats)
+                if value is not None:
+                    lines.append(_sample(name, value, cache=cache))
+
+    if telemetry:
+        name = METRICS_PREFIX + "telemetry_events_total"
+        _header(lines, name, "counter", "Telemetry events by outcome")
+        for outcome in ("submitted", "exported", "failed", "sampled_out", "dropped"):
+            lines.append(_sample(name, telemetry.get(outcome, 0), outcome=outcome))
+        name = METRICS_PREFIX + "telemetry_queue_depth"
+        _header(lines, name, "gauge", "Telemetry events waiting for export")
+        lines.append(_sample(name, telemetry.get("queued", 0)))
+
+    return "\n".join(lines) + "\n"
+
+
+def _hit_ratio(stats: Dict[str, Any]) -> Optional[float]:
+    if "hits" not in stats or "misses" not in stats:
+        return None
+    lookups = stats["hits"] + stats["misses"]
+    return stats["hits"] / lookups if lookups else 0.0
+
+
+def _header(lines: List[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _sample(name: str, value: float, **labels: Any) -> str:
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+        return f"{name}{{{rendered}}} {_number(value)}"
+    return f"{name} {_number(value)}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
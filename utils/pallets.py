@@ -0,0 +1,92 @@
+"""
+Standard pallet footprints.
+Recognition of EUR / industrial / half pallets in cargo lines, snapping of LLM
+dimensions to the exact footprint, and per-quantity LDM tables used by the
+LDM engine fast path instead of the generic orientation search.
+"""
+from math import floor
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+# Standardowe podstawy palet (długość x szerokość w cm); kolejność = kody w tablicach
+STANDARD_PALLETS = {
+    "EUR": (120, 80),
+    "industrial": (120, 100),
+    "half": (60, 80),
+}
+PALLET_NAMES = list(STANDARD_PALLETS)
+
+# Dokładne podstawy w obu orientacjach -> nazwa palety
+FOOTPRINTS = {
+    footprint: name
+    for name, (length, width) in STANDARD_PALLETS.items()
+    for footprint in ((length, width), (width, length))
+}
+
+
+def match_pallet(length_cm: float, width_cm: float, tolerance_cm: float = 0.0) -> Optional[str]:
+    """Name of the standard pallet with this footprint (either orientation), or None."""
+    if tolerance_cm <= 0:
+        return FOOTPRINTS.get((length_cm, width_cm))
+    for name, (length, width) in STANDARD_PALLETS.items():
+        for a, b in ((length, width), (width, length)):
+            if abs(length_cm - a) <= tolerance_cm and abs(width_cm - b) <= tolerance_cm:
+                return name
+    return None
+
+
+def snap_pallets(records: Iterable, tolerance_cm: float) -> None:
+    """
+    Snaps cargo records whose footprint is within tolerance_cm of a standard
+    pallet to its exact dimensions (keeping the orientation) and marks them
+    with the pallet name, so the same pallet always quotes the same.
+    """
+    for record in records:
+        if not record.length or not record.width:
+            continue
+        length_cm, width_cm = record.length * 100, record.width * 100
+        name = match_pallet(length_cm, width_cm, tolerance_cm)
+        if name is None:
+            continue
+        length, width = STANDARD_PALLETS[name]
+        if abs(length_cm - length) > tolerance_cm or abs(width_cm - width) > tolerance_cm:
+            length, width = width, length
+        record.length = length / 100
+        record.width = width / 100
+        record.pallet = name
+
+
+def pallet_codes(length_cm: np.ndarray, width_cm: np.ndarray) -> np.ndarray:
+    """Pallet code per cargo line (index in PALLET_NAMES), -1 for other sizes."""
+    codes = np.full(len(length_cm), -1, dtype=np.int64)
+    for code, (length, width) in enumerate(STANDARD_PALLETS.values()):
+        match = ((length_cm == length) & (width_cm == width)) | ((length_cm == width) & (width_cm == length))
+        codes[match & (codes < 0)] = code
+    return codes
+
+
+def pallet_row(length: float, width: float, vehicle_width: float, quantity: int) -> Tuple[int, int, float]:
+    """
+    (pieces per row, rows, LDM in m) for `quantity` pallets - the same arithmetic
+    as the generic orientation search in the LDM engine.
+    """
+    best = (0, 0, float("inf"))
+    for orient_l, orient_w in ((length, width), (width, length)):
+        per_row = floor(vehicle_width / orient_w)
+        if per_row == 0:
+            continue
+        full_rows, leftover = divmod(quantity, per_row)
+        ldm = ((full_rows * orient_l) + (orient_l if leftover else 0)) / 100
+        if ldm < best[2]:
+            best = (per_row, full_rows + (1 if leftover else 0), ldm)
+    return best
+
+
+def pallet_ldm_table(vehicle_width: float, max_quantity: int) -> np.ndarray:
+    """LDM per (pallet code, quantity 0..max_quantity) for one vehicle width."""
+    table = np.empty((len(STANDARD_PALLETS), max_quantity + 1))
+    for code, (length, width) in enumerate(STANDARD_PALLETS.values()):
+        for quantity in range(max_quantity + 1):
+            table[code, quantity] = pallet_row(length, width, vehicle_width, quantity)[2]
+    return table
@@ -0,0 +1,86 @@
+import json
+from typing import Any, List, Tuple
+
+
+class PartialJSONObjectParser:
+    """
+    Incremental parser for a JSON object arriving in chunks (e.g. streamed LLM output).
+    feed() returns the top-level (key, value) pairs that became complete with the
+    new chunk, so fields can be emitted before the whole object is received.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.started = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.reading_key = False
+        self.key_start = None
+        self.key = None
+        self.value_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        completed = []
+
+        while self.pos < len(self.buffer):
+            i = self.pos
+            ch = self.buffer[i]
+            self.pos += 1
+
+            if not self.started:
+                # Pomijamy wszystko przed otwierającym nawiasem (np. ```json)
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self.depth == 0:
+                # Obiekt już domknięty - resztę ignorujemy
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.reading_key:
+                        self.key = json.loads(self.buffer[self.key_start:i + 1])
+                        self.reading_key = False
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.key is None:
+                    self.reading_key = True
+                    self.key_start = i
+            elif ch == ":" and self.depth == 1 and self.key is not None and self.value_start is None:
+                self.value_start = i + 1
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._complete_value(i, completed)
+            elif ch == "," and self.depth == 1:
+                self._complete_value(i, completed)
+
+        return completed
+
+    def _complete_value(self, end: int, completed: List[Tuple[str, Any]]) -> None:
+        if self.key is not None and self.value_start is not None:
+            raw = self.buffer[self.value_start:end].strip()
+            try:
+                completed.append((self.key, json.loads(raw)))
+            except json.JSONDecodeError:
+                pass
+        self.key = None
+        self.value_start = None
+
+    @property
+    def done(self) -> bool:
+        return self.started and self.depth == 0
@@ -0,0 +1,231 @@
+"""
+Offline index of Polish postal codes -> (lat, lon) centroids.
+
+The index lives in a compact binary file that is memory-mapped at startup:
+
+    magic  b"PLPC" | uint32 version | uint32 count
+    int32[count]   postal codes as integers (NN-NNN -> NNNNN), sorted ascending
+    float32[count] latitudes
+    float32[count] longitudes
+
+The file is not kept in the repository; it is bundled with the deployment by
+an explicit build step (e.g. in the image build) from a GeoNames postal code
+dump - a URL or a local PL.zip / PL.txt:
+
+    python -m utils.postal_index https://download.geonames.org/export/zip/PL.zip data/pl_postal_codes.bin
+
+Without arguments the step uses POSTAL_INDEX_SOURCE and POSTAL_INDEX_PATH. The
+app itself only reads the file: when it is missing, a warning is logged and
+postal codes are geocoded through Nominatim.
+"""
+import bisect
+import io
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zipfile
+from array import array
+from typing import Iterable, Optional
+
+from config import settings
+
+MAGIC = b"PLPC"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+
+logger = logging.getLogger(__name__)
+
+POSTAL_CODE_RE = re.compile(r"^(\d{2})-?(\d{3})$")
+
+
+def postal_code_to_int(code: str) -> Optional[int]:
+    match = POSTAL_CODE_RE.match(code.strip())
+    if not match:
+        return None
+    return int(match.group(1) + match.group(2))
+
+
+class PostalCodeIndex:
+    """
+    Read-only lookup of postal code centroids backed by a memory-mapped file.
+    A missing file yields an empty index, so geocoding falls back to Nominatim.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.load_seconds = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._mmap = None
+        self._codes = self._lats = self._lons = ()
+
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Nieprawidłowy plik indeksu kodów pocztowych: {path}")
+
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        size = 4 * count
+        codes, lats, lons = (
+            view[offset + i * size: offset + (i + 1) * size] for i in range(3)
+        )
+
+        if sys.byteorder == "little":
+            self._codes, self._lats, self._lons = codes.cast("i"), lats.cast("f"), lons.cast("f")
+        else:
+            self._codes, self._lats, self._lons = (
+                _swapped(typecode, chunk) for typecode, chunk in (("i", codes), ("f", lats), ("f", lons))
+            )
+
+        self.load_seconds = time.perf_counter() - started
+
+    def lookup(self, code: str) -> Optional[tuple[float, float]]:
+        key = postal_code_to_int(code)
+        if key is not None:
+            i = bisect.bisect_left(self._codes, key)
+            if i < len(self._codes) and self._codes[i] == key:
+                self.hits += 1
+                return (self._lats[i], self._lons[i])
+        self.misses += 1
+        return None
+
+    def centroids(self) -> Iterable[tuple[int, float, float]]:
+        """(postal code as int, lat, lon) for every indexed code, in code order."""
+        return zip(self._codes, self._lats, self._lons)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "load_seconds": round(self.load_seconds, 6),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+
+def _swapped(typecode: str, chunk: memoryview) -> array:
+    values = array(typecode, chunk.tobytes())
+    values.byteswap()
+    return values
+
+
+def build_index(rows: Iterable[tuple[str, float, float]], out_path: str) -> int:
+    """
+    Writes an index file from (postal_code, lat, lon) rows.
+    Several rows for the same code are averaged into one centroid.
+    Returns the number of indexed codes.
+    """
+    sums: dict[int, list[float]] = {}
+    for code, lat, lon in rows:
+        key = postal_code_to_int(code)
+        if key is None:
+            continue
+        acc = sums.setdefault(key, [0.0, 0.0, 0])
+        acc[0] += lat
+        acc[1] += lon
+        acc[2] += 1
+
+    keys = sorted(sums)
+    codes = array("i", keys)
+    lats = array("f", (sums[k][0] / sums[k][2] for k in keys))
+    lons = array("f", (sums[k][1] / sums[k][2] for k in keys))
+    if sys.byteorder != "little":
+        for values in (codes, lats, lons):
+            values.byteswap()
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    # Zapis do pliku tymczasowego i podmiana - czytelnik nigdy nie widzi połowy pliku
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(keys)))
+        for values in (codes, lats, lons):
+            f.write(values.tobytes())
+    os.replace(tmp_path, out_path)
+    return len(keys)
+
+
+def read_geonames(path: str) -> Iterable[tuple[str, float, float]]:
+    """Reads (postal_code, lat, lon) rows from a GeoNames postal code dump (PL.txt or PL.zip)."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            member = next(name for name in archive.namelist() if name.endswith(".txt") and "readme" not in name.lower())
+            with archive.open(member) as raw:
+                yield from _geonames_rows(io.TextIOWrapper(raw, encoding="utf-8"))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from _geonames_rows(f)
+
+
+def _geonames_rows(lines: Iterable[str]) -> Iterable[tuple[str, float, float]]:
+    for line in lines:
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) < 11 or not fields[9] or not fields[10]:
+            continue
+        yield fields[1], float(fields[9]), float(fields[10])
+
+
+def build_from_source(source: str, out_path: str) -> int:
+    """Builds the index from a GeoNames dump given as a local path or an http(s) URL."""
+    if not source.startswith(("http://", "https://")):
+        return build_index(read_geonames(source), out_path)
+
+    # Tylko krok budowania (CLI) - importy sieciowe poza ścieżką startu aplikacji
+    import shutil
+    import tempfile
+    import urllib.request
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        local_path = os.path.join(tmpdir, os.path.basename(source) or "geonames")
+        with urllib.request.urlopen(source, timeout=settings.POSTAL_INDEX_DOWNLOAD_TIMEOUT) as response, \
+                open(local_path, "wb") as f:
+            shutil.copyfileobj(response, f)
+        return build_index(read_geonames(local_path), out_path)
+
+
+_index: Optional[PostalCodeIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_postal_index() -> PostalCodeIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = settings.POSTAL_INDEX_PATH
+                index = PostalCodeIndex(path)
+                if not len(index):
+                    logger.warning(
+                        "Indeks kodów pocztowych %r nie istnieje lub jest pusty - kody pocztowe będą geokodowane "
+                        "przez Nominatim (zbuduj go: python -m utils.postal_index)",
+                        path
+                    )
+                _index = index
+    return _index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        print("Użycie: python -m utils.postal_index [PL.zip|PL.txt|URL] [plik_wyjściowy.bin]")
+        sys.exit(1)
+    source = sys.argv[1] if len(sys.argv) > 1 else settings.POSTAL_INDEX_SOURCE
+    out_path = sys.argv[2] if len(sys.argv) > 2 else settings.POSTAL_INDEX_PATH
+    if not source:
+        print("Podaj zrzut GeoNames (argument lub POSTAL_INDEX_SOURCE), np. https://download.geonames.org/export/zip/PL.zip")
+        sys.exit(1)
+    count = build_from_source(source, out_path)
+    print(f"Zapisano {count} kodów pocztowych do {out_path}")
@@ -0,0 +1,191 @@
+"""
+Road factors.
+Ratio of road distance to great-circle distance per Polish postal region (first
+digit of the postal code), used by the "estimate" distance mode. Factors are read
+once from ROAD_FACTORS_PATH (JSON); regions missing from the file - or all of them
+when there is no file - use DEFAULT_ROAD_FACTORS, which are uncalibrated starting
+values.
+
+Calibrate them from OSRM distances already stored in the route cache (SQLite):
+
+    python -m utils.road_factors route_cache.sqlite data/road_factors.json
+
+Every cached route longer than CALIBRATION_MIN_KM contributes its road /
+great-circle ratio to the regions of both ends (the region of the nearest postal
+code centroid in the postal index); a region's factor is the median of its
+ratios. Regions with fewer than ROAD_FACTORS_MIN_SAMPLES routes keep their
+current value.
+
+File format:
+    {"factors": {"0": 1.25, "3": 1.34}, "samples": {"0": 412, "3": 98}}
+"""
+import json
+import logging
+import math
+import os
+import statistics
+import sys
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from config import settings
+from utils.lazy import lazy_import
+
+# Potrzebny tylko przy kalibracji (odczyt cache tras)
+sqlite3 = lazy_import("sqlite3")
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+# Wartości startowe (niekalibrowane) - nadpisywane przez plik ROAD_FACTORS_PATH
+DEFAULT_ROAD_FACTORS = {
+    "0": 1.25,  # warszawski
+    "1": 1.28,  # olsztyński, białostocki
+    "2": 1.27,  # lubelski
+    "3": 1.32,  # krakowski, rzeszowski (tereny górskie)
+    "4": 1.24,  # katowicki, opolski
+    "5": 1.27,  # wrocławski
+    "6": 1.24,  # poznański
+    "7": 1.28,  # szczeciński
+    "8": 1.26,  # gdański, bydgoski
+    "9": 1.22,  # łódzki
+}
+
+# Krótkie trasy mają zaszumiony stosunek (dojazdy, objazdy) - pomijamy je przy kalibracji
+CALIBRATION_MIN_KM = 20.0
+
+Route = Tuple[float, float, float, float, float]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Odległość po łuku wielkiego koła (w km) między dwoma punktami."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def load_road_factors(path: Optional[str]) -> Dict[str, float]:
+    """DEFAULT_ROAD_FACTORS updated with the calibrated factors from `path`, if the file exists."""
+    factors = dict(DEFAULT_ROAD_FACTORS)
+    if not path or not os.path.exists(path):
+        return factors
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            calibrated = json.load(f)["factors"]
+        factors.update({str(region): float(factor) for region, factor in calibrated.items()})
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning("Nieprawidłowy plik współczynników drogowych %s - używane wartości domyślne: %s", path, e)
+        return dict(DEFAULT_ROAD_FACTORS)
+    return factors
+
+
+def cached_routes(db_path: str) -> Iterator[Route]:
+    """(lat1, lon1, lat2, lon2, road km) for every OSRM distance in the route cache database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT key, value FROM cache_entries WHERE namespace = 'route'").fetchall()
+    finally:
+        conn.close()
+    for key, value in rows:
+        try:
+            a, b = key.split(";")
+            lat1, lon1 = map(float, a.split(","))
+            lat2, lon2 = map(float, b.split(","))
+            distance_km = float(json.loads(value))
+        except ValueError:
+            continue
+        yield lat1, lon1, lat2, lon2, distance_km
+
+
+class RegionLocator:
+    """
+    Postal region (first digit of the postal code) of a point: the region most
+    common among postal code centroids in the point's grid cell, searching
+    neighbouring cells outwards when the cell is empty.
+    """
+
+    def __init__(self, centroids: Iterable[Tuple[int, float, float]], cell_degrees: float = 0.1, max_rings: int = 5):
+        self.cell_degrees = cell_degrees
+        self.max_rings = max_rings
+        cells: Dict[Tuple[int, int], Counter] = {}
+        for code, lat, lon in centroids:
+            cells.setdefault(self._cell(lat, lon), Counter())[str(code // 10000)] += 1
+        self._regions = {cell: counts.most_common(1)[0][0] for cell, counts in cells.items()}
+
+    def __call__(self, lat: float, lon: float) -> Optional[str]:
+        row, col = self._cell(lat, lon)
+        for ring in range(self.max_rings + 1):
+            found = Counter(
+                self._regions[(row + dr, col + dc)]
+                for dr in range(-ring, ring + 1)
+                for dc in range(-ring, ring + 1)
+                if max(abs(dr), abs(dc)) == ring and (row + dr, col + dc) in self._regions
+            )
+            if found:
+                return found.most_common(1)[0][0]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._regions)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+
+def calibrate(
+    routes: Iterable[Route],
+    locate: Callable[[float, float], Optional[str]],
+    current: Optional[Dict[str, float]] = None,
+    min_samples: Optional[int] = None
+) -> Tuple[Dict[str, float], Dict[str, int]]:
+    """
+    Median road / great-circle ratio per region from the given routes.
+    Returns (factors, samples per region); regions with too few samples keep
+    their value from `current` (DEFAULT_ROAD_FACTORS by default).
+    """
+    min_samples = settings.ROAD_FACTORS_MIN_SAMPLES if min_samples is None else min_samples
+    ratios: Dict[str, list] = {}
+    for lat1, lon1, lat2, lon2, distance_km in routes:
+        direct_km = haversine_km(lat1, lon1, lat2, lon2)
+        if direct_km < CALIBRATION_MIN_KM or distance_km < direct_km:
+            continue
+        ratio = distance_km / direct_km
+        for region in {locate(lat1, lon1), locate(lat2, lon2)} - {None}:
+            ratios.setdefault(region, []).append(ratio)
+
+    factors = dict(DEFAULT_ROAD_FACTORS if current is None else current)
+    samples = {region: len(values) for region, values in sorted(ratios.items())}
+    for region, values in ratios.items():
+        if len(values) >= min_samples:
+            factors[region] = round(statistics.median(values), 3)
+    return factors, samples
+
+
+def write_road_factors(path: str, factors: Dict[str, float], samples: Dict[str, int]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"factors": dict(sorted(factors.items())), "samples": samples}, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Użycie: python -m utils.road_factors <route_cache.sqlite> <plik_wyjściowy.json>")
+        sys.exit(1)
+
+    from utils.postal_index import get_postal_index
+
+    locate = RegionLocator(get_postal_index().centroids())
+    if not len(locate):
+        print("Brak indeksu kodów pocztowych (POSTAL_INDEX_PATH) - nie można przypisać tras do regionów")
+        sys.exit(1)
+
+    db_path, out_path = sys.argv[1], sys.argv[2]
+    factors, samples = calibrate(cached_routes(db_path), locate, current=load_road_factors(out_path))
+    write_road_factors(out_path, factors, samples)
+    for region, factor in sorted(factors.items()):
+        print(f"region {region}: {factor:.3f} ({samples.get(region, 0)} tras)")
+    print(f"Zapisano współczynniki do {out_path}")